@@ -1,12 +1,17 @@
 import os
-from typing import Optional
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
 
 from jose import jwk, jwt, JWTError
 from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select, event
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models import Profile
@@ -26,13 +31,129 @@ _SUPABASE_JWK = {
 }
 _PUBLIC_KEY = jwk.construct(_SUPABASE_JWK, algorithm=ALGORITHM)
 
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Profile:
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user as handlers see it; safe to share between requests"""
+    id: str
+    username: str
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified tokens, keyed by the token's SHA-256, holding the
+    claims and the resolved CurrentUser. An entry lives for the TTL but
+    never past the token's own exp claim, so a hit skips the ES256 signature
+    check and the Profile SELECT without extending a token's validity.
+    """
+
+    def __init__(self, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # token hash -> (expires_at epoch seconds, claims, user)
+        self._entries: "OrderedDict[str, Tuple[float, dict, CurrentUser]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Tuple[dict, CurrentUser]]:
+        token_key = self.key(token)
+        entry = self._entries.get(token_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, claims, user = entry
+        if time.time() >= expires_at:
+            self._remove(token_key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token_key)
+        self.hits += 1
+        return claims, user
+
+    def put(self, token: str, claims: dict, user: CurrentUser) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        token_key = self.key(token)
+        self._remove(token_key)
+        self._entries[token_key] = (expires_at, claims, user)
+        self._by_user.setdefault(user.id, set()).add(token_key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, token_key: str) -> None:
+        entry = self._entries.pop(token_key, None)
+        if entry is None:
+            return
+        user_id = entry[2].id
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(token_key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def invalidate_user(self, user_id: str) -> None:
+        for token_key in list(self._by_user.get(user_id, ())):
+            self._remove(token_key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> Dict[str, any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+token_cache = TokenCache()
+
+
+# A renamed or deleted profile must not be served from cached tokens
+@event.listens_for(Profile, "after_update")
+@event.listens_for(Profile, "after_delete")
+def _invalidate_profile(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
+
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached[1]
+
     try:
         payload = jwt.decode(
             token,
@@ -47,7 +168,7 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
         print(f"[auth] JWTError: {e}")
         raise credentials_exception
 
-    profile = db.query(Profile).filter(Profile.id == user_id).first()
+    profile = (await db.execute(select(Profile).where(Profile.id == user_id))).scalars().first()
 
     if profile is None:
         # Auto-create profile from JWT claims (handles local SQLite dev + trigger fallback)
@@ -59,10 +180,12 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
         try:
             profile = Profile(id=user_id, username=username)
             db.add(profile)
-            db.commit()
-            db.refresh(profile)
+            await db.commit()
+            await db.refresh(profile)
         except Exception:
-            db.rollback()
+            await db.rollback()
             raise credentials_exception
 
-    return profile
+    user = CurrentUser(id=profile.id, username=profile.username)
+    token_cache.put(token, payload, user)
+    return user
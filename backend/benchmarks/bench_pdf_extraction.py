@@ -0,0 +1,79 @@
+"""
+Benchmark - PDF page extraction: pages/second by number of extraction processes
+
+Extracts the same page range with pdf_processor.extract_page_texts_parallel
+for each worker count. 1 is the serial path; larger counts split the range
+across a process pool that opens the PDF from a temp file in /dev/shm. Pool
+start-up is excluded (the upload path keeps its pool running), and every run
+is checked against the serial text.
+
+Without --pdf a synthetic document of --pages text-dense pages is generated.
+
+Usage: python benchmarks/bench_pdf_extraction.py [--pdf notes.pdf] [--pages 600] [--workers 1 2 4 8] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--pdf", help="PDF to extract (default: a generated one)")
+parser.add_argument("--pages", type=int, default=600, help="pages of the generated PDF")
+parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+parser.add_argument("--repeat", type=int, default=3, help="runs per worker count")
+args = parser.parse_args()
+
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+import pdf_processor  # noqa: E402
+
+
+def generated_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    words = "probability distribution expectation variance estimator hypothesis sample".split()
+    for page_num in range(pages):
+        text = " ".join(f"{words[(page_num + i) % len(words)]}{i}" for i in range(900))
+        doc.new_page().insert_textbox(fitz.Rect(36, 36, 576, 756), text, fontsize=5)
+    return doc.tobytes()
+
+
+def main():
+    if args.pdf:
+        with open(args.pdf, "rb") as pdf_file:
+            pdf_bytes = pdf_file.read()
+    else:
+        pdf_bytes = generated_pdf(args.pages)
+    page_count = len(fitz.open(stream=pdf_bytes, filetype="pdf"))
+
+    with pdf_processor._shared_pdf_file(pdf_bytes) as pdf_path:
+        expected = pdf_processor.extract_page_texts_parallel(pdf_path, workers=1)
+        print(f"{page_count} pages, {sum(len(text) for text in expected)} characters, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8}{'p50':>10}{'pages/s':>10}{'speedup':>9}")
+
+        serial_ms = None
+        for workers in args.workers:
+            pool = pdf_processor.new_extraction_pool(workers) if workers > 1 else None
+            try:
+                if pool is not None:
+                    # Start the processes before timing
+                    list(pool.map(abs, range(workers)))
+                elapsed = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    texts = pdf_processor.extract_page_texts_parallel(pdf_path, workers=workers, executor=pool)
+                    elapsed.append((time.perf_counter() - started) * 1000)
+                    assert texts == expected, f"{workers} workers returned different text"
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+            p50 = statistics.median(elapsed)
+            serial_ms = serial_ms or p50
+            print(f"{workers:>8}{p50:>8.0f}ms{page_count / p50 * 1000:>10.0f}{serial_ms / p50:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
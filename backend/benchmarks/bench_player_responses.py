@@ -0,0 +1,115 @@
+"""
+Benchmark - player_responses hot queries before and after the composite indexes
+
+Builds a throwaway SQLite database shaped like an old deployment (no
+composite indexes), fills it with responses, times get_question_results and
+get_leaderboard, then applies migrations.py and times them again.
+
+Usage: python benchmarks/bench_player_responses.py [--games 500] [--players 20] [--questions 10]
+"""
+import os
+import sys
+import time
+import asyncio
+import random
+import argparse
+import statistics
+import tempfile
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--games", type=int, default=500)
+parser.add_argument("--players", type=int, default=20)
+parser.add_argument("--questions", type=int, default=10)
+parser.add_argument("--samples", type=int, default=200, help="queries timed per measurement")
+args = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text  # noqa: E402
+
+import models  # noqa: E402
+import game_service  # noqa: E402
+from database import engine, SessionLocal, AsyncSessionLocal  # noqa: E402
+from migrations import MIGRATIONS, run_migrations  # noqa: E402
+
+
+def setup() -> list:
+    models.Base.metadata.create_all(bind=engine)
+    # Start from the schema an existing database has: no composite indexes
+    with engine.begin() as conn:
+        for statement in MIGRATIONS[0].statements:
+            index_name = statement.split("EXISTS ")[1].split()[0]
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+    db = SessionLocal()
+    db.add(models.Profile(id="bench", username="bench"))
+    quiz = models.Quiz(title="bench", user_id="bench", question_count=args.questions)
+    db.add(quiz)
+    db.flush()
+    questions = [
+        models.Question(quiz_id=quiz.id, question_text=f"q{i}", options=["a", "b", "c", "d"], correct_answer_index=i % 4)
+        for i in range(args.questions)
+    ]
+    db.add_all(questions)
+    db.flush()
+    question_ids = [question.id for question in questions]
+
+    games = []
+    rows = []
+    for g in range(args.games):
+        game = models.GameSession(pin=f"{g:06d}", quiz_id=quiz.id, host_id="bench", status="finished")
+        db.add(game)
+        db.flush()
+        games.append(game.id)
+        for question in questions:
+            for p in range(args.players):
+                answer = random.randint(-1, 3)
+                rows.append({
+                    "game_session_id": game.id,
+                    "player_name": f"player{p}",
+                    "question_id": question.id,
+                    "answer_index": answer,
+                    "time_taken_ms": random.randint(500, 20000),
+                    "points_earned": random.randint(0, 1000) if answer == question.correct_answer_index else 0,
+                })
+    db.execute(insert(models.PlayerResponse), rows)
+    db.commit()
+    db.close()
+    return [(game_id, question_id) for game_id in games for question_id in question_ids]
+
+
+async def measure(targets: list) -> dict:
+    sample = random.sample(targets, min(args.samples, len(targets)))
+    timings = {}
+    async with AsyncSessionLocal() as db:
+        for name, query in (
+            ("get_question_results", lambda g, q: game_service.get_question_results(db, g, q)),
+            ("get_leaderboard", lambda g, q: game_service.get_leaderboard(db, g)),
+        ):
+            elapsed = []
+            for game_id, question_id in sample:
+                started = time.perf_counter()
+                await query(game_id, question_id)
+                elapsed.append((time.perf_counter() - started) * 1000)
+            timings[name] = (statistics.median(elapsed), max(elapsed))
+    return timings
+
+
+if __name__ == "__main__":
+    random.seed(1)
+    targets = setup()
+    with engine.connect() as conn:
+        total = conn.execute(text("SELECT COUNT(*) FROM player_responses")).scalar()
+    print(f"player_responses rows: {total}")
+
+    before = asyncio.run(measure(targets))
+    started = time.perf_counter()
+    run_migrations(engine)
+    print(f"migrations applied in {(time.perf_counter() - started) * 1000:.0f}ms")
+    after = asyncio.run(measure(targets))
+
+    print(f"{'query':<22}{'before p50':>12}{'after p50':>12}{'before max':>12}{'after max':>12}")
+    for name in before:
+        print(f"{name:<22}{before[name][0]:>10.2f}ms{after[name][0]:>10.2f}ms{before[name][1]:>10.2f}ms{after[name][1]:>10.2f}ms")
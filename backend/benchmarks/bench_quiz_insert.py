@@ -0,0 +1,100 @@
+"""
+Benchmark - saving a generated quiz: per-object ORM adds vs quiz_service.save_quiz
+
+The legacy path is what create_quiz_from_upload used to do: add and commit
+the Quiz, refresh it, add each Question and commit again. save_quiz writes
+both in one transaction with two INSERT ... RETURNING statements. Both run
+against the same throwaway SQLite database.
+
+Usage: python benchmarks/bench_quiz_insert.py [--sizes 10 100 1000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+parser.add_argument("--repeat", type=int, default=20, help="quizzes saved per size and path")
+args = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+import quiz_service  # noqa: E402
+from database import engine, SessionLocal, AsyncSessionLocal, async_engine  # noqa: E402
+from query_budget import count_statements  # noqa: E402
+
+
+def generated_questions(count: int) -> list:
+    return [
+        {
+            "question": f"Question {i}: which option is correct?",
+            "options": ["first", "second", "third", "fourth"],
+            "correct_answer_index": i % 4,
+            "explanation": f"Option {i % 4} is correct for question {i}."
+        }
+        for i in range(count)
+    ]
+
+
+async def save_legacy(questions: list) -> int:
+    async with AsyncSessionLocal() as db:
+        db_quiz = models.Quiz(title="bench", pdf_filename="bench.pdf", user_id="bench", question_count=len(questions))
+        db.add(db_quiz)
+        await db.commit()
+        await db.refresh(db_quiz)
+        for q_data in questions:
+            db.add(models.Question(
+                quiz_id=db_quiz.id,
+                question_text=q_data["question"],
+                options=q_data["options"],
+                correct_answer_index=q_data["correct_answer_index"],
+                explanation=q_data["explanation"]
+            ))
+        await db.commit()
+        return db_quiz.id
+
+
+async def save_bulk(questions: list) -> int:
+    async with AsyncSessionLocal() as db:
+        saved = await quiz_service.save_quiz(db, "bench", "bench", questions, pdf_filename="bench.pdf")
+        return saved.id
+
+
+async def measure(save, questions: list) -> tuple:
+    elapsed = []
+    with count_statements() as counter:
+        await save(questions)
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        await save(questions)
+        elapsed.append((time.perf_counter() - started) * 1000)
+    return statistics.median(elapsed), counter.count
+
+
+async def main():
+    print(f"{'questions':>10}{'legacy p50':>13}{'bulk p50':>12}{'speedup':>9}{'legacy stmts':>14}{'bulk stmts':>12}")
+    for size in args.sizes:
+        questions = generated_questions(size)
+        legacy_ms, legacy_statements = await measure(save_legacy, questions)
+        bulk_ms, bulk_statements = await measure(save_bulk, questions)
+        print(
+            f"{size:>10}{legacy_ms:>11.2f}ms{bulk_ms:>10.2f}ms{legacy_ms / bulk_ms:>8.1f}x"
+            f"{legacy_statements:>14}{bulk_statements:>12}"
+        )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(models.Profile(id="bench", username="bench"))
+    db.commit()
+    db.close()
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark - Shared room state throughput by number of worker processes
+
+Each worker process connects to the message bus the way a uvicorn worker
+does (room_state.create_room_state and message_bus.bus) and plays its own
+games: every player joins (roster update + lobby broadcast), then answers
+--rounds questions (host lookup + answer broadcast + player count), the
+shared-state traffic of join_lobby and submit_answer. Workers start together
+and the aggregate operations/second is compared with a single worker.
+
+Without --bus a local broker (message_bus.py) is started on a free port;
+pass --bus redis://localhost:6379/0 to measure against Redis instead.
+
+Usage: python benchmarks/bench_scaling.py [--bus URL] [--workers 1 2 4] [--games 20] [--players 30] [--rounds 10]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def play(bus_url: str, worker: int, games: int, players: int, rounds: int, start, results) -> None:
+    os.environ["SOCKETIO_MESSAGE_BUS"] = bus_url
+    sys.path.insert(0, BACKEND_DIR)
+    import message_bus
+    from room_state import create_room_state
+
+    room_state = create_room_state()
+    bus = message_bus.bus
+
+    async def play_game(pin: str) -> int:
+        operations = 0
+        await room_state.set_host(pin, f"{pin}-host")
+        for player in range(players):
+            await room_state.add_player(pin, f"{pin}-{player}", f"player{player}")
+            await bus.publish("bench", await room_state.snapshot(pin))
+            operations += 1
+        for _ in range(rounds):
+            for player in range(players):
+                await room_state.get_host(pin)
+                await bus.publish("bench", {"pin": pin, "player_name": f"player{player}", "answer_index": 0})
+                await room_state.player_count(pin)
+                operations += 1
+        await room_state.drop_game(pin)
+        return operations
+
+    async def main():
+        # Connect before the clock starts
+        await room_state.get_host("warmup")
+        start.wait()
+        started = time.perf_counter()
+        operations = await asyncio.gather(*(play_game(f"w{worker}g{game}") for game in range(games)))
+        results.put((sum(operations), time.perf_counter() - started))
+
+    asyncio.run(main())
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(bus_url: str, workers: int, args) -> float:
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=play, args=(bus_url, worker, args.games, args.players, args.rounds, start, results))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Let every worker import and connect before starting them together
+    time.sleep(1.0 + 0.2 * workers)
+    start.set()
+    finished = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(operations for operations, _ in finished) / max(elapsed for _, elapsed in finished)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bus", help="message bus URL (default: start a local broker)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--games", type=int, default=20, help="games per worker")
+    parser.add_argument("--players", type=int, default=30, help="players per game")
+    parser.add_argument("--rounds", type=int, default=10, help="answers per player")
+    args = parser.parse_args()
+
+    broker = None
+    bus_url = args.bus
+    if not bus_url:
+        port = free_port()
+        broker = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "message_bus.py"), "--port", str(port)])
+        bus_url = f"bus://127.0.0.1:{port}"
+        time.sleep(1.0)
+
+    try:
+        print(f"{bus_url}, {args.games} games x {args.players} players x {args.rounds} rounds per worker, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8}{'ops/s':>10}{'speedup':>9}{'per worker':>12}")
+        single = None
+        for workers in args.workers:
+            throughput = run(bus_url, workers, args)
+            single = single or throughput
+            print(f"{workers:>8}{throughput:>10.0f}{throughput / single:>8.2f}x{throughput / workers:>12.0f}")
+    finally:
+        if broker is not None:
+            broker.terminate()
+            broker.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Compaction - Roll finished games up into summary tables
+
+Every answer of every game is a player_responses row, and those rows outlive
+the game by far. Once a finished game is older than the retention period its
+rows are aggregated into game_player_summaries (final standings) and
+game_question_summaries (answer histograms), optionally exported to a gzipped
+JSON-lines file, and deleted. The leaderboard and results of a compacted game
+are then read from the summaries, and the player_responses indexes only hold
+recent games, so live-game queries stay as fast as history grows.
+
+Runs every COMPACTION_INTERVAL_S in each worker (a game is claimed through
+its game_archives row, so workers never compact the same game twice), or by
+hand: `python compaction.py [--retention-hours N] [--archive-dir DIR]`
+"""
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, delete, insert, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import game_runtime
+from database import AsyncSessionLocal
+from scheduler import timers
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_RETENTION_HOURS = float(os.getenv("COMPACTION_RETENTION_HOURS", "168"))
+COMPACTION_INTERVAL_S = int(os.getenv("COMPACTION_INTERVAL_S", "3600"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "50"))
+# Empty: raw rows are deleted without an export
+COMPACTION_ARCHIVE_DIR = os.getenv("COMPACTION_ARCHIVE_DIR", "")
+
+
+@dataclass
+class CompactionResult:
+    game_session_id: int
+    response_count: int
+    player_count: int
+    question_count: int
+    archive_path: Optional[str]
+
+
+def _write_archive(path: str, rows: List[Dict]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(json.dumps(row, default=str) + "\n")
+    os.replace(tmp_path, path)
+
+
+async def _export_responses(db: AsyncSession, game_session_id: int, archive_dir: str) -> str:
+    rows = (await db.execute(select(
+        models.PlayerResponse.id,
+        models.PlayerResponse.player_name,
+        models.PlayerResponse.player_socket_id,
+        models.PlayerResponse.question_id,
+        models.PlayerResponse.answer_index,
+        models.PlayerResponse.time_taken_ms,
+        models.PlayerResponse.points_earned,
+        models.PlayerResponse.answered_at
+    ).where(
+        models.PlayerResponse.game_session_id == game_session_id
+    ).order_by(models.PlayerResponse.id))).mappings().all()
+
+    path = os.path.join(archive_dir, f"game_{game_session_id}.jsonl.gz")
+    # Compression is CPU-bound; keep it off the event loop
+    await asyncio.to_thread(_write_archive, path, [dict(row) for row in rows])
+    return path
+
+
+async def compact_game(db: AsyncSession, game_session_id: int, archive_dir: str = COMPACTION_ARCHIVE_DIR) -> Optional[CompactionResult]:
+    """
+    Summarize one finished game and delete its player_responses rows,
+    in a single transaction.
+
+    Args:
+        db: Database session
+        game_session_id: ID of a finished game session
+        archive_dir: Directory for the raw-row export, empty to skip it
+
+    Returns:
+        CompactionResult, or None if the game was already compacted
+    """
+    try:
+        # Claim first: a concurrent compaction of the same game fails here
+        db.add(models.GameArchive(game_session_id=game_session_id))
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+    players = (await db.execute(select(
+        models.PlayerResponse.player_name,
+        func.coalesce(func.sum(models.PlayerResponse.points_earned), 0),
+        # Same questions_answered as get_leaderboard: no-answers don't count
+        func.count(case((models.PlayerResponse.answer_index >= 0, 1)))
+    ).where(
+        models.PlayerResponse.game_session_id == game_session_id
+    ).group_by(models.PlayerResponse.player_name))).all()
+
+    answer_rows = (await db.execute(select(
+        models.PlayerResponse.question_id,
+        models.Question.correct_answer_index,
+        models.PlayerResponse.answer_index,
+        func.count(models.PlayerResponse.id),
+        func.sum(models.PlayerResponse.time_taken_ms)
+    ).join(
+        models.Question, models.Question.id == models.PlayerResponse.question_id
+    ).where(
+        models.PlayerResponse.game_session_id == game_session_id
+    ).group_by(
+        models.PlayerResponse.question_id,
+        models.Question.correct_answer_index,
+        models.PlayerResponse.answer_index
+    ))).all()
+
+    question_stats: Dict[int, game_runtime.QuestionStats] = {}
+    for question_id, correct_answer_index, answer_index, count, total_time_ms in answer_rows:
+        stats = question_stats.setdefault(question_id, game_runtime.QuestionStats())
+        stats.record(answer_index, answer_index == correct_answer_index, total_time_ms or 0, count)
+    response_count = sum(stats.total_responses for stats in question_stats.values())
+
+    if players:
+        await db.execute(insert(models.GamePlayerSummary), [
+            {
+                "game_session_id": game_session_id,
+                "player_name": player_name,
+                "total_points": int(total_points),
+                "questions_answered": questions_answered
+            }
+            for player_name, total_points, questions_answered in players
+        ])
+    if question_stats:
+        await db.execute(insert(models.GameQuestionSummary), [
+            {
+                "game_session_id": game_session_id,
+                "question_id": question_id,
+                "distribution": {str(index): count for index, count in stats.distribution.items()},
+                "total_responses": stats.total_responses,
+                "correct_count": stats.correct_count,
+                "answered_count": stats.answered_count,
+                "total_time_ms": stats.total_time_ms
+            }
+            for question_id, stats in question_stats.items()
+        ])
+
+    archive_path = None
+    if archive_dir and response_count:
+        archive_path = await _export_responses(db, game_session_id, archive_dir)
+
+    await db.execute(delete(models.PlayerResponse).where(
+        models.PlayerResponse.game_session_id == game_session_id
+    ))
+    archive = await db.get(models.GameArchive, game_session_id)
+    archive.response_count = response_count
+    archive.archive_path = archive_path
+    await db.commit()
+
+    return CompactionResult(
+        game_session_id=game_session_id,
+        response_count=response_count,
+        player_count=len(players),
+        question_count=len(question_stats),
+        archive_path=archive_path
+    )
+
+
+class Compactor:
+    """Periodic compaction of finished games, with counters for /internal/metrics"""
+
+    def __init__(
+        self,
+        retention_hours: float = COMPACTION_RETENTION_HOURS,
+        batch_size: int = COMPACTION_BATCH_SIZE,
+        archive_dir: str = COMPACTION_ARCHIVE_DIR
+    ):
+        self.retention_hours = retention_hours
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+
+        self._timer = None
+        self._active: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.runs = 0
+        self.games_compacted = 0
+        self.responses_removed = 0
+        self.failures = 0
+        self.last_run_ms = 0.0
+
+    async def compact_due_games(self) -> List[CompactionResult]:
+        """Compact up to batch_size finished games older than the retention period"""
+        start = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.retention_hours)
+        results = []
+        async with AsyncSessionLocal() as db:
+            due = (await db.execute(select(models.GameSession.id).outerjoin(
+                models.GameArchive, models.GameArchive.game_session_id == models.GameSession.id
+            ).where(
+                models.GameSession.status == "finished",
+                models.GameSession.ended_at < cutoff,
+                models.GameArchive.game_session_id.is_(None)
+            ).order_by(models.GameSession.id).limit(self.batch_size))).scalars().all()
+
+            for game_session_id in due:
+                try:
+                    result = await compact_game(db, game_session_id, self.archive_dir)
+                except Exception as e:
+                    await db.rollback()
+                    self.failures += 1
+                    logger.error(f"Compaction of game session {game_session_id} failed: {e}")
+                    continue
+                if result is not None:
+                    results.append(result)
+                    self.games_compacted += 1
+                    self.responses_removed += result.response_count
+
+        self.runs += 1
+        self.last_run_ms = (time.perf_counter() - start) * 1000
+        if results:
+            logger.info(
+                f"Compacted {len(results)} games, removed "
+                f"{sum(result.response_count for result in results)} player responses"
+            )
+        return results
+
+    async def _run(self) -> None:
+        self._timer = None
+        self._active = asyncio.current_task()
+        try:
+            await self.compact_due_games()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Compaction run failed: {e}")
+        finally:
+            self._active = None
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if COMPACTION_INTERVAL_S > 0 and not self._stopping and timers.running:
+            self._timer = timers.call_later(COMPACTION_INTERVAL_S, self._run)
+
+    def start(self) -> None:
+        """Schedule periodic runs on the shared timer heap"""
+        self._stopping = False
+        self._schedule()
+
+    async def stop(self) -> None:
+        """Cancel the next run and wait for a run in progress to commit"""
+        self._stopping = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._active is not None:
+            await self._active
+
+    def stats(self) -> Dict[str, any]:
+        return {
+            "retention_hours": self.retention_hours,
+            "runs": self.runs,
+            "games_compacted": self.games_compacted,
+            "responses_removed": self.responses_removed,
+            "failures": self.failures,
+            "last_run_ms": round(self.last_run_ms, 2),
+        }
+
+
+compactor = Compactor()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact finished games into summary tables")
+    parser.add_argument("--retention-hours", type=float, default=COMPACTION_RETENTION_HOURS,
+                        help="only compact games finished longer ago than this")
+    parser.add_argument("--archive-dir", default=COMPACTION_ARCHIVE_DIR,
+                        help="export raw rows here as gzipped JSON lines before deleting them")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        once = Compactor(args.retention_hours, args.batch_size, args.archive_dir)
+        total = 0
+        while True:
+            results = await once.compact_due_games()
+            total += len(results)
+            if len(results) < args.batch_size:
+                break
+        print(f"Compacted {total} games ({once.responses_removed} player responses)")
+
+    asyncio.run(main())
@@ -0,0 +1,340 @@
+"""
+Game Runtime - In-memory authoritative state for live game sessions
+
+A GameRuntime is created when a game starts and holds everything the answer
+hot path needs (answer key, time limits, players and scores), so submitting
+an answer, scoring it and reading the leaderboard never touch the database.
+The database stays the durable record and is written asynchronously.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import os
+import time
+
+import game_service
+from leaderboard import Leaderboard
+
+DEFAULT_QUESTION_TIME_LIMIT_MS = 20000
+
+# Answers arriving this long after a window's deadline are still accepted, to
+# absorb network latency between the player's click and the server; the close
+# timer fires only once the grace has run out
+LATE_ANSWER_GRACE_MS = int(os.getenv("LATE_ANSWER_GRACE_MS", "500"))
+
+
+@dataclass
+class RuntimeQuestion:
+    """Answer key entry for a single question of the running quiz"""
+    id: int
+    index: int
+    correct_answer_index: int
+    question_text: str = ""
+    options: List[str] = field(default_factory=list)
+    time_limit_ms: int = DEFAULT_QUESTION_TIME_LIMIT_MS
+
+    def public_payload(self) -> Dict[str, any]:
+        """Question as shown to players, without the answer"""
+        return {
+            "id": self.id,
+            "question_text": self.question_text,
+            "options": self.options
+        }
+
+
+@dataclass
+class AnswerResult:
+    """Outcome of scoring one answer, mirrors a PlayerResponse row"""
+    game_session_id: int
+    player_name: str
+    question_id: int
+    answer_index: int
+    time_taken_ms: int
+    points_earned: int
+    is_correct: bool
+    player_socket_id: Optional[str] = None
+    duplicate: bool = False
+
+    def to_row(self) -> Dict[str, any]:
+        """Column values for inserting this answer as a PlayerResponse"""
+        return {
+            "game_session_id": self.game_session_id,
+            "player_name": self.player_name,
+            "player_socket_id": self.player_socket_id,
+            "question_id": self.question_id,
+            "answer_index": self.answer_index,
+            "time_taken_ms": self.time_taken_ms,
+            "points_earned": self.points_earned,
+        }
+
+
+@dataclass
+class QuestionStats:
+    """Answer histogram for one question, updated as answers are scored"""
+    distribution: Dict[int, int] = field(default_factory=lambda: {0: 0, 1: 0, 2: 0, 3: 0})
+    total_responses: int = 0
+    correct_count: int = 0
+    answered_count: int = 0
+    total_time_ms: int = 0
+
+    def record(self, answer_index: int, is_correct: bool, time_taken_ms: int, count: int = 1) -> None:
+        """
+        Add `count` responses with the same answer.
+
+        Args:
+            answer_index: Chosen option, -1 for no answer
+            is_correct: Whether answer_index is the correct option
+            time_taken_ms: Combined time taken of the `count` responses
+            count: Number of responses
+        """
+        self.total_responses += count
+        if 0 <= answer_index <= 3:
+            self.distribution[answer_index] += count
+        if is_correct:
+            self.correct_count += count
+        # No-answers are recorded with the full time limit; leave them out of the mean
+        if answer_index >= 0:
+            self.answered_count += count
+            self.total_time_ms += time_taken_ms or 0
+
+    def to_dict(self, question_id: int, correct_answer_index: Optional[int]) -> Dict[str, any]:
+        """Stats in get_question_results format"""
+        return {
+            "question_id": question_id,
+            "total_responses": self.total_responses,
+            "distribution": dict(self.distribution),
+            "correct_answer_index": correct_answer_index,
+            "correct_count": self.correct_count,
+            "accuracy": (self.correct_count / self.total_responses * 100) if self.total_responses > 0 else 0,
+            "average_time_ms": round(self.total_time_ms / self.answered_count) if self.answered_count else None
+        }
+
+
+@dataclass
+class GameRuntime:
+    """Live state of one game session, keyed by its PIN"""
+    pin: str
+    game_session_id: int
+    quiz_id: int
+    questions: Dict[int, RuntimeQuestion]
+    players: Set[str] = field(default_factory=set)
+    standings: Leaderboard = field(default_factory=Leaderboard)
+    _answers: Dict[Tuple[str, int], AnswerResult] = field(default_factory=dict)
+    # Per-question histograms, so results are read without scanning answers
+    _question_stats: Dict[int, QuestionStats] = field(default_factory=dict)
+
+    # Server-driven question lifecycle, on time.monotonic()
+    current_index: int = -1
+    active_question_id: Optional[int] = None
+    window_opened_at: float = 0.0
+    window_closes_at: float = 0.0
+    active_answer_count: int = 0
+    server_paced: bool = False
+
+    def __post_init__(self):
+        self._order = sorted(self.questions, key=lambda question_id: self.questions[question_id].index)
+
+    @property
+    def question_count(self) -> int:
+        return len(self.questions)
+
+    def question_at(self, index: int) -> Optional[RuntimeQuestion]:
+        """Question at a 0-based position in the quiz"""
+        if 0 <= index < len(self._order):
+            return self.questions[self._order[index]]
+        return None
+
+    def has_answered(self, player_name: str, question_id: int) -> bool:
+        return (player_name, question_id) in self._answers
+
+    def open_question(self, index: int, now: Optional[float] = None, time_limit_ms: Optional[int] = None) -> RuntimeQuestion:
+        """
+        Open the answer window for a question. From then on the runtime is
+        server paced: only the open question accepts answers, until its deadline.
+
+        Args:
+            index: 0-based position of the question in the quiz
+            now: Current time.monotonic() value
+            time_limit_ms: Override the question's time limit
+
+        Returns:
+            The opened question
+        """
+        question = self.question_at(index)
+        if question is None:
+            raise ValueError("Question index out of range")
+        if time_limit_ms:
+            question.time_limit_ms = time_limit_ms
+
+        now = time.monotonic() if now is None else now
+        self.server_paced = True
+        self.current_index = index
+        self.active_question_id = question.id
+        self.window_opened_at = now
+        self.window_closes_at = now + question.time_limit_ms / 1000
+        self.active_answer_count = sum(
+            1 for player_name in self.players if self.has_answered(player_name, question.id)
+        )
+        return question
+
+    def close_question(self) -> List[AnswerResult]:
+        """
+        Close the open answer window. Players who did not answer are recorded
+        with no answer (index -1) and zero points.
+
+        Returns:
+            The no-answer results, for persistence
+        """
+        question_id = self.active_question_id
+        if question_id is None:
+            return []
+        self.active_question_id = None
+
+        question = self.questions[question_id]
+        missing = []
+        for player_name in sorted(self.players):
+            if not self.has_answered(player_name, question_id):
+                missing.append(self._score(player_name, question, -1, question.time_limit_ms, None))
+        return missing
+
+    def add_player(self, player_name: str) -> None:
+        """Register a player as part of this game"""
+        self.players.add(player_name)
+
+    def record_answer(
+        self,
+        player_name: str,
+        question_id: int,
+        answer_index: int,
+        time_taken_ms: int,
+        player_socket_id: Optional[str] = None
+    ) -> AnswerResult:
+        """
+        Score an answer against the in-memory answer key.
+
+        A player's first answer to a question is authoritative; repeated
+        submissions return the original result flagged as a duplicate.
+        Once the game is server paced, answers outside the open window are
+        rejected and the time taken is measured by the server.
+
+        Args:
+            player_name: Name of the player
+            question_id: ID of the question
+            answer_index: Index of chosen answer (0-3, -1 for no answer)
+            time_taken_ms: Time taken to answer in milliseconds
+            player_socket_id: Socket ID for tracking connection
+
+        Returns:
+            AnswerResult with calculated points
+        """
+        question = self.questions.get(question_id)
+        if question is None:
+            raise ValueError("Question not found")
+
+        now = time.monotonic()
+        if self.server_paced and (
+            question_id != self.active_question_id
+            or now > self.window_closes_at + LATE_ANSWER_GRACE_MS / 1000
+        ):
+            raise ValueError("Answer window is closed")
+
+        previous = self._answers.get((player_name, question_id))
+        if previous is not None:
+            return AnswerResult(**{**previous.__dict__, "duplicate": True})
+
+        if self.server_paced:
+            # Answers are timed by the server, from the moment the window opened
+            time_taken_ms = min(int((now - self.window_opened_at) * 1000), question.time_limit_ms)
+            self.active_answer_count += 1
+
+        return self._score(player_name, question, answer_index, time_taken_ms, player_socket_id)
+
+    def _score(
+        self,
+        player_name: str,
+        question: RuntimeQuestion,
+        answer_index: int,
+        time_taken_ms: int,
+        player_socket_id: Optional[str]
+    ) -> AnswerResult:
+        is_correct = answer_index == question.correct_answer_index
+        points = game_service.calculate_points(time_taken_ms, question.time_limit_ms) if is_correct else 0
+
+        result = AnswerResult(
+            game_session_id=self.game_session_id,
+            player_name=player_name,
+            question_id=question.id,
+            answer_index=answer_index,
+            time_taken_ms=time_taken_ms,
+            points_earned=points,
+            is_correct=is_correct,
+            player_socket_id=player_socket_id,
+        )
+        self._answers[(player_name, question.id)] = result
+        self._stats_for(question.id).record(answer_index, is_correct, time_taken_ms)
+        self.add_player(player_name)
+        self.standings.record(player_name, points, answered=answer_index >= 0)
+        return result
+
+    def _stats_for(self, question_id: int) -> QuestionStats:
+        stats = self._question_stats.get(question_id)
+        if stats is None:
+            stats = self._question_stats[question_id] = QuestionStats()
+        return stats
+
+    def question_results(self, question_id: int) -> Dict[str, any]:
+        """Answer distribution for a question, in get_question_results format"""
+        question = self.questions.get(question_id)
+        stats = self._question_stats.get(question_id) or QuestionStats()
+        return stats.to_dict(question_id, question.correct_answer_index if question else None)
+
+    def restore_answer(
+        self,
+        player_name: str,
+        question_id: int,
+        answer_index: int,
+        time_taken_ms: int,
+        points_earned: int
+    ) -> None:
+        """Replay a persisted answer when rebuilding the runtime from the database"""
+        key = (player_name, question_id)
+        if key in self._answers:
+            return
+        question = self.questions.get(question_id)
+        result = self._answers[key] = AnswerResult(
+            game_session_id=self.game_session_id,
+            player_name=player_name,
+            question_id=question_id,
+            answer_index=answer_index,
+            time_taken_ms=time_taken_ms or 0,
+            points_earned=points_earned or 0,
+            is_correct=question is not None and answer_index == question.correct_answer_index,
+        )
+        self._stats_for(question_id).record(answer_index, result.is_correct, result.time_taken_ms)
+        self.add_player(player_name)
+        self.standings.record(player_name, points_earned or 0, answered=answer_index >= 0)
+
+    def leaderboard(self, limit: Optional[int] = None) -> List[Dict[str, any]]:
+        """Current standings in the same format as game_service.get_leaderboard"""
+        return self.standings.top(limit)
+
+
+# Live runtimes
+# Structure: {pin: GameRuntime}
+_runtimes: Dict[str, GameRuntime] = {}
+
+
+def register_runtime(runtime: GameRuntime) -> GameRuntime:
+    """Make a runtime the authoritative state for its PIN"""
+    _runtimes[runtime.pin] = runtime
+    return runtime
+
+
+def get_runtime(pin: str) -> Optional[GameRuntime]:
+    """Get the live runtime for a PIN, if the game is running in this process"""
+    return _runtimes.get(pin)
+
+
+def discard_runtime(pin: str) -> Optional[GameRuntime]:
+    """Drop the runtime for a PIN once its game is over"""
+    return _runtimes.pop(pin, None)
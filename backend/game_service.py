@@ -1,35 +1,37 @@
 """
 Game Service - Business logic for real-time multiplayer quiz games
 """
-import random
-import string
-from datetime import datetime, timezone
+import os
+import logging
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import select, func, desc, insert, update, and_, or_, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
+import game_runtime
+from database import AsyncSessionLocal
+from pin_allocator import pin_allocator
 
+logger = logging.getLogger(__name__)
 
-def generate_pin(db: Session) -> str:
+
+LIVE_STATUSES = ("lobby", "active")
+LOBBY_TTL_MINUTES = int(os.getenv("GAME_LOBBY_TTL_MINUTES", "120"))
+ACTIVE_TTL_MINUTES = int(os.getenv("GAME_ACTIVE_TTL_MINUTES", "360"))
+_MAX_PIN_ATTEMPTS = 5
+
+
+def generate_pin() -> str:
     """
-    Generate a unique 6-digit PIN for a game session.
-    Ensures the PIN doesn't already exist in the database.
+    Allocate a 6-digit PIN that no live game on this worker is using.
+    The PIN stays reserved until the game finishes or expires.
     """
-    max_attempts = 100
-    for _ in range(max_attempts):
-        # Generate random 6-digit number
-        pin = ''.join(random.choices(string.digits, k=6))
-        
-        # Check if PIN already exists
-        existing = db.query(models.GameSession).filter(models.GameSession.pin == pin).first()
-        if not existing:
-            return pin
-    
-    raise Exception("Unable to generate unique PIN after multiple attempts")
+    return pin_allocator.allocate()
 
 
-def create_game_session(db: Session, quiz_id: int, host_id: int) -> models.GameSession:
+async def create_game_session(db: AsyncSession, quiz_id: int, host_id: int) -> models.GameSession:
     """
     Create a new game session with a unique PIN.
     
@@ -42,34 +44,105 @@ def create_game_session(db: Session, quiz_id: int, host_id: int) -> models.GameS
         GameSession object with generated PIN
     """
     # Verify quiz exists and belongs to host
-    quiz = db.query(models.Quiz).filter(
+    quiz = (await db.execute(select(models.Quiz).where(
         models.Quiz.id == quiz_id,
         models.Quiz.user_id == host_id
-    ).first()
+    ))).scalars().first()
     
     if not quiz:
         raise ValueError("Quiz not found or you don't have permission to host it")
     
-    # Generate unique PIN
-    pin = generate_pin(db)
+    for _ in range(_MAX_PIN_ATTEMPTS):
+        pin = generate_pin()
+        
+        game_session = models.GameSession(
+            pin=pin,
+            quiz_id=quiz_id,
+            host_id=host_id,
+            status="lobby",
+            current_question_index=0,
+            quiz=quiz
+        )
+        
+        db.add(game_session)
+        try:
+            await db.commit()
+            return game_session
+        except IntegrityError:
+            # Another worker has a live game on this PIN; keep it marked and retry
+            await db.rollback()
+            pin_allocator.collisions += 1
+            logger.warning(f"PIN {pin} is live on another worker, allocating again")
+            quiz = await db.get(models.Quiz, quiz_id)
     
-    # Create game session
-    game_session = models.GameSession(
-        pin=pin,
-        quiz_id=quiz_id,
-        host_id=host_id,
-        status="lobby",
-        current_question_index=0
-    )
+    raise Exception("Unable to generate unique PIN after multiple attempts")
+
+
+async def get_session_by_pin(db: AsyncSession, pin: str, host_id: Optional[str] = None) -> Optional[models.GameSession]:
+    """
+    Find the game session a PIN currently refers to.
+    PINs are reused once a game finishes, so this is the newest session
+    with the PIN; older finished sessions are reached by id.
     
-    db.add(game_session)
-    db.commit()
-    db.refresh(game_session)
+    Args:
+        db: Database session
+        pin: 6-digit PIN code
+        host_id: If given, only match sessions hosted by this user
     
-    return game_session
+    Returns:
+        GameSession if found, None otherwise
+    """
+    query = select(models.GameSession).where(models.GameSession.pin == pin)
+    if host_id is not None:
+        query = query.where(models.GameSession.host_id == host_id)
+    return (await db.execute(query.order_by(models.GameSession.id.desc()).limit(1))).scalars().first()
 
 
-def validate_pin(db: Session, pin: str) -> Optional[models.GameSession]:
+async def sync_pin_allocator(db: AsyncSession) -> int:
+    """
+    Rebuild this worker's PIN bitset from the live games in the database.
+    
+    Returns:
+        Number of live PINs
+    """
+    live_pins = (await db.execute(
+        select(models.GameSession.pin).where(models.GameSession.status.in_(LIVE_STATUSES))
+    )).scalars().all()
+    pin_allocator.sync(live_pins)
+    return pin_allocator.live
+
+
+async def expire_stale_games(db: AsyncSession) -> List[str]:
+    """
+    Finish games left in the lobby or active for longer than their TTL,
+    so their PINs can be reused.
+    
+    Returns:
+        PINs of the games that were expired
+    """
+    now = datetime.now(timezone.utc)
+    stale = or_(
+        and_(models.GameSession.status == "lobby",
+             models.GameSession.created_at < now - timedelta(minutes=LOBBY_TTL_MINUTES)),
+        and_(models.GameSession.status == "active",
+             models.GameSession.started_at < now - timedelta(minutes=ACTIVE_TTL_MINUTES))
+    )
+    expired = (await db.execute(
+        update(models.GameSession)
+        .where(stale)
+        .values(status="finished", ended_at=now)
+        .returning(models.GameSession.pin)
+    )).scalars().all()
+    await db.commit()
+    
+    for pin in expired:
+        pin_allocator.release(pin)
+    if expired:
+        logger.info(f"Expired {len(expired)} stale games")
+    return list(expired)
+
+
+async def validate_pin(db: AsyncSession, pin: str) -> Optional[models.GameSession]:
     """
     Check if a PIN corresponds to an active game session.
     
@@ -83,18 +156,58 @@ def validate_pin(db: Session, pin: str) -> Optional[models.GameSession]:
     if not pin or len(pin) != 6 or not pin.isdigit():
         return None
     
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.pin == pin
-    ).first()
+    # Can only join games in lobby or active status (not finished). Finished
+    # games keep their PIN, which may since have been reused by a newer game.
+    return (await db.execute(select(models.GameSession).where(
+        models.GameSession.pin == pin,
+        models.GameSession.status.in_(LIVE_STATUSES)
+    ).order_by(models.GameSession.id.desc()).limit(1))).scalars().first()
+
+
+async def get_game_summary(db: AsyncSession, pin: str) -> Optional[Dict]:
+    """
+    Public info about a joinable game, read in a single query together with
+    the quiz title and its stored question count.
     
-    # Can only join games in lobby or active status (not finished)
-    if game_session and game_session.status in ["lobby", "active"]:
-        return game_session
+    Args:
+        db: Database session
+        pin: 6-digit PIN code
     
-    return None
+    Returns:
+        Dict with pin, quiz_id, quiz_title, status, question_count and
+        current_question_index, or None if the game is not joinable
+    """
+    if not pin or len(pin) != 6 or not pin.isdigit():
+        return None
+    
+    row = (await db.execute(select(
+        models.GameSession.pin,
+        models.GameSession.quiz_id,
+        models.Quiz.title,
+        models.GameSession.status,
+        models.Quiz.question_count,
+        models.GameSession.current_question_index
+    ).join(
+        models.Quiz, models.Quiz.id == models.GameSession.quiz_id
+    ).where(
+        models.GameSession.pin == pin,
+        models.GameSession.status.in_(LIVE_STATUSES)
+    ))).first()
+    
+    if row is None:
+        return None
+    
+    return {
+        "pin": row.pin,
+        "quiz_id": row.quiz_id,
+        "quiz_title": row.title,
+        "status": row.status,
+        "question_count": row.question_count,
+        "current_question_index": row.current_question_index
+    }
 
 
-def start_game(db: Session, game_session_id: int) -> bool:
+async def start_game(db: AsyncSession, game_session_id: int) -> bool:
     """
     Start a game session (move from lobby to active).
     
@@ -105,21 +218,98 @@ def start_game(db: Session, game_session_id: int) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.id == game_session_id
-    ).first()
+    game_session = await db.get(models.GameSession, game_session_id)
     
     if not game_session or game_session.status != "lobby":
         return False
     
     game_session.status = "active"
     game_session.started_at = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
+    
+    await load_runtime(db, game_session)
     
     return True
 
 
-def advance_question(db: Session, game_session_id: int) -> Optional[int]:
+async def load_runtime(db: AsyncSession, game_session: models.GameSession) -> game_runtime.GameRuntime:
+    """
+    Build the in-memory runtime for an active game session.
+    Loads the answer key once, and replays any persisted answers so a
+    runtime rebuilt after a restart continues with the same scores.
+    
+    Args:
+        db: Database session
+        game_session: The active game session
+    
+    Returns:
+        The registered GameRuntime for the session's PIN
+    """
+    question_rows = (await db.execute(select(
+        models.Question.id,
+        models.Question.correct_answer_index,
+        models.Question.question_text,
+        models.Question.options
+    ).where(
+        models.Question.quiz_id == game_session.quiz_id
+    ).order_by(models.Question.id))).all()
+    
+    runtime = game_runtime.GameRuntime(
+        pin=game_session.pin,
+        game_session_id=game_session.id,
+        quiz_id=game_session.quiz_id,
+        questions={
+            question_id: game_runtime.RuntimeQuestion(
+                id=question_id,
+                index=index,
+                correct_answer_index=correct_answer_index,
+                question_text=question_text,
+                options=options
+            )
+            for index, (question_id, correct_answer_index, question_text, options) in enumerate(question_rows)
+        }
+    )
+    
+    persisted = (await db.execute(select(
+        models.PlayerResponse.player_name,
+        models.PlayerResponse.question_id,
+        models.PlayerResponse.answer_index,
+        models.PlayerResponse.time_taken_ms,
+        models.PlayerResponse.points_earned
+    ).where(
+        models.PlayerResponse.game_session_id == game_session.id
+    ).order_by(models.PlayerResponse.id))).all()
+    
+    for player_name, question_id, answer_index, time_taken_ms, points_earned in persisted:
+        runtime.restore_answer(player_name, question_id, answer_index, time_taken_ms, points_earned)
+    
+    return game_runtime.register_runtime(runtime)
+
+
+async def get_live_runtime(db: AsyncSession, pin: str) -> Optional[game_runtime.GameRuntime]:
+    """
+    Get the runtime for an active game, rebuilding it from the database if
+    this process has not seen the game yet (e.g. after a restart).
+    
+    Args:
+        db: Database session
+        pin: 6-digit PIN code
+    
+    Returns:
+        GameRuntime if the game is active, None otherwise
+    """
+    runtime = game_runtime.get_runtime(pin)
+    if runtime is not None:
+        return runtime
+    
+    game_session = await validate_pin(db, pin)
+    if not game_session or game_session.status != "active":
+        return None
+    
+    return await load_runtime(db, game_session)
+
+
+async def advance_question(db: AsyncSession, game_session_id: int) -> Optional[int]:
     """
     Move to the next question in the game.
     
@@ -130,25 +320,29 @@ def advance_question(db: Session, game_session_id: int) -> Optional[int]:
     Returns:
         New question index, or None if game is finished
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.id == game_session_id
-    ).first()
+    game_session = await db.get(models.GameSession, game_session_id)
     
     if not game_session or game_session.status != "active":
         return None
     
-    # Get total question count
-    question_count = len(game_session.quiz.questions)
+    # Stored count, instead of counting the quiz's question rows
+    question_count = await db.scalar(
+        select(models.Quiz.question_count).where(models.Quiz.id == game_session.quiz_id)
+    )
     
     # Move to next question
     game_session.current_question_index += 1
     
     # Check if game is finished
-    if game_session.current_question_index >= question_count:
+    finished = game_session.current_question_index >= question_count
+    if finished:
         game_session.status = "finished"
         game_session.ended_at = datetime.now(timezone.utc)
     
-    db.commit()
+    await db.commit()
+    # Same as end_game: the PIN can go to a new game
+    if finished:
+        pin_allocator.release(game_session.pin)
     
     return game_session.current_question_index
 
@@ -180,8 +374,8 @@ def calculate_points(time_taken_ms: int, question_time_limit_ms: int = 20000, ba
     return max(0, points)  # Ensure non-negative
 
 
-def record_answer(
-    db: Session,
+async def record_answer(
+    db: AsyncSession,
     game_session_id: int,
     player_name: str,
     question_id: int,
@@ -205,7 +399,7 @@ def record_answer(
         PlayerResponse object with calculated points
     """
     # Get the question to check correct answer
-    question = db.query(models.Question).filter(models.Question.id == question_id).first()
+    question = await db.get(models.Question, question_id)
     
     if not question:
         raise ValueError("Question not found")
@@ -226,13 +420,54 @@ def record_answer(
     )
     
     db.add(response)
-    db.commit()
-    db.refresh(response)
+    await db.commit()
+    await db.refresh(response)
     
     return response
 
 
-def get_leaderboard(db: Session, game_session_id: int) -> List[Dict[str, any]]:
+async def load_live_runtime(pin: str) -> Optional[game_runtime.GameRuntime]:
+    """
+    get_live_runtime with its own database session, for callers outside
+    a request (Socket.IO handlers).
+    
+    Args:
+        pin: 6-digit PIN code
+    
+    Returns:
+        GameRuntime if the game is active, None otherwise
+    """
+    async with AsyncSessionLocal() as db:
+        return await get_live_runtime(db, pin)
+
+
+async def persist_answers(results: List[game_runtime.AnswerResult]) -> int:
+    """
+    Durably record answers scored by a GameRuntime with a single bulk insert,
+    using its own database session.
+    
+    Args:
+        results: Scored answers to insert as PlayerResponse rows
+    
+    Returns:
+        Number of rows written (0 if the insert failed)
+    """
+    rows = [result.to_row() for result in results if not result.duplicate]
+    if not rows:
+        return 0
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(insert(models.PlayerResponse), rows)
+            await db.commit()
+            return len(rows)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to persist {len(rows)} player responses: {e}")
+            return 0
+
+
+async def get_leaderboard(db: AsyncSession, game_session_id: int) -> List[Dict[str, any]]:
     """
     Get current leaderboard for a game session.
     Aggregates points by player name and ranks them.
@@ -244,22 +479,41 @@ def get_leaderboard(db: Session, game_session_id: int) -> List[Dict[str, any]]:
     Returns:
         List of player standings with rank, name, and total points
     """
-    # Aggregate points by player
-    leaderboard_query = db.query(
+    if await db.get(models.GameArchive, game_session_id) is not None:
+        # Compacted game: standings were rolled up when its answers were removed
+        leaderboard_query = (await db.execute(select(
+            models.GamePlayerSummary.player_name,
+            models.GamePlayerSummary.total_points,
+            models.GamePlayerSummary.questions_answered
+        ).where(
+            models.GamePlayerSummary.game_session_id == game_session_id
+        ).order_by(
+            desc(models.GamePlayerSummary.total_points),
+            models.GamePlayerSummary.player_name
+        ))).all()
+        return _rank(leaderboard_query)
+    
+    # Aggregate points by player; no-answers (index -1) score nothing and are not counted as answered
+    leaderboard_query = (await db.execute(select(
         models.PlayerResponse.player_name,
         func.sum(models.PlayerResponse.points_earned).label('total_points'),
-        func.count(models.PlayerResponse.id).label('questions_answered')
-    ).filter(
+        func.count(case((models.PlayerResponse.answer_index >= 0, 1))).label('questions_answered')
+    ).where(
         models.PlayerResponse.game_session_id == game_session_id
     ).group_by(
         models.PlayerResponse.player_name
     ).order_by(
-        desc('total_points')
-    ).all()
+        desc('total_points'),
+        models.PlayerResponse.player_name
+    ))).all()
     
-    # Format as list of dicts with rank
+    return _rank(leaderboard_query)
+
+
+def _rank(rows) -> List[Dict[str, any]]:
+    """Format (player_name, total_points, questions_answered) rows, best first, with ranks"""
     leaderboard = []
-    for rank, (player_name, total_points, questions_answered) in enumerate(leaderboard_query, start=1):
+    for rank, (player_name, total_points, questions_answered) in enumerate(rows, start=1):
         leaderboard.append({
             "rank": rank,
             "player_name": player_name,
@@ -270,7 +524,7 @@ def get_leaderboard(db: Session, game_session_id: int) -> List[Dict[str, any]]:
     return leaderboard
 
 
-def get_question_results(db: Session, game_session_id: int, question_id: int) -> Dict[str, any]:
+async def get_question_results(db: AsyncSession, game_session_id: int, question_id: int) -> Dict[str, any]:
     """
     Get answer distribution for a specific question (for host view).
     
@@ -282,39 +536,66 @@ def get_question_results(db: Session, game_session_id: int, question_id: int) ->
     Returns:
         Dict with answer distribution and stats
     """
-    # Count answers by option
-    responses = db.query(models.PlayerResponse).filter(
-        models.PlayerResponse.game_session_id == game_session_id,
-        models.PlayerResponse.question_id == question_id
-    ).all()
-    
-    # Initialize distribution (4 options: 0-3)
-    distribution = {0: 0, 1: 0, 2: 0, 3: 0}
-    correct_count = 0
-    total_responses = len(responses)
-    
-    # Get correct answer
-    question = db.query(models.Question).filter(models.Question.id == question_id).first()
-    correct_answer_index = question.correct_answer_index if question else None
+    if await db.get(models.GameArchive, game_session_id) is not None:
+        return await _get_compacted_question_results(db, game_session_id, question_id)
+    
+    # One aggregate per answer option; the outer join keeps a row (with a
+    # NULL answer) when nobody has answered yet, so the answer key comes along
+    rows = (await db.execute(select(
+        models.Question.correct_answer_index,
+        models.PlayerResponse.answer_index,
+        func.count(models.PlayerResponse.id),
+        func.sum(models.PlayerResponse.time_taken_ms)
+    ).outerjoin(
+        models.PlayerResponse,
+        (models.PlayerResponse.question_id == models.Question.id) &
+        (models.PlayerResponse.game_session_id == game_session_id)
+    ).where(
+        models.Question.id == question_id
+    ).group_by(
+        models.Question.correct_answer_index,
+        models.PlayerResponse.answer_index
+    ))).all()
     
-    # Count answers
-    for response in responses:
-        if 0 <= response.answer_index <= 3:
-            distribution[response.answer_index] += 1
-        if response.answer_index == correct_answer_index:
-            correct_count += 1
+    stats = game_runtime.QuestionStats()
+    correct_answer_index = None
+    for correct_answer_index, answer_index, count, total_time_ms in rows:
+        if answer_index is not None:
+            stats.record(answer_index, answer_index == correct_answer_index, total_time_ms or 0, count)
     
-    return {
-        "question_id": question_id,
-        "total_responses": total_responses,
-        "distribution": distribution,
-        "correct_answer_index": correct_answer_index,
-        "correct_count": correct_count,
-        "accuracy": (correct_count / total_responses * 100) if total_responses > 0 else 0
-    }
+    return stats.to_dict(question_id, correct_answer_index)
+
+
+async def _get_compacted_question_results(db: AsyncSession, game_session_id: int, question_id: int) -> Dict[str, any]:
+    """get_question_results for a game whose answers were rolled up by compaction"""
+    row = (await db.execute(select(
+        models.Question.correct_answer_index,
+        models.GameQuestionSummary.distribution,
+        models.GameQuestionSummary.total_responses,
+        models.GameQuestionSummary.correct_count,
+        models.GameQuestionSummary.answered_count,
+        models.GameQuestionSummary.total_time_ms
+    ).outerjoin(
+        models.GameQuestionSummary,
+        (models.GameQuestionSummary.question_id == models.Question.id) &
+        (models.GameQuestionSummary.game_session_id == game_session_id)
+    ).where(
+        models.Question.id == question_id
+    ))).first()
+    
+    stats = game_runtime.QuestionStats()
+    if row is None:
+        return stats.to_dict(question_id, None)
+    if row.distribution is not None:
+        stats.distribution.update({int(index): count for index, count in row.distribution.items()})
+        stats.total_responses = row.total_responses
+        stats.correct_count = row.correct_count
+        stats.answered_count = row.answered_count
+        stats.total_time_ms = row.total_time_ms
+    return stats.to_dict(question_id, row.correct_answer_index)
 
 
-def end_game(db: Session, game_session_id: int) -> bool:
+async def end_game(db: AsyncSession, game_session_id: int) -> bool:
     """
     End a game session.
     
@@ -325,16 +606,18 @@ def end_game(db: Session, game_session_id: int) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.id == game_session_id
-    ).first()
+    game_session = await db.get(models.GameSession, game_session_id)
     
     if not game_session:
         return False
     
+    was_live = game_session.status in LIVE_STATUSES
     game_session.status = "finished"
     game_session.ended_at = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
+    # A finished game's PIN may already belong to a newer game
+    if was_live:
+        pin_allocator.release(game_session.pin)
     
     return True
 
@@ -0,0 +1,330 @@
+"""
+Generation Jobs - Background PDF-to-quiz generation
+
+An upload is queued as a GenerationJob and the request returns the job id at
+once instead of holding the connection for the whole generation. Worker
+coroutines take jobs off a bounded queue: text extraction runs in a process
+pool (PyMuPDF holds the GIL, so a thread would still stall live games), the
+chunks' LLM calls run concurrently on the event loop, and the quiz is saved
+through quiz_service. Clients poll /jobs/{id} and can cancel a queued or
+running job.
+
+Jobs are kept in the memory of the worker that accepted the upload and are
+forgotten GENERATION_JOB_TTL_S after they finish. A job id starts with that
+worker's id, so with a message bus any worker can forward a status or cancel
+request to the job's owner (see job_status).
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import quiz_service
+import message_bus
+from database import AsyncSessionLocal
+from pdf_processor import agenerate_quiz_from_pdf_stream, new_extraction_pool
+
+logger = logging.getLogger(__name__)
+
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "2"))
+GENERATION_QUEUE_DEPTH = int(os.getenv("GENERATION_QUEUE_DEPTH", "20"))
+# Also the parallelism of page extraction for long PDFs (see pdf_processor)
+GENERATION_PROCESS_WORKERS = int(os.getenv("GENERATION_PROCESS_WORKERS", "2"))
+GENERATION_JOB_TTL_S = int(os.getenv("GENERATION_JOB_TTL_S", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass
+class GenerationJob:
+    id: str
+    user_id: str
+    title: str
+    filename: str
+    pdf_bytes: Optional[bytes]
+    start_page: Optional[int] = None
+    end_page: Optional[int] = None
+    questions_per_chunk: int = 3
+    max_total_questions: int = 10
+    use_cache: bool = True
+
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    quiz_id: Optional[int] = None
+    questions: List[Dict] = field(default_factory=list)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_status(self, with_preview: bool = False) -> Dict[str, any]:
+        status = {
+            "job_id": self.id,
+            "status": self.status,
+            "quiz_title": self.title,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "quiz_id": self.quiz_id,
+            "num_questions_generated": len(self.questions),
+            "error": self.error,
+        }
+        if with_preview:
+            status["questions_preview"] = self.questions[:2]
+        return status
+
+
+def owner_of(job_id: str) -> str:
+    """Id of the worker that accepted a job"""
+    return job_id.split("-", 1)[0]
+
+
+class GenerationQueue:
+    """Bounded queue of generation jobs served by a fixed set of worker coroutines"""
+
+    def __init__(
+        self,
+        workers: int = GENERATION_WORKERS,
+        max_depth: int = GENERATION_QUEUE_DEPTH,
+        process_workers: int = GENERATION_PROCESS_WORKERS,
+        job_ttl_s: int = GENERATION_JOB_TTL_S
+    ):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.process_workers = process_workers
+        self.job_ttl_s = job_ttl_s
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, GenerationJob] = {}
+
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def _new_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.process_workers <= 0:
+            return None
+        return new_extraction_pool(self.process_workers)
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._executor = self._new_executor()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if message_bus.bus is not None:
+            message_bus.bus.register("generation_job", self._serve_status)
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(
+        self,
+        user_id: str,
+        title: str,
+        filename: str,
+        pdf_bytes: bytes,
+        start_page: Optional[int] = None,
+        end_page: Optional[int] = None,
+        questions_per_chunk: int = 3,
+        max_total_questions: int = 10,
+        use_cache: bool = True
+    ) -> GenerationJob:
+        """
+        Queue a PDF for generation.
+
+        Raises:
+            QueueFullError: If max_depth jobs are already waiting
+        """
+        self._prune()
+        job = GenerationJob(
+            id=f"{message_bus.WORKER_ID}-{uuid.uuid4().hex}",
+            user_id=user_id,
+            title=title,
+            filename=filename,
+            pdf_bytes=pdf_bytes,
+            start_page=start_page,
+            end_page=end_page,
+            questions_per_chunk=questions_per_chunk,
+            max_total_questions=max_total_questions,
+            use_cache=use_cache
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"{self.max_depth} generation jobs are already queued")
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str, user_id: str) -> Optional[GenerationJob]:
+        """A job by id, or None if it is unknown, expired or someone else's"""
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def cancel(self, job_id: str, user_id: str) -> Optional[GenerationJob]:
+        """
+        Cancel a queued or running job; finished jobs are returned unchanged.
+
+        Returns:
+            The job, or None if it is unknown, expired or someone else's
+        """
+        job = self.get(job_id, user_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        if job.task is not None:
+            # The worker marks it cancelled when the CancelledError reaches it
+            job.task.cancel()
+        else:
+            # Still queued: the worker skips it when it comes up
+            self._finish(job, CANCELLED)
+        return job
+
+    def status(self, job_id: str, user_id: str, cancel: bool = False, with_preview: bool = False) -> Optional[Dict[str, any]]:
+        """to_status() of a job on this worker, cancelling it first if asked; None if not found"""
+        job = self.cancel(job_id, user_id) if cancel else self.get(job_id, user_id)
+        return job.to_status(with_preview) if job is not None else None
+
+    async def _serve_status(self, payload: Dict[str, any]) -> Optional[Dict[str, any]]:
+        return self.status(**payload)
+
+    def _finish(self, job: GenerationJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.pdf_bytes = None
+        job.task = None
+        if status == SUCCEEDED:
+            self.succeeded += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_ttl_s
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _generate(self, job: GenerationJob) -> None:
+        try:
+            questions = await agenerate_quiz_from_pdf_stream(
+                pdf_bytes=job.pdf_bytes,
+                filename=job.filename,
+                start_page=job.start_page,
+                end_page=job.end_page,
+                questions_per_chunk=job.questions_per_chunk,
+                max_total_questions=job.max_total_questions,
+                executor=self._executor,
+                use_cache=job.use_cache
+            )
+        except BrokenProcessPool:
+            # An extraction process died (e.g. a PDF that crashes PyMuPDF); later jobs get a fresh pool
+            self._executor = self._new_executor()
+            raise
+        if not questions:
+            self._finish(job, FAILED, "Could not generate questions from the PDF.")
+            return
+
+        async with AsyncSessionLocal() as db:
+            saved_quiz = await quiz_service.save_quiz(
+                db,
+                user_id=job.user_id,
+                title=job.title,
+                questions=questions,
+                pdf_filename=job.filename
+            )
+        job.quiz_id = saved_quiz.id
+        job.questions = questions
+        self._finish(job, SUCCEEDED)
+        logger.info(f"Job {job.id}: saved quiz {saved_quiz.id} with {len(questions)} questions")
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.task = asyncio.create_task(self._generate(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    self._finish(job, CANCELLED)
+                    if asyncio.current_task().cancelling():
+                        # The worker itself is being stopped, not just the job
+                        raise
+                except Exception as e:
+                    logger.error(f"Job {job.id} for '{job.filename}' failed: {e}")
+                    self._finish(job, FAILED, str(e))
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, any]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+generation_queue = GenerationQueue()
+
+
+async def job_status(job_id: str, user_id: str, cancel: bool = False, with_preview: bool = False) -> Optional[Dict[str, any]]:
+    """
+    Status of a job on whichever worker accepted it, cancelling it first if asked.
+
+    Returns:
+        The job's to_status(), or None if it is unknown, expired, someone
+        else's, or its worker can't be reached
+    """
+    owner = owner_of(job_id)
+    if owner == message_bus.WORKER_ID or message_bus.bus is None:
+        return generation_queue.status(job_id, user_id, cancel, with_preview)
+    try:
+        return await message_bus.bus.call(owner, "generation_job", {
+            "job_id": job_id, "user_id": user_id, "cancel": cancel, "with_preview": with_preview
+        })
+    except (asyncio.TimeoutError, ConnectionError, RuntimeError) as e:
+        # The worker is gone, and its in-memory jobs with it
+        logger.warning(f"Could not reach worker {owner} for job {job_id}: {e}")
+        return None
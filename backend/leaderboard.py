@@ -0,0 +1,176 @@
+"""
+Leaderboard - Incremental standings for live games
+
+Standings are kept in an order-statistic tree (a treap augmented with subtree
+sizes) keyed by (-total_points, player_name). Scoring an answer, looking up a
+player's rank and reading the top K are O(log n) (plus K for the read),
+instead of re-aggregating every response of the game.
+"""
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Key = Tuple[int, str]
+
+
+class _Node:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key: Key):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node: Optional[_Node], key: Key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into (keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, key)
+    node.left = right
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Merge two treaps where every key in left is smaller than every key in right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node: Optional[_Node], key: Key) -> Optional[_Node]:
+    if node is None:
+        return None
+    if key == node.key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    return _update(node)
+
+
+class OrderStatisticTree:
+    """Sorted set of unique keys with O(log n) insert, remove, rank and select"""
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def insert(self, key: Key) -> None:
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key: Key) -> None:
+        self._root = _remove(self._root, key)
+
+    def index(self, key: Key) -> int:
+        """0-based position of key in sorted order (number of smaller keys)"""
+        position = 0
+        node = self._root
+        while node is not None:
+            if key <= node.key:
+                node = node.left
+            else:
+                position += _size(node.left) + 1
+                node = node.right
+        return position
+
+    def __iter__(self) -> Iterator[Key]:
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+
+class Leaderboard:
+    """Per-game standings updated as each answer is scored"""
+
+    def __init__(self):
+        self._tree = OrderStatisticTree()
+        self._points: Dict[str, int] = {}
+        self._answered: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, player_name: str) -> bool:
+        return player_name in self._points
+
+    def record(self, player_name: str, points_earned: int, answered: bool = True) -> None:
+        """
+        Add one question's points to a player's total.
+
+        Args:
+            answered: False for a recorded no-answer, which is not counted in questions_answered
+        """
+        current = self._points.get(player_name)
+        if current is not None:
+            self._tree.remove((-current, player_name))
+        total = (current or 0) + points_earned
+        self._points[player_name] = total
+        self._answered[player_name] = self._answered.get(player_name, 0) + (1 if answered else 0)
+        self._tree.insert((-total, player_name))
+
+    def rank_of(self, player_name: str) -> Optional[int]:
+        """1-based rank of a player, or None if they have not answered yet"""
+        total = self._points.get(player_name)
+        if total is None:
+            return None
+        return self._tree.index((-total, player_name)) + 1
+
+    def entry(self, player_name: str) -> Optional[Dict[str, any]]:
+        """A single player's standing in get_leaderboard format"""
+        rank = self.rank_of(player_name)
+        if rank is None:
+            return None
+        return self._format(rank, player_name)
+
+    def top(self, k: Optional[int] = None) -> List[Dict[str, any]]:
+        """
+        Standings in the same format as game_service.get_leaderboard.
+
+        Args:
+            k: Only return the first k players (all players if None)
+        """
+        standings = []
+        for rank, (_, player_name) in enumerate(self._tree, start=1):
+            if k is not None and rank > k:
+                break
+            standings.append(self._format(rank, player_name))
+        return standings
+
+    def _format(self, rank: int, player_name: str) -> Dict[str, any]:
+        return {
+            "rank": rank,
+            "player_name": player_name,
+            "total_points": self._points[player_name],
+            "questions_answered": self._answered[player_name]
+        }
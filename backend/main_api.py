@@ -1,36 +1,95 @@
 import os
+import logging
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 import uuid
+import json
+import base64
+import binascii
+import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, tuple_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from pdf_processor import generate_quiz_from_pdf_stream
 import models
-from database import engine, get_db
+from database import engine, get_db, pool_stats, AsyncSessionLocal
 import auth
 from auth import get_current_user
+from migrations import run_migrations
 import game_service
-from websocket_manager import socket_app
+import game_runtime
+from response_writer import response_writer
+from quiz_cache import quiz_cache, encode_payload, etag_matches
+from query_budget import SQL_STATEMENT_BUDGET, statement_budget_middleware
+from pin_allocator import pin_allocator
+from compaction import compactor
+from generation_jobs import generation_queue, job_status, QueueFullError
+from question_cache import question_cache
+from scheduler import timers
+import websocket_manager
+from websocket_manager import socket_app, get_players
 
 # Create tables locally (no-op against Supabase PostgreSQL which manages its own schema)
 models.Base.metadata.create_all(bind=engine)
+# Bring existing databases up to the current schema (indexes etc.)
+run_migrations(engine)
+
+logger = logging.getLogger(__name__)
 
 limiter = Limiter(key_func=get_remote_address)
 
+GAME_SWEEP_INTERVAL_S = int(os.getenv("GAME_SWEEP_INTERVAL_S", "300"))
+
+async def _sweep_stale_games():
+    """Expire abandoned games, then resync the PIN bitset with every worker's live games"""
+    try:
+        async with AsyncSessionLocal() as db:
+            for pin in await game_service.expire_stale_games(db):
+                await websocket_manager.close_game(pin)
+            await game_service.sync_pin_allocator(db)
+    except Exception as e:
+        logger.error(f"Stale game sweep failed: {e}")
+    finally:
+        if timers.running:
+            timers.call_later(GAME_SWEEP_INTERVAL_S, _sweep_stale_games)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    response_writer.start()
+    timers.start()
+    async with AsyncSessionLocal() as db:
+        await game_service.sync_pin_allocator(db)
+    timers.call_later(GAME_SWEEP_INTERVAL_S, _sweep_stale_games)
+    compactor.start()
+    generation_queue.start()
+    # Serve runtime operations forwarded by other workers over the message bus
+    bus_rpc = websocket_manager.start_bus_rpc()
+    yield
+    if bus_rpc:
+        bus_rpc.cancel()
+    # Before the timer heap goes away: no new run gets scheduled, a running one finishes
+    await compactor.stop()
+    await timers.stop()
+    await generation_queue.stop()
+    # Flush queued player responses before the process exits
+    await response_writer.stop()
+
 app = FastAPI(
     title="KahootIt API",
     description="API for generating Kahoot-style quizzes from PDF notes.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.state.limiter = limiter
@@ -46,7 +105,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+if SQL_STATEMENT_BUDGET > 0:
+    # Test/CI only; production requests skip the extra middleware hop
+    app.middleware("http")(statement_budget_middleware)
 
 # --- Pydantic Schemas ---
 class UserDisplay(BaseModel):
@@ -71,25 +134,89 @@ class QuizBasicInfo(BaseModel):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 @app.get("/users/me", response_model=UserDisplay, tags=["User"], summary="Get current user details")
-async def read_users_me(current_user: models.Profile = Depends(auth.get_current_user)):
+async def read_users_me(current_user: auth.CurrentUser = Depends(auth.get_current_user)):
     return current_user
 
-@app.get("/quizzes/my", response_model=List[QuizBasicInfo], tags=["Quiz Management"], summary="Get all quizzes for the current user")
+MY_QUIZZES_PAGE_SIZE = 24
+MY_QUIZZES_MAX_PAGE_SIZE = 100
+
+def _encode_quiz_cursor(created_at: datetime, quiz_id: int) -> str:
+    value = [created_at.isoformat(), quiz_id]
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+def _decode_quiz_cursor(cursor: str):
+    try:
+        created_at, quiz_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(quiz_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/quizzes/my", response_model=List[QuizBasicInfo], tags=["Quiz Management"], summary="Get the current user's quizzes, newest first")
 async def get_my_quizzes(
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(auth.get_current_user)
+    response: Response,
+    limit: int = Query(MY_QUIZZES_PAGE_SIZE, ge=1, le=MY_QUIZZES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db),
+    current_user: auth.CurrentUser = Depends(auth.get_current_user)
 ):
+    """
+    One page of the user's quizzes, ordered by (created_at, id) descending.
+    When more quizzes follow, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    """
+    query = select(
+        models.Quiz.id,
+        models.Quiz.title,
+        models.Quiz.question_count,
+        models.Quiz.created_at,
+        models.Quiz.pdf_filename
+    ).where(models.Quiz.user_id == current_user.id)
+
+    if cursor:
+        after_created_at, after_id = _decode_quiz_cursor(cursor)
+        # Bound with the column's own type, so SQLite formats it like the stored text
+        after = tuple_(literal(after_created_at, models.Quiz.created_at.type), after_id)
+        query = query.where(tuple_(models.Quiz.created_at, models.Quiz.id) < after)
+
     try:
-        quizzes = db.query(models.Quiz).filter(models.Quiz.user_id == current_user.id).order_by(models.Quiz.created_at.desc()).all()
-        return quizzes
+        rows = (await db.execute(
+            query.order_by(models.Quiz.created_at.desc(), models.Quiz.id.desc()).limit(limit + 1)
+        )).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_quiz_cursor(rows[-1].created_at, rows[-1].id)
+
+    return [
+        QuizBasicInfo(
+            id=row.id,
+            title=row.title,
+            question_count=row.question_count,
+            created_at=row.created_at,
+            pdf_filename=row.pdf_filename
+        ) for row in rows
+    ]
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the KahootIt API!"}
 
-@app.post("/upload-notes/", summary="Upload PDF and create a quiz (Login Required)", tags=["Quiz Management"])
+@app.get("/internal/metrics", tags=["Internal"], summary="Runtime performance counters")
+async def get_metrics():
+    return {
+        "response_writer": response_writer.stats(),
+        "db_pool": pool_stats(),
+        "quiz_cache": quiz_cache.stats(),
+        "pins": pin_allocator.stats(),
+        "auth_cache": auth.token_cache.stats(),
+        "compaction": compactor.stats(),
+        "generation_jobs": generation_queue.stats(),
+        "question_cache": question_cache.stats()
+    }
+
+@app.post("/upload-notes/", status_code=202, summary="Upload PDF and queue quiz generation (Login Required)", tags=["Quiz Management"])
 @limiter.limit("5/minute")
 async def create_quiz_from_upload(
     request: Request,
@@ -99,12 +226,13 @@ async def create_quiz_from_upload(
     end_page: Optional[int] = Form(None, description="1-indexed end page for processing."),
     questions_per_chunk: Optional[int] = Form(3, description="Number of questions to generate per text chunk."),
     max_total_questions: Optional[int] = Form(10, description="Maximum total questions to generate for the PDF."),
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(auth.get_current_user)
+    fresh_generation: bool = Form(False, description="Skip the question cache and generate every chunk anew."),
+    current_user: auth.CurrentUser = Depends(auth.get_current_user)
 ):
     """
-    Uploads a PDF, processes it, generates questions, stores them in the database
-    associated with the logged-in user, and returns a quiz ID.
+    Uploads a PDF and queues generation of a quiz from it for the logged-in user.
+    Returns a job id at once; poll /jobs/{job_id} until the job has finished,
+    then read the quiz id from /jobs/{job_id}/result.
     A custom title for the quiz MUST be provided.
     """
     if not file.filename:
@@ -118,98 +246,110 @@ async def create_quiz_from_upload(
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Invalid file type. Only PDF files are accepted.")
 
-    try:
-        pdf_bytes = await file.read()
-        if not pdf_bytes:
-            raise HTTPException(status_code=400, detail="Uploaded PDF file is empty.")
+    pdf_bytes = await file.read()
+    if not pdf_bytes:
+        raise HTTPException(status_code=400, detail="Uploaded PDF file is empty.")
 
-        print(f"Received file: {file.filename} for user: {current_user.username}, custom title: {actual_quiz_title}, size: {len(pdf_bytes)} bytes")
-        print(f"Processing parameters: start_page={start_page}, end_page={end_page}, q_per_chunk={questions_per_chunk}, max_q={max_total_questions}")
+    logger.info(f"Received file: {file.filename} for user: {current_user.username}, custom title: {actual_quiz_title}, size: {len(pdf_bytes)} bytes")
+    logger.info(f"Processing parameters: start_page={start_page}, end_page={end_page}, q_per_chunk={questions_per_chunk}, max_q={max_total_questions}")
 
-        generated_question_data = generate_quiz_from_pdf_stream(
-            pdf_bytes=pdf_bytes,
+    try:
+        job = generation_queue.submit(
+            user_id=current_user.id,
+            title=actual_quiz_title,
             filename=file.filename,
+            pdf_bytes=pdf_bytes,
             start_page=start_page,
             end_page=end_page,
             questions_per_chunk=questions_per_chunk if questions_per_chunk is not None else 3,
-            max_total_questions=max_total_questions if max_total_questions is not None else 10
+            max_total_questions=max_total_questions if max_total_questions is not None else 10,
+            use_cache=not fresh_generation
+        )
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many quizzes are being generated right now. Please try again shortly.",
+            headers={"Retry-After": "30"}
         )
 
-        if not generated_question_data:
-            raise HTTPException(status_code=422, detail="Could not generate questions from the PDF.")
+    logger.info(f"Queued generation job {job.id} for {file.filename}")
+    return job.to_status()
 
-        num_questions = len(generated_question_data)
+async def _get_user_job(job_id: str, current_user: auth.CurrentUser, **kwargs) -> dict:
+    # Forwarded to the worker that accepted the upload if that is not this one
+    job = await job_status(job_id, current_user.id, **kwargs)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
 
-        db_quiz = models.Quiz(
-            title=actual_quiz_title,
-            pdf_filename=file.filename,
-            user_id=current_user.id,
-            question_count=num_questions
-        )
-        db.add(db_quiz)
-        print(f"Attempting to commit quiz titled '{actual_quiz_title}' for {file.filename} by user {current_user.username}...")
-        db.commit()
-        print(f"Quiz committed. Quiz ID from DB: {db_quiz.id}, Created at: {db_quiz.created_at}")
-        db.refresh(db_quiz)
-
-        print(f"Attempting to add {len(generated_question_data)} questions for Quiz ID {db_quiz.id}...")
-        for q_data in generated_question_data:
-            db_question = models.Question(
-                quiz_id=db_quiz.id,
-                question_text=q_data["question"],
-                options=q_data["options"],
-                correct_answer_index=q_data["correct_answer_index"],
-                explanation=q_data["explanation"]
-            )
-            db.add(db_question)
-        print(f"Attempting to commit {len(generated_question_data)} questions...")
-        db.commit()
-        print(f"Questions committed for Quiz ID {db_quiz.id}.")
+@app.get("/jobs/{job_id}", tags=["Quiz Management"], summary="Get the status of a quiz generation job")
+async def get_generation_job(job_id: str, current_user: auth.CurrentUser = Depends(auth.get_current_user)):
+    return await _get_user_job(job_id, current_user)
 
-        return {
-            "message": "PDF processed and quiz generated successfully!",
-            "quiz_id": db_quiz.id,
-            "quiz_title": db_quiz.title,
-            "filename": file.filename,
-            "num_questions_generated": len(generated_question_data),
-            "questions_preview": generated_question_data[:2]
-        }
+@app.get("/jobs/{job_id}/result", tags=["Quiz Management"], summary="Get the quiz created by a generation job")
+async def get_generation_job_result(job_id: str, current_user: auth.CurrentUser = Depends(auth.get_current_user)):
+    job = await _get_user_job(job_id, current_user, with_preview=True)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=422, detail=job["error"] or "Could not generate questions from the PDF.")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Generation job is {job['status']}")
 
-    except HTTPException as http_exc:
-        raise http_exc
-    except Exception as e:
-        print(f"Error processing upload for {file.filename}: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    return {
+        "message": "PDF processed and quiz generated successfully!",
+        "quiz_id": job["quiz_id"],
+        "quiz_title": job["quiz_title"],
+        "filename": job["filename"],
+        "num_questions_generated": job["num_questions_generated"],
+        "questions_preview": job["questions_preview"]
+    }
+
+@app.delete("/jobs/{job_id}", tags=["Quiz Management"], summary="Cancel a quiz generation job")
+async def cancel_generation_job(job_id: str, current_user: auth.CurrentUser = Depends(auth.get_current_user)):
+    return await _get_user_job(job_id, current_user, cancel=True)
 
 @app.get("/game/{game_id}")
-async def get_quiz_questions(game_id: int, db: Session = Depends(get_db)):
+async def get_quiz_questions(game_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Retrieves the set of generated questions for a given quiz_id from the database.
+    The encoded payload is cached per quiz and carries a strong ETag, so clients
+    can revalidate with If-None-Match and get a 304.
     """
-    db_quiz = db.query(models.Quiz).filter(models.Quiz.id == game_id).first()
-
-    if db_quiz is None:
-        raise HTTPException(status_code=404, detail=f"Quiz ID '{game_id}' not found.")
-
-    questions_response = [
-        {
-            "id": q.id,
-            "question_text": q.question_text,
-            "options": q.options,
-            "correct_answer_index": q.correct_answer_index,
-            "explanation": q.explanation
-        } for q in db_quiz.questions
-    ]
-
-    return {
-        "quiz_id": db_quiz.id,
-        "quiz_title": db_quiz.title,
-        "pdf_filename": db_quiz.pdf_filename,
-        "created_at": db_quiz.created_at.isoformat(),
-        "num_questions": len(questions_response),
-        "questions": questions_response
-    }
+    if_none_match = request.headers.get("if-none-match")
+    cached = quiz_cache.get(game_id)
+    if cached is None:
+        db_quiz = (await db.execute(
+            select(models.Quiz).options(selectinload(models.Quiz.questions)).where(models.Quiz.id == game_id)
+        )).scalars().first()
+
+        if db_quiz is None:
+            raise HTTPException(status_code=404, detail=f"Quiz ID '{game_id}' not found.")
+
+        questions_response = [
+            {
+                "id": q.id,
+                "question_text": q.question_text,
+                "options": q.options,
+                "correct_answer_index": q.correct_answer_index,
+                "explanation": q.explanation
+            } for q in db_quiz.questions
+        ]
+
+        body, etag = encode_payload({
+            "quiz_id": db_quiz.id,
+            "quiz_title": db_quiz.title,
+            "pdf_filename": db_quiz.pdf_filename,
+            "created_at": db_quiz.created_at.isoformat(),
+            "num_questions": len(questions_response),
+            "questions": questions_response
+        })
+        quiz_cache.put(game_id, body, etag)
+    else:
+        body, etag = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # --- Game Session API Endpoints (for real-time multiplayer) ---
 
@@ -227,15 +367,15 @@ class GameSessionResponse(BaseModel):
 @app.post("/api/game/create", response_model=GameSessionResponse, tags=["Game"], summary="Create a new game session")
 async def create_game(
     game_data: GameSessionCreate,
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: auth.CurrentUser = Depends(get_current_user)
 ):
     """
     Create a new game session for a quiz.
     Returns a unique PIN that players can use to join.
     """
     try:
-        game_session = game_service.create_game_session(
+        game_session = await game_service.create_game_session(
             db=db,
             quiz_id=game_data.quiz_id,
             host_id=current_user.id
@@ -255,47 +395,42 @@ async def create_game(
         raise HTTPException(status_code=500, detail=f"Failed to create game session: {str(e)}")
 
 @app.get("/api/game/{pin}/info", tags=["Game"], summary="Get game session info by PIN")
-async def get_game_info(pin: str, db: Session = Depends(get_db)):
+async def get_game_info(pin: str, db: AsyncSession = Depends(get_db)):
     """
     Get basic information about a game session using its PIN.
     Public endpoint - no authentication required.
     """
-    game_session = game_service.validate_pin(db, pin)
+    game_info = await game_service.get_game_summary(db, pin)
 
-    if not game_session:
+    if not game_info:
         raise HTTPException(status_code=404, detail="Game not found or no longer accepting players")
 
-    return {
-        "pin": game_session.pin,
-        "quiz_id": game_session.quiz_id,
-        "quiz_title": game_session.quiz.title,
-        "status": game_session.status,
-        "question_count": len(game_session.quiz.questions),
-        "current_question_index": game_session.current_question_index
-    }
+    return game_info
 
 @app.post("/api/game/{pin}/start", tags=["Game"], summary="Start a game session")
 async def start_game_session(
     pin: str,
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: auth.CurrentUser = Depends(get_current_user)
 ):
     """
     Start a game session. Only the host can start the game.
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.pin == pin,
-        models.GameSession.host_id == current_user.id
-    ).first()
+    game_session = await game_service.get_session_by_pin(db, pin, host_id=current_user.id)
 
     if not game_session:
         raise HTTPException(status_code=404, detail="Game not found or you're not the host")
 
-    success = game_service.start_game(db, game_session.id)
+    success = await game_service.start_game(db, game_session.id)
 
     if not success:
         raise HTTPException(status_code=400, detail="Game cannot be started")
 
+    runtime = game_runtime.get_runtime(pin)
+    if runtime and await websocket_manager.claim_runtime(pin):
+        for player_name in await get_players(pin):
+            runtime.add_player(player_name)
+
     return {"message": "Game started", "pin": pin}
 
 @app.post("/api/game/{pin}/answer", tags=["Game"], summary="Submit an answer")
@@ -306,108 +441,175 @@ async def submit_answer(
     player_name: str = Form(...),
     question_id: int = Form(...),
     answer_index: int = Form(...),
-    time_taken_ms: int = Form(...),
-    db: Session = Depends(get_db)
+    time_taken_ms: int = Form(...)
 ):
     """
     Submit a player's answer to a question.
     Public endpoint - no authentication required for players.
+    Scored against the in-memory game runtime; the response row is
+    queued for a batched write.
     """
-    game_session = game_service.validate_pin(db, pin)
+    result = await websocket_manager.run_on_owner(
+        pin, "submit_answer",
+        player_name=player_name,
+        question_id=question_id,
+        answer_index=answer_index,
+        time_taken_ms=time_taken_ms
+    )
 
-    if not game_session:
-        raise HTTPException(status_code=404, detail="Game not found")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Game not found or not currently active")
 
-    if game_session.status != "active":
-        raise HTTPException(status_code=400, detail="Game is not currently active")
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
 
-    try:
-        response = game_service.record_answer(
-            db=db,
-            game_session_id=game_session.id,
-            player_name=player_name,
-            question_id=question_id,
-            answer_index=answer_index,
-            time_taken_ms=time_taken_ms
-        )
-
-        return {
-            "points_earned": response.points_earned,
-            "is_correct": response.points_earned > 0
-        }
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "points_earned": result["points_earned"],
+        "is_correct": result["is_correct"]
+    }
 
 @app.get("/api/game/{pin}/leaderboard", tags=["Game"], summary="Get current leaderboard")
-async def get_leaderboard(pin: str, db: Session = Depends(get_db)):
+async def get_leaderboard(pin: str, limit: Optional[int] = None, db: AsyncSession = Depends(get_db)):
     """
     Get the current leaderboard for a game session.
-    Public endpoint.
+    Public endpoint. Pass `limit` to only receive the top players.
     """
-    game_session = db.query(models.GameSession).filter(models.GameSession.pin == pin).first()
+    live_leaderboard = await websocket_manager.run_on_owner(pin, "leaderboard", load=False, limit=limit)
+    if live_leaderboard is not None:
+        return {
+            "pin": pin,
+            "leaderboard": live_leaderboard
+        }
+
+    game_session = await game_service.get_session_by_pin(db, pin)
 
     if not game_session:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    leaderboard = game_service.get_leaderboard(db, game_session.id)
+    leaderboard = await game_service.get_leaderboard(db, game_session.id)
 
     return {
         "pin": pin,
-        "leaderboard": leaderboard
+        "leaderboard": leaderboard[:limit] if limit is not None else leaderboard
+    }
+
+@app.get("/api/game/{pin}/leaderboard/{player_name}", tags=["Game"], summary="Get a player's standing")
+async def get_player_standing(pin: str, player_name: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get a single player's rank and points in a game session.
+    Public endpoint.
+    """
+    live = await websocket_manager.run_on_owner(pin, "standing", load=False, player_name=player_name)
+    if live is not None:
+        standing = live["standing"]
+    else:
+        game_session = await game_service.get_session_by_pin(db, pin)
+
+        if not game_session:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        leaderboard = await game_service.get_leaderboard(db, game_session.id)
+        standing = next((entry for entry in leaderboard if entry["player_name"] == player_name), None)
+
+    if standing is None:
+        raise HTTPException(status_code=404, detail="Player has no recorded answers in this game")
+
+    return {
+        "pin": pin,
+        **standing
     }
 
 @app.get("/api/game/{pin}/question/{question_id}/results", tags=["Game"], summary="Get question results")
 async def get_question_results(
     pin: str,
     question_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: auth.CurrentUser = Depends(get_current_user)
 ):
     """
     Get answer distribution for a question (for host view).
     Only the host can access this.
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.pin == pin,
-        models.GameSession.host_id == current_user.id
-    ).first()
+    game_session = await game_service.get_session_by_pin(db, pin, host_id=current_user.id)
 
     if not game_session:
         raise HTTPException(status_code=404, detail="Game not found or you're not the host")
 
-    results = game_service.get_question_results(db, game_session.id, question_id)
+    # Live games keep running histograms; finished games are aggregated in SQL.
+    # A finished game's PIN may already belong to another live game.
+    if game_session.status in game_service.LIVE_STATUSES:
+        results = await websocket_manager.run_on_owner(pin, "question_results", load=False, question_id=question_id)
+        if results is not None:
+            return results
 
-    return results
+    await response_writer.flush()
+
+    return await game_service.get_question_results(db, game_session.id, question_id)
 
 @app.post("/api/game/{pin}/end", tags=["Game"], summary="End a game session")
 async def end_game_session(
     pin: str,
-    db: Session = Depends(get_db),
-    current_user: models.Profile = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: auth.CurrentUser = Depends(get_current_user)
 ):
     """
     End a game session. Only the host can end the game.
     """
-    game_session = db.query(models.GameSession).filter(
-        models.GameSession.pin == pin,
-        models.GameSession.host_id == current_user.id
-    ).first()
+    game_session = await game_service.get_session_by_pin(db, pin, host_id=current_user.id)
 
     if not game_session:
         raise HTTPException(status_code=404, detail="Game not found or you're not the host")
 
-    success = game_service.end_game(db, game_session.id)
+    was_live = game_session.status in game_service.LIVE_STATUSES
+    success = await game_service.end_game(db, game_session.id)
 
     if not success:
         raise HTTPException(status_code=400, detail="Failed to end game")
 
-    final_leaderboard = game_service.get_leaderboard(db, game_session.id)
+    # Stops the game's timers and makes every answer durable on the worker
+    # that owns the runtime
+    final_leaderboard = None
+    if was_live:
+        final_leaderboard = await websocket_manager.run_on_owner(pin, "finish", load=False)
+    await response_writer.flush()
+
+    if final_leaderboard is None:
+        final_leaderboard = await game_service.get_leaderboard(db, game_session.id)
 
     return {
         "message": "Game ended",
+        "game_session_id": game_session.id,
         "final_leaderboard": final_leaderboard
     }
 
+@app.get("/api/game/session/{game_session_id}/leaderboard", tags=["Game"], summary="Get a finished game's leaderboard")
+async def get_session_leaderboard(
+    game_session_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Leaderboard of a game session by id. Finished games give up their PIN
+    for reuse, so this is how their results stay reachable.
+    Public endpoint.
+    """
+    game_session = await db.get(models.GameSession, game_session_id)
+
+    if not game_session:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    if game_session.status in game_service.LIVE_STATUSES:
+        live_leaderboard = await websocket_manager.run_on_owner(game_session.pin, "leaderboard", load=False, limit=limit)
+        if live_leaderboard is not None:
+            return {"game_session_id": game_session.id, "pin": game_session.pin, "leaderboard": live_leaderboard}
+
+    leaderboard = await game_service.get_leaderboard(db, game_session.id)
+    return {
+        "game_session_id": game_session.id,
+        "pin": game_session.pin,
+        "leaderboard": leaderboard[:limit]
+    }
+
 # Mount WebSocket app
 app.mount("/socket.io", socket_app)
 
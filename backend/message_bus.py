@@ -0,0 +1,366 @@
+"""
+Message Bus - Lets several server processes share Socket.IO rooms and game state
+
+Two backends, chosen by the SOCKETIO_MESSAGE_BUS URL set on every worker:
+- redis://host:6379/0 (or rediss://): Redis pub/sub carries Socket.IO events
+  (socketio.AsyncRedisManager) and worker-to-worker calls (RedisBusClient);
+  room state lives in Redis hashes (see room_state.RedisRoomState).
+- bus://127.0.0.1:6390: a local stand-in speaking newline-delimited JSON over
+  TCP, so a multi-worker deployment can be run and tested on one machine
+  with no external services:
+  1. BusBroker: a small pub/sub + hash store server, run as its own process
+     (`python message_bus.py --port 6390`).
+  2. BusClient: the per-process connection used for publishing, subscribing,
+     hash operations and request/reply calls to another worker.
+  3. LocalBusManager: a python-socketio client manager on top of BusClient, so
+     an emit on one worker reaches sockets connected to every worker.
+
+Without SOCKETIO_MESSAGE_BUS the server runs as a single process with
+in-memory state.
+"""
+import os
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_BUS_URL = os.getenv("SOCKETIO_MESSAGE_BUS", "")
+RPC_TIMEOUT_SECONDS = float(os.getenv("MESSAGE_BUS_RPC_TIMEOUT", "5"))
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+# Identifies this process on the bus
+WORKER_ID = uuid.uuid4().hex
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class WorkerCalls:
+    """
+    Request/reply between workers over pub/sub. Subclasses provide publish(),
+    subscribe() and the _pending, _rpc_handlers and _reply_task attributes.
+    """
+
+    def register(self, method: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        """Expose a coroutine to other workers as `method`"""
+        self._rpc_handlers[method] = handler
+
+    async def serve_calls(self) -> None:
+        """Answer calls addressed to this worker; runs until cancelled"""
+        calls = await self.subscribe(f"rpc:{WORKER_ID}")
+        while True:
+            message = await calls.get()
+            asyncio.create_task(self._answer_call(message))
+
+    async def _answer_call(self, message: Dict[str, Any]) -> None:
+        reply: Dict[str, Any] = {"id": message["id"]}
+        try:
+            handler = self._rpc_handlers[message["method"]]
+            reply["result"] = await handler(message["payload"])
+        except Exception as e:
+            logger.error(f"Bus call {message.get('method')} failed: {e}")
+            reply["error"] = str(e)
+        await self.publish(f"rpc-reply:{message['reply_to']}", reply)
+
+    async def call(self, worker_id: str, method: str, payload: Dict[str, Any]) -> Any:
+        """Run a registered method on another worker and return its result"""
+        replies = await self.subscribe(f"rpc-reply:{WORKER_ID}")
+        if self._reply_task is None:
+            self._reply_task = asyncio.create_task(self._route_replies(replies))
+        call_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            await self.publish(f"rpc:{worker_id}", {
+                "id": call_id, "reply_to": WORKER_ID, "method": method, "payload": payload
+            })
+            return await asyncio.wait_for(future, RPC_TIMEOUT_SECONDS)
+        finally:
+            # Timed-out calls would otherwise stay pending forever
+            self._pending.pop(call_id, None)
+
+    async def _route_replies(self, replies: asyncio.Queue) -> None:
+        while True:
+            reply = await replies.get()
+            future = self._pending.pop(reply.get("id"), None)
+            if future is None or future.done():
+                continue
+            if "error" in reply:
+                future.set_exception(RuntimeError(reply["error"]))
+            else:
+                future.set_result(reply.get("result"))
+
+
+class BusBroker:
+    """Pub/sub channels and hashes shared by every connected worker"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._hashes: Dict[str, Dict[str, Any]] = {}
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 6390) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._handle, host, port, limit=_STREAM_LIMIT)
+        logger.info(f"Message bus broker listening on {host}:{port}")
+        return server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = self._dispatch(json.loads(line), writer)
+                if reply is not None:
+                    writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
+
+    def _dispatch(self, message: Dict[str, Any], writer: asyncio.StreamWriter) -> Optional[Dict[str, Any]]:
+        op = message.get("op")
+        if op == "sub":
+            self._subscribers.setdefault(message["channel"], set()).add(writer)
+            return None
+        if op == "unsub":
+            self._subscribers.get(message["channel"], set()).discard(writer)
+            return None
+        if op == "pub":
+            frame = _encode({"op": "msg", "channel": message["channel"], "data": message["data"]})
+            for subscriber in list(self._subscribers.get(message["channel"], ())):
+                subscriber.write(frame)
+            return None
+
+        key = message.get("key")
+        field = message.get("field")
+        table = self._hashes.get(key, {})
+        if op == "hget":
+            result = table.get(field)
+        elif op == "hgetall":
+            result = dict(table)
+        elif op == "hlen":
+            result = len(table)
+        elif op == "hset":
+            self._hashes.setdefault(key, {})[field] = message["value"]
+            result = True
+        elif op == "hsetnx":
+            result = self._hashes.setdefault(key, {}).setdefault(field, message["value"])
+        elif op == "hdel":
+            result = table.pop(field, None) is not None
+        elif op == "hdel_if":
+            # Only remove the field if it still holds the expected value
+            result = table.get(field) == message["value"]
+            if result:
+                del table[field]
+        elif op == "hincrby":
+            value = table.get(field, 0) + message.get("amount", 1)
+            if value <= 0 and message.get("drop_zero"):
+                table.pop(field, None)
+            else:
+                self._hashes.setdefault(key, {})[field] = value
+            result = value
+        elif op == "del":
+            result = self._hashes.pop(key, None) is not None
+        else:
+            return {"id": message.get("id"), "error": f"unknown op {op}"}
+
+        if key in self._hashes and not self._hashes[key]:
+            del self._hashes[key]
+        return {"id": message.get("id"), "result": result}
+
+
+class BusClient(WorkerCalls):
+    """One process's connection to the broker"""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6390
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._channels: Dict[str, asyncio.Queue] = {}
+        self._rpc_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+        self._reply_task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.connected:
+                return
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=_STREAM_LIMIT)
+            self._reader_task = asyncio.create_task(self._read_loop())
+            # Restore subscriptions after a reconnect
+            for channel in self._channels:
+                self._writer.write(_encode({"op": "sub", "channel": channel}))
+            await self._writer.drain()
+            logger.info(f"Connected to message bus at {self.host}:{self.port}")
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if not self.connected:
+            await self.connect()
+        self._writer.write(_encode(message))
+        await self._writer.drain()
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get("op") == "msg":
+                    queue = self._channels.get(message["channel"])
+                    if queue is not None:
+                        queue.put_nowait(message["data"])
+                else:
+                    future = self._pending.pop(message.get("id"), None)
+                    if future is not None and not future.done():
+                        if "error" in message:
+                            future.set_exception(RuntimeError(message["error"]))
+                        else:
+                            future.set_result(message.get("result"))
+        finally:
+            logger.warning("Message bus connection lost")
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Message bus connection lost"))
+            self._pending.clear()
+
+    async def request(self, op: str, **fields: Any) -> Any:
+        """Run a hash operation on the broker and return its result"""
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"op": op, "id": request_id, **fields})
+            return await asyncio.wait_for(future, RPC_TIMEOUT_SECONDS)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def publish(self, channel: str, data: Any) -> None:
+        await self._send({"op": "pub", "channel": channel, "data": data})
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """Subscribe to a channel; published data arrives on the returned queue"""
+        queue = self._channels.get(channel)
+        if queue is None:
+            queue = self._channels[channel] = asyncio.Queue()
+            await self._send({"op": "sub", "channel": channel})
+        return queue
+
+class RedisBusClient(WorkerCalls):
+    """Worker-to-worker calls over Redis pub/sub; `redis` is also used by RedisRoomState"""
+
+    def __init__(self, url: str):
+        # Imported here so single-process and bus:// deployments don't need the package
+        import redis.asyncio as aioredis
+        self.url = url
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self._pubsub = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._channels: Dict[str, asyncio.Queue] = {}
+        self._rpc_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+        self._reply_task: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, data: Any) -> None:
+        await self.redis.publish(channel, json.dumps(data, separators=(",", ":")))
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """Subscribe to a channel; published data arrives on the returned queue"""
+        queue = self._channels.get(channel)
+        if queue is None:
+            queue = self._channels[channel] = asyncio.Queue()
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(channel)
+            if self._reader_task is None:
+                self._reader_task = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def _read_loop(self) -> None:
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            queue = self._channels.get(message["channel"])
+            if queue is not None:
+                queue.put_nowait(json.loads(message["data"]))
+
+
+class LocalBusManager(AsyncPubSubManager):
+    """Socket.IO client manager that fans events out through the BusClient"""
+    name = "localbus"
+
+    def __init__(self, client: BusClient, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.client = client
+
+    async def _publish(self, data):
+        await self.client.publish(self.channel, self.json.dumps(data))
+
+    async def _listen(self):
+        queue = await self.client.subscribe(self.channel)
+        while True:
+            yield await queue.get()
+
+
+def _create_bus() -> Optional[WorkerCalls]:
+    scheme = urlparse(MESSAGE_BUS_URL).scheme
+    if scheme == "bus":
+        return BusClient(MESSAGE_BUS_URL)
+    if scheme in ("redis", "rediss"):
+        return RedisBusClient(MESSAGE_BUS_URL)
+    if MESSAGE_BUS_URL:
+        logger.warning(f"Unsupported SOCKETIO_MESSAGE_BUS '{MESSAGE_BUS_URL}', running single-process")
+    return None
+
+
+bus: Optional[WorkerCalls] = _create_bus()
+
+
+def create_client_manager() -> Optional[socketio.AsyncManager]:
+    """Socket.IO client manager for the configured bus, or None for single-process mode"""
+    if isinstance(bus, RedisBusClient):
+        return socketio.AsyncRedisManager(MESSAGE_BUS_URL)
+    if isinstance(bus, BusClient):
+        return LocalBusManager(bus)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the KahootIt message bus broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _main():
+        server = await BusBroker().serve(args.host, args.port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,131 @@
+"""
+Migrations - Versioned schema changes for existing databases
+
+create_all only creates missing tables, so changes to tables that already
+exist (new indexes, columns, data backfills) are listed here and applied
+once per database.
+Applied versions are recorded in the schema_migrations table. Statements
+must be valid on both SQLite and PostgreSQL and safe to re-run (IF NOT
+EXISTS, idempotent UPDATEs), since new databases already get the current
+schema from create_all.
+
+Run on startup by main_api, or by hand: `python migrations.py [--status]`
+"""
+import logging
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: Tuple[str, ...]
+    # Run before `statements`, only on PostgreSQL
+    postgresql_statements: Tuple[str, ...] = ()
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "player_responses_composite_indexes", (
+        "CREATE INDEX IF NOT EXISTS ix_player_responses_game_question "
+        "ON player_responses (game_session_id, question_id, answer_index)",
+        "CREATE INDEX IF NOT EXISTS ix_player_responses_game_player "
+        "ON player_responses (game_session_id, player_name)",
+    )),
+    # Game info and advance_question read the stored count instead of counting rows
+    Migration(2, "backfill_quiz_question_count", (
+        "UPDATE quizzes SET question_count = "
+        "(SELECT COUNT(*) FROM questions WHERE questions.quiz_id = quizzes.id)",
+    )),
+    # PINs only need to be unique among live games, so finished games free theirs
+    Migration(3, "game_sessions_live_pin_unique", (
+        "DROP INDEX IF EXISTS ix_game_sessions_pin",
+        "CREATE INDEX IF NOT EXISTS ix_game_sessions_pin ON game_sessions (pin)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_game_sessions_live_pin "
+        "ON game_sessions (pin) WHERE status IN ('lobby', 'active')",
+    ), postgresql_statements=(
+        "ALTER TABLE game_sessions DROP CONSTRAINT IF EXISTS game_sessions_pin_key",
+    )),
+    Migration(4, "quizzes_user_created_index", (
+        "CREATE INDEX IF NOT EXISTS ix_quizzes_user_created ON quizzes (user_id, created_at, id)",
+    )),
+]
+
+_CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Versions already applied to the database"""
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE_VERSION_TABLE))
+        rows = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+        return [row[0] for row in rows]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply every pending migration, each in its own transaction.
+    Safe to call from several workers at once: the version row is inserted
+    first, so a worker that loses the race skips the migration.
+
+    Args:
+        engine: Engine of the database to migrate
+
+    Returns:
+        Versions applied by this call
+    """
+    done = set(applied_versions(engine))
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                    {"version": migration.version, "name": migration.name}
+                )
+                statements = migration.statements
+                if conn.dialect.name == "postgresql":
+                    statements = migration.postgresql_statements + statements
+                for statement in statements:
+                    conn.execute(text(statement))
+        except IntegrityError:
+            logger.info(f"Migration {migration.version} was applied by another process")
+            continue
+        except OperationalError as e:
+            logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+        applied.append(migration.version)
+    return applied
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="only list applied and pending migrations")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.status:
+        done = set(applied_versions(engine))
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in done else "pending"
+            print(f"{migration.version:>4}  {state:<8} {migration.name}")
+    else:
+        print(f"Applied: {run_migrations(engine) or 'nothing to do'}")
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, ForeignKey, JSON, DateTime, Index, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from database import Base
 
+# SQLite keeps timestamps as text; CURRENT_TIMESTAMP writes them without
+# fractional seconds, so bound datetimes use the same format and compare as equal
+SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 
 class Profile(Base):
     __tablename__ = "profiles"
@@ -20,7 +27,8 @@ class Quiz(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     pdf_filename = Column(String, index=True, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Compared against keyset cursors, see SQLITE_TIMESTAMP
+    created_at = Column(DateTime(timezone=True).with_variant(SQLITE_TIMESTAMP, "sqlite"), server_default=func.now())
     question_count = Column(Integer, nullable=False, default=0)
 
     user_id = Column(String, ForeignKey("profiles.id"), nullable=False)
@@ -28,6 +36,11 @@ class Quiz(Base):
 
     questions = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
 
+    # /quizzes/my keyset pagination: a user's quizzes by (created_at, id)
+    __table_args__ = (
+        Index("ix_quizzes_user_created", "user_id", "created_at", "id"),
+    )
+
 
 class Question(Base):
     __tablename__ = "questions"
@@ -47,7 +60,8 @@ class GameSession(Base):
     __tablename__ = "game_sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    pin = Column(String(6), unique=True, nullable=False, index=True)
+    # Unique among live games only; finished games keep their PIN, which can be reused
+    pin = Column(String(6), nullable=False, index=True)
     quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
     host_id = Column(String, ForeignKey("profiles.id"), nullable=False)
     status = Column(String(20), default="lobby", nullable=False)
@@ -58,12 +72,30 @@ class GameSession(Base):
 
     quiz = relationship("Quiz")
     host = relationship("Profile")
+
+    # Fetch created_at in the INSERT itself (RETURNING) instead of a second SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        Index(
+            "uq_game_sessions_live_pin", "pin", unique=True,
+            sqlite_where=text("status IN ('lobby', 'active')"),
+            postgresql_where=text("status IN ('lobby', 'active')"),
+        ),
+    )
     player_responses = relationship("PlayerResponse", back_populates="game_session", cascade="all, delete-orphan")
 
 
 class PlayerResponse(Base):
     """Records each player's answer to a question in a game session"""
     __tablename__ = "player_responses"
+    # Existing databases get these through migrations.py (and supabase/migrations)
+    __table_args__ = (
+        # Per-question results: filter by game + question, count by answer
+        Index("ix_player_responses_game_question", "game_session_id", "question_id", "answer_index"),
+        # Leaderboard: group by game + player
+        Index("ix_player_responses_game_player", "game_session_id", "player_name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     game_session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=False)
@@ -77,3 +109,40 @@ class PlayerResponse(Base):
 
     game_session = relationship("GameSession", back_populates="player_responses")
     question = relationship("Question")
+
+
+# --- Compacted history (see compaction.py) ---
+
+class GameArchive(Base):
+    """Marks a finished game whose player_responses were rolled up into summaries"""
+    __tablename__ = "game_archives"
+
+    game_session_id = Column(Integer, ForeignKey("game_sessions.id"), primary_key=True)
+    compacted_at = Column(DateTime(timezone=True), server_default=func.now())
+    response_count = Column(Integer, nullable=False, default=0)
+    # Compressed export of the raw rows, if archiving was enabled
+    archive_path = Column(String, nullable=True)
+
+
+class GamePlayerSummary(Base):
+    """Final standing of one player in a compacted game"""
+    __tablename__ = "game_player_summaries"
+
+    game_session_id = Column(Integer, ForeignKey("game_sessions.id"), primary_key=True)
+    player_name = Column(String(50), primary_key=True)
+    total_points = Column(Integer, nullable=False, default=0)
+    questions_answered = Column(Integer, nullable=False, default=0)
+
+
+class GameQuestionSummary(Base):
+    """Answer histogram of one question in a compacted game"""
+    __tablename__ = "game_question_summaries"
+
+    game_session_id = Column(Integer, ForeignKey("game_sessions.id"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    # {"0": count, ..., "3": count}
+    distribution = Column(JSON, nullable=False)
+    total_responses = Column(Integer, nullable=False, default=0)
+    correct_count = Column(Integer, nullable=False, default=0)
+    answered_count = Column(Integer, nullable=False, default=0)
+    total_time_ms = Column(BigInteger, nullable=False, default=0)
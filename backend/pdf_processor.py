@@ -15,21 +15,47 @@ The AI generates multiple-choice questions with:
 """
 
 import fitz  # PyMuPDF
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
+import time
+import asyncio
+import tempfile
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Iterator
 from dotenv import load_dotenv
 import json
 
+from question_cache import question_cache, cache_key
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client
+# Chunks sent to the LLM at once by the async path, and the limit per call
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_CALL_TIMEOUT_S = float(os.getenv("LLM_CALL_TIMEOUT_S", "60"))
+LLM_MODEL = "gpt-4o-mini"  # Using GPT-4o Mini - fast, cost-effective, and available to all users
+# Part of the question cache key; bump it whenever _build_messages or _parse_questions changes
+PROMPT_VERSION = 1
+
+# Initialize OpenAI clients (sync for the CLI, async for the API)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_CALL_TIMEOUT_S)
 
-def _extract_text_from_doc(doc: fitz.Document, start_page: int | None = None, end_page: int | None = None) -> str:
-    """Extracts text from a given fitz.Document object, optionally from a specific page range (1-indexed)."""
-    text = ""
-    
+CHUNK_SIZE_WORDS = 750
+CHUNK_OVERLAP_WORDS = 100
+
+# Page ranges at least this long are extracted by several processes at once
+PARALLEL_EXTRACTION_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", "64"))
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS") or os.cpu_count() or 1)
+# Pages per unit of work handed to an extraction process by the upload path
+EXTRACTION_SPAN_PAGES = 16
+
+def _page_range(doc: fitz.Document, start_page: int | None = None, end_page: int | None = None) -> range:
+    """0-indexed pages to read for a 1-indexed start/end page selection."""
     actual_start_page = 0
     if start_page is not None and start_page > 0:
         actual_start_page = start_page - 1 # Convert 1-indexed to 0-indexed
@@ -43,69 +69,150 @@ def _extract_text_from_doc(doc: fitz.Document, start_page: int | None = None, en
 
     if actual_start_page >= len(doc):
         print(f"Warning: Start page ({start_page}) is beyond the document length ({len(doc)} pages).")
-        return ""
+        return range(0)
     
     if start_page is not None and end_page is not None and actual_start_page >= actual_end_page:
         print(f"Warning: End page ({end_page}) must be greater than start page ({start_page}). Processing only start page if it's valid.")
-        if actual_start_page < len(doc):
-            actual_end_page = actual_start_page + 1
-        else:
-            return "" # Start page itself is out of bounds
+        actual_end_page = actual_start_page + 1
 
     print(f"Extracting text from page {actual_start_page + 1} to {actual_end_page} (inclusive, 1-indexed). Total pages in PDF: {len(doc)}")
+    return range(actual_start_page, actual_end_page)
 
-    for page_num in range(actual_start_page, actual_end_page):
-        if page_num < len(doc):
-            page = doc.load_page(page_num)
-            text += page.get_text()
-        else:
-            print(f"Warning: Attempted to load page {page_num + 1}, which is out of bounds.")
-            break
-    return text
+def iter_page_texts(doc: fitz.Document, start_page: int | None = None, end_page: int | None = None) -> Iterator[str]:
+    """Yields the text of each page in the range, parsing a page only when it is pulled."""
+    for page_num in _page_range(doc, start_page, end_page):
+        yield doc.load_page(page_num).get_text()
 
-def extract_text_from_pdf_path(pdf_path: str, start_page: int | None = None, end_page: int | None = None) -> str:
-    """Extracts text from a PDF file path, optionally from a specific page range (1-indexed)."""
+def _extract_text_from_doc(doc: fitz.Document, start_page: int | None = None, end_page: int | None = None) -> str:
+    """Extracts text from a given fitz.Document object, optionally from a specific page range (1-indexed)."""
+    return "".join(iter_page_texts(doc, start_page, end_page))
+
+def _extract_page_span(pdf_path: str, first_page: int, stop_page: int) -> list[str]:
+    """Text of pages [first_page, stop_page); runs in an extraction process."""
+    doc = fitz.open(pdf_path)
     try:
-        doc = fitz.open(pdf_path)
-        text = _extract_text_from_doc(doc, start_page, end_page)
+        return [doc.load_page(page_num).get_text() for page_num in range(first_page, stop_page)]
+    finally:
         doc.close()
-        return text
+
+def _page_spans(pages: range, span_pages: int) -> list[range]:
+    return [range(first, min(first + span_pages, pages.stop)) for first in range(pages.start, pages.stop, span_pages)]
+
+def new_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: forking a process with a running event loop and threads is unsafe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+@contextmanager
+def _shared_pdf_file(pdf_bytes: bytes) -> Iterator[str]:
+    """
+    Writes an uploaded PDF once to a temp file that every extraction process
+    opens, instead of pickling the bytes to each of them. On Linux the file
+    lives in /dev/shm, so the processes map the same memory pages.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    try:
+        with os.fdopen(fd, "wb") as pdf_file:
+            pdf_file.write(pdf_bytes)
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def extract_page_texts_parallel(
+    pdf_path: str,
+    start_page: int | None = None,
+    end_page: int | None = None,
+    workers: int = PDF_EXTRACTION_WORKERS,
+    executor: Executor | None = None
+) -> list[str]:
+    """
+    Extracts the text of every page in the range, in page order.
+
+    The range is split into about four spans per worker (so one slow span
+    does not leave the other processes idle) and extracted on `executor`, or
+    on a pool of `workers` processes created for the call. Ranges shorter
+    than PARALLEL_EXTRACTION_MIN_PAGES, or a single worker, are extracted
+    serially in this process, where starting processes would cost more than
+    it saves.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        pages = _page_range(doc, start_page, end_page)
+        if len(pages) < PARALLEL_EXTRACTION_MIN_PAGES or workers <= 1:
+            return [doc.load_page(page_num).get_text() for page_num in pages]
+    finally:
+        doc.close()
+
+    spans = _page_spans(pages, -(-len(pages) // (workers * 4)))
+    pool = executor or new_extraction_pool(workers)
+    try:
+        futures = [pool.submit(_extract_page_span, pdf_path, span.start, span.stop) for span in spans]
+        return [text for future in futures for text in future.result()]
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+def extract_text_from_pdf_path(
+    pdf_path: str,
+    start_page: int | None = None,
+    end_page: int | None = None,
+    workers: int = PDF_EXTRACTION_WORKERS
+) -> str:
+    """Extracts text from a PDF file path, optionally from a specific page range (1-indexed)."""
+    try:
+        return "".join(extract_page_texts_parallel(pdf_path, start_page, end_page, workers))
     except Exception as e:
         print(f"Error opening or reading PDF from path '{pdf_path}': {e}")
         return ""
 
-def chunk_text(text: str, chunk_size: int = 750, overlap: int = 100) -> list[str]:
-    """Splits text into manageable chunks with a specified word count and overlap."""
-    words = text.split()
-    if not words:
-        return []
-
-    chunks = []
-    current_pos = 0
-    while current_pos < len(words):
-        start_pos = current_pos
-        end_pos = min(current_pos + chunk_size, len(words))
-        chunks.append(" ".join(words[start_pos:end_pos]))
-        
-        if end_pos == len(words):
-            break
-        current_pos += (chunk_size - overlap)
-        if current_pos >= len(words) - overlap and end_pos < len(words) : # ensure last part is captured
-             chunks.append(" ".join(words[current_pos:len(words)]))
-             break
-        elif current_pos >= end_pos : # avoid infinite loop on very small texts or large overlaps
-            if end_pos < len(words): # still text left
-                 chunks.append(" ".join(words[end_pos:len(words)]))
-            break
-            
-    return chunks
-
-def generate_questions_from_chunk(text_chunk: str, num_questions: int = 3) -> list[dict]:
+class _Chunker:
     """
-    Generates multiple-choice questions from a text chunk using an LLM.
+    Incremental word-window chunker: feed text as it is extracted, get back
+    every chunk that is complete. Holds at most one chunk of words.
     """
-    print(f"\n--- Sending chunk to Gemini for question generation (first 100 chars): ---\n{text_chunk[:100]}...""")
 
+    def __init__(self, chunk_size: int = CHUNK_SIZE_WORDS, overlap: int = CHUNK_OVERLAP_WORDS):
+        if not 0 <= overlap < chunk_size:
+            raise ValueError(f"overlap ({overlap}) must be at least 0 and less than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.window: list[str] = []
+        # Words at the front of the window that already ended the previous chunk
+        self.emitted = 0
+
+    def feed(self, text: str) -> list[str]:
+        chunks = []
+        for word in text.split():
+            self.window.append(word)
+            if len(self.window) == self.chunk_size:
+                chunks.append(" ".join(self.window))
+                # The next chunk starts chunk_size - overlap words further on
+                del self.window[:self.chunk_size - self.overlap]
+                self.emitted = len(self.window)
+        return chunks
+
+    def finish(self) -> list[str]:
+        """The trailing partial chunk, unless all of its words were in the last chunk."""
+        chunks = [" ".join(self.window)] if len(self.window) > self.emitted else []
+        self.window = []
+        self.emitted = 0
+        return chunks
+
+def iter_chunks(texts: Iterable[str], chunk_size: int = CHUNK_SIZE_WORDS, overlap: int = CHUNK_OVERLAP_WORDS) -> Iterator[str]:
+    """Yields chunks of chunk_size words, each starting chunk_size - overlap words after the previous one."""
+    chunker = _Chunker(chunk_size, overlap)
+    for text in texts:
+        yield from chunker.feed(text)
+    yield from chunker.finish()
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE_WORDS, overlap: int = CHUNK_OVERLAP_WORDS) -> list[str]:
+    """Splits text into manageable chunks with a specified word count and overlap."""
+    return list(iter_chunks([text], chunk_size, overlap))
+
+def _build_messages(text_chunk: str, num_questions: int) -> list[dict]:
+    """Chat messages asking the LLM for num_questions questions about text_chunk."""
     system_prompt = """You are an expert at creating challenging, university-level exam questions based on provided academic text excerpts.
 Your primary goal is to test a student's ability to understand, apply, and analyze the core concepts and information within the text. 
 **CRITICAL: Do NOT ask questions about the document's structure, such as section numbers, chapter titles, page numbers, or the organization of the text itself.** 
@@ -151,57 +258,332 @@ Please generate {num_questions} multiple-choice questions based on this excerpt.
 The output must be a single JSON object with a "questions" key, where the value is a list of question objects, following the format described.
 """
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def _parse_questions(content: str) -> list[dict]:
+    """Validated question dicts from the LLM's JSON response; [] if it is unusable."""
+    print(f"Raw response from Gemini (first 200 chars): {content[:200]}...")
+
     generated_questions_list = []
     try:
-        model_to_use = "gpt-4o-mini"  # Using GPT-4o Mini - fast, cost-effective, and available to all users
-        print(f"Using OpenAI model: {model_to_use}")
+        parsed_response = json.loads(content)
+        
+        if isinstance(parsed_response, dict) and "questions" in parsed_response and isinstance(parsed_response["questions"], list):
+            raw_questions = parsed_response["questions"]
+            for q_data in raw_questions:
+                if isinstance(q_data, dict) and all(k in q_data for k in ["question", "options", "correct_answer_index", "explanation"]):
+                    if isinstance(q_data["options"], list) and len(q_data["options"]) == 4 and isinstance(q_data["correct_answer_index"], int):
+                         generated_questions_list.append(q_data)
+                    else:
+                        print(f"Warning: Question has malformed options or correct_answer_index: {q_data.get('question')}")
+                else:
+                    print(f"Warning: Question object has missing keys or incorrect type: {q_data}")
+        else:
+            print(f"Error: LLM response was not in the expected JSON format {{'questions': [...]}}.")
+            print(f"Parsed content: {parsed_response}")
+            return []
+
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from Gemini response: {e}")
+        print(f"Raw content from Gemini that caused error: {content}")
+        return []
+
+    print(f"Successfully generated and parsed {len(generated_questions_list)} questions for the chunk.")
+    return generated_questions_list
+
+def generate_questions_from_chunk(text_chunk: str, num_questions: int = 3, use_cache: bool = True) -> list[dict]:
+    """
+    Generates multiple-choice questions from a text chunk using an LLM.
+    Chunks generated before are answered from the question cache unless use_cache is False.
+    """
+    key = cache_key(text_chunk, PROMPT_VERSION, LLM_MODEL, num_questions)
+    if use_cache:
+        cached = question_cache.get(key)
+        if cached is not None:
+            print(f"Question cache hit for chunk (first 100 chars): {text_chunk[:100]}...")
+            return cached
+
+    print(f"\n--- Sending chunk to Gemini for question generation (first 100 chars): ---\n{text_chunk[:100]}...""")
+
+    try:
+        print(f"Using OpenAI model: {LLM_MODEL}")
 
         # Call OpenAI API
         response = client.chat.completions.create(
-            model=model_to_use,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            model=LLM_MODEL,
+            messages=_build_messages(text_chunk, num_questions),
             response_format={"type": "json_object"}
         )
 
-        content = response.choices[0].message.content
-        
-        print(f"Raw response from Gemini (first 200 chars): {content[:200]}...")
+        questions = _parse_questions(response.choices[0].message.content)
 
-        try:
-            parsed_response = json.loads(content)
-            
-            if isinstance(parsed_response, dict) and "questions" in parsed_response and isinstance(parsed_response["questions"], list):
-                raw_questions = parsed_response["questions"]
-                for q_data in raw_questions:
-                    if isinstance(q_data, dict) and all(k in q_data for k in ["question", "options", "correct_answer_index", "explanation"]):
-                        if isinstance(q_data["options"], list) and len(q_data["options"]) == 4 and isinstance(q_data["correct_answer_index"], int):
-                             generated_questions_list.append(q_data)
-                        else:
-                            print(f"Warning: Question has malformed options or correct_answer_index: {q_data.get('question')}")
-                    else:
-                        print(f"Warning: Question object has missing keys or incorrect type: {q_data}")
-            else:
-                print(f"Error: LLM response was not in the expected JSON format {{'questions': [...]}}.")
-                print(f"Parsed content: {parsed_response}")
-                return []
-
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from Gemini response: {e}")
-            print(f"Raw content from Gemini that caused error: {content}")
-            return []
+    except Exception as e:
+        print(f"OpenAI API error: {e}")
+        return []
 
-        print(f"Successfully generated and parsed {len(generated_questions_list)} questions for the chunk.")
-        return generated_questions_list
+    question_cache.put(key, questions)
+    return questions
 
+async def agenerate_questions_from_chunk(
+    text_chunk: str,
+    num_questions: int = 3,
+    timeout: float = LLM_CALL_TIMEOUT_S,
+    use_cache: bool = True
+) -> list[dict]:
+    """
+    Async generate_questions_from_chunk: one LLM call, bounded by `timeout` seconds.
+    Failures and timeouts yield [] so one bad chunk does not fail the quiz.
+    """
+    key = cache_key(text_chunk, PROMPT_VERSION, LLM_MODEL, num_questions)
+    if use_cache:
+        cached = await asyncio.to_thread(question_cache.get, key)
+        if cached is not None:
+            return cached
+
+    try:
+        response = await asyncio.wait_for(
+            async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=_build_messages(text_chunk, num_questions),
+                response_format={"type": "json_object"}
+            ),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        print(f"OpenAI API call timed out after {timeout}s")
+        return []
     except Exception as e:
         print(f"OpenAI API error: {e}")
         return []
+
+    questions = _parse_questions(response.choices[0].message.content)
+    await asyncio.to_thread(question_cache.put, key, questions)
+    return questions
+
+async def _as_async_iter(items: Iterable[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+async def generate_questions_concurrently(
+    text_chunks: Iterable[str] | AsyncIterator[str],
+    questions_per_chunk: int = 3,
+    max_total_questions: int = 10,
+    concurrency: int = LLM_CONCURRENCY,
+    timeout: float = LLM_CALL_TIMEOUT_S,
+    use_cache: bool = True
+) -> list[dict]:
+    """
+    Fans chunks out to the LLM with at most `concurrency` calls in flight.
+
+    Chunks are pulled from `text_chunks` (a list or a lazy stream) in order,
+    and only while the questions already generated plus questions_per_chunk
+    for every call in flight fall short of max_total_questions, so a quiz
+    that needs four chunks makes four concurrent calls and never extracts
+    the fifth. A call that comes back short lets the next chunk go out. Once
+    the finished chunks at the front add up to max_total_questions the rest
+    is cancelled. The result is the same chunk-ordered list the sequential
+    loop would produce.
+    """
+    source = text_chunks if hasattr(text_chunks, "__anext__") else _as_async_iter(text_chunks)
+    results: list[list[dict] | None] = []
+    running: dict[asyncio.Task, int] = {}
+    exhausted = False
+
+    def generated() -> int:
+        return sum(len(chunk_questions) for chunk_questions in results if chunk_questions is not None)
+
+    def ordered_prefix_count() -> int:
+        count = 0
+        for chunk_questions in results:
+            if chunk_questions is None:
+                break
+            count += len(chunk_questions)
+        return count
+
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(running) < concurrency
+                and generated() + len(running) * questions_per_chunk < max_total_questions
+            ):
+                chunk = await anext(source, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                print(f"Dispatching chunk {len(results) + 1}")
+                task = asyncio.create_task(
+                    agenerate_questions_from_chunk(chunk, questions_per_chunk, timeout, use_cache)
+                )
+                running[task] = len(results)
+                results.append(None)
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[running.pop(task)] = task.result()
+
+            if ordered_prefix_count() >= max_total_questions:
+                print(f"Reached maximum of {max_total_questions} questions. Stopping.")
+                break
+    finally:
+        for task in running:
+            task.cancel()
+        if hasattr(source, "aclose"):
+            await source.aclose()
+
+    all_generated_questions = []
+    for chunk_questions in results:
+        if chunk_questions is None:
+            break
+        all_generated_questions.extend(chunk_questions)
+    return all_generated_questions[:max_total_questions]
+
+def iter_chunks_from_pdf_stream(
+    pdf_bytes: bytes,
+    filename: str,
+    start_page: int | None = None,
+    end_page: int | None = None
+) -> Iterator[str]:
+    """Lazily extracts and chunks a PDF byte stream: a page is parsed only when the next chunk needs it."""
+    try:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     except Exception as e:
-        print(f"An unexpected error occurred while generating questions: {e}")
-        return []
+        print(f"Error opening PDF stream for '{filename}': {e}")
+        return
+
+    print(f"Processing PDF: {filename}")
+    try:
+        yield from iter_chunks(iter_page_texts(doc, start_page, end_page))
+    finally:
+        doc.close()
+
+@dataclass
+class ChunkCursor:
+    """Where a batched extraction stopped: the next page to read and the words carried over."""
+    next_page: int
+    chunker: _Chunker = field(default_factory=_Chunker)
+
+def extract_chunk_batch(
+    pdf: bytes | str,
+    filename: str,
+    start_page: int | None = None,
+    end_page: int | None = None,
+    min_chunks: int = 1,
+    cursor: ChunkCursor | None = None
+) -> tuple[list[str], ChunkCursor | None]:
+    """
+    Parses pages until at least min_chunks chunks are complete or the range ends.
+
+    A worker process cannot hand a generator back, so this returns a cursor
+    to resume from; call again with it for the next batch.
+
+    Args:
+        pdf: The PDF's bytes, or the path of a file holding them (cheaper to
+            send to another process for every batch)
+
+    Returns:
+        (chunks, cursor) where cursor is None once the page range is exhausted
+    """
+    try:
+        doc = fitz.open(pdf) if isinstance(pdf, str) else fitz.open(stream=pdf, filetype="pdf")
+    except Exception as e:
+        print(f"Error opening PDF stream for '{filename}': {e}")
+        return [], None
+
+    try:
+        if cursor is None:
+            print(f"Processing PDF: {filename}")
+        pages = _page_range(doc, start_page, end_page)
+        if cursor is None:
+            cursor = ChunkCursor(next_page=pages.start)
+
+        chunks = []
+        while len(chunks) < min_chunks and cursor.next_page < pages.stop:
+            chunks.extend(cursor.chunker.feed(doc.load_page(cursor.next_page).get_text()))
+            cursor.next_page += 1
+        if cursor.next_page >= pages.stop:
+            chunks.extend(cursor.chunker.finish())
+            return chunks, None
+        return chunks, cursor
+    finally:
+        doc.close()
+
+async def _iter_chunks_in_batches(
+    executor: Executor | None,
+    pdf: bytes | str,
+    filename: str,
+    start_page: int | None,
+    end_page: int | None,
+    batch_chunks: int
+) -> AsyncIterator[str]:
+    """Async chunk stream backed by extract_chunk_batch calls on `executor`, one batch at a time."""
+    loop = asyncio.get_running_loop()
+    cursor = None
+    while True:
+        chunks, cursor = await loop.run_in_executor(
+            executor, extract_chunk_batch, pdf, filename, start_page, end_page, batch_chunks, cursor
+        )
+        for chunk in chunks:
+            yield chunk
+        if cursor is None:
+            return
+
+async def _iter_chunks_parallel(
+    executor: Executor,
+    pdf_path: str,
+    pages: range,
+    max_in_flight: int = PDF_EXTRACTION_WORKERS
+) -> AsyncIterator[str]:
+    """
+    Async chunk stream over page spans extracted in parallel on `executor`.
+
+    Spans are submitted in page order. The number in flight starts at one
+    and doubles up to max_in_flight each time a span is consumed, so a short
+    quiz reads a few spans of a long PDF while a long quiz soon keeps every
+    process busy. Span results are chunked here in order.
+    """
+    loop = asyncio.get_running_loop()
+    spans = iter(_page_spans(pages, EXTRACTION_SPAN_PAGES))
+    pending: deque[asyncio.Future] = deque()
+    in_flight = 1
+    chunker = _Chunker()
+    try:
+        while True:
+            while len(pending) < in_flight:
+                span = next(spans, None)
+                if span is None:
+                    break
+                pending.append(loop.run_in_executor(executor, _extract_page_span, pdf_path, span.start, span.stop))
+            if not pending:
+                break
+
+            page_texts = await pending.popleft()
+            in_flight = min(in_flight * 2, max(1, max_in_flight))
+            for text in page_texts:
+                for chunk in chunker.feed(text):
+                    yield chunk
+        for chunk in chunker.finish():
+            yield chunk
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _resolve_page_range(pdf_bytes: bytes, filename: str, start_page: int | None, end_page: int | None) -> range:
+    try:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        print(f"Error opening PDF stream for '{filename}': {e}")
+        return range(0)
+    try:
+        return _page_range(doc, start_page, end_page)
+    finally:
+        doc.close()
 
 def generate_quiz_from_pdf_stream(
     pdf_bytes: bytes, 
@@ -209,43 +591,73 @@ def generate_quiz_from_pdf_stream(
     start_page: int | None = None, 
     end_page: int | None = None, 
     questions_per_chunk: int = 3, 
-    max_total_questions: int = 10
+    max_total_questions: int = 10,
+    use_cache: bool = True
 ) -> list[dict]:
     """Processes a PDF from a byte stream, generates questions based on page range and parameters."""
     all_generated_questions = []
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    except Exception as e:
-        print(f"Error opening PDF stream for '{filename}': {e}")
-        return []
-
-    print(f"Processing PDF: {filename}")
-    full_text = _extract_text_from_doc(doc, start_page, end_page)
-    doc.close()
+    # Pages are only extracted as far as the chunks consumed here reach
+    text_chunks = iter_chunks_from_pdf_stream(pdf_bytes, filename, start_page, end_page)
 
-    if not full_text:
-        print(f"No text extracted from '{filename}' based on the specified page range.")
-        return []
+    try:
+        for i, chunk in enumerate(text_chunks):
+            print(f"\nProcessing chunk {i+1} for '{filename}'...")
+            questions = generate_questions_from_chunk(chunk, num_questions=questions_per_chunk, use_cache=use_cache)
+            all_generated_questions.extend(questions)
+            if len(all_generated_questions) >= max_total_questions:
+                all_generated_questions = all_generated_questions[:max_total_questions]
+                print(f"Reached maximum of {max_total_questions} questions with this chunk for '{filename}'. Stopping.")
+                break
+    finally:
+        text_chunks.close()
     
-    print(f"Successfully extracted {len(full_text)} characters from '{filename}'.")
+    print(f"Finished generating {len(all_generated_questions)} questions for '{filename}'.")
+    return all_generated_questions
 
-    text_chunks = chunk_text(full_text, chunk_size=750, overlap=100) # Assuming chunk_text is defined elsewhere or pasted here
-    print(f"Text from '{filename}' divided into {len(text_chunks)} chunks.")
+async def agenerate_quiz_from_pdf_stream(
+    pdf_bytes: bytes,
+    filename: str,
+    start_page: int | None = None,
+    end_page: int | None = None,
+    questions_per_chunk: int = 3,
+    max_total_questions: int = 10,
+    executor: Executor | None = None,
+    use_cache: bool = True
+) -> list[dict]:
+    """
+    Async generate_quiz_from_pdf_stream: PDF parsing runs on `executor` (a
+    worker thread if None), LLM calls for the chunks run concurrently.
+    Same output order as the sync path. use_cache=False regenerates every
+    chunk (and refreshes its cache entry).
+
+    Pages are extracted only as far as the quiz needs. With a process pool
+    and at least PARALLEL_EXTRACTION_MIN_PAGES pages, page spans are
+    extracted by several processes at once; otherwise one process extracts
+    batches of as many chunks as max_total_questions should take.
+    """
+    started = time.perf_counter()
+    pages = await asyncio.to_thread(_resolve_page_range, pdf_bytes, filename, start_page, end_page)
+    if not pages:
+        return []
 
-    for i, chunk in enumerate(text_chunks):
-        if len(all_generated_questions) >= max_total_questions:
-            print(f"Reached maximum of {max_total_questions} questions for '{filename}'. Stopping.")
-            break
-        print(f"\nProcessing chunk {i+1}/{len(text_chunks)} for '{filename}'...")
-        # Assuming generate_questions_from_chunk is defined elsewhere or pasted here
-        questions = generate_questions_from_chunk(chunk, num_questions=questions_per_chunk)
-        all_generated_questions.extend(questions)
-        if len(all_generated_questions) >= max_total_questions:
-            all_generated_questions = all_generated_questions[:max_total_questions]
-            print(f"Reached maximum of {max_total_questions} questions with this chunk for '{filename}'. Stopping.")
-            break
-    
-    print(f"Finished generating {len(all_generated_questions)} questions for '{filename}'.")
+    # Extraction processes open one shared copy of the file; a thread can use the bytes directly
+    in_processes = isinstance(executor, ProcessPoolExecutor)
+    with (_shared_pdf_file(pdf_bytes) if in_processes else nullcontext(pdf_bytes)) as pdf:
+        if in_processes and len(pages) >= PARALLEL_EXTRACTION_MIN_PAGES:
+            print(f"Extracting {len(pages)} pages of '{filename}' in parallel")
+            text_chunks = _iter_chunks_parallel(executor, pdf, pages)
+        else:
+            text_chunks = _iter_chunks_in_batches(
+                executor, pdf, filename, start_page, end_page,
+                batch_chunks=max(1, -(-max_total_questions // max(1, questions_per_chunk)))
+            )
+        all_generated_questions = await generate_questions_concurrently(
+            text_chunks,
+            questions_per_chunk=questions_per_chunk,
+            max_total_questions=max_total_questions,
+            use_cache=use_cache
+        )
+    print(f"Finished generating {len(all_generated_questions)} questions for '{filename}' in {time.perf_counter() - started:.1f}s.")
     return all_generated_questions
 
 def main(full_text: str):
@@ -0,0 +1,124 @@
+"""
+PIN Allocator - Free 6-digit game PINs without querying the database
+
+Live PINs (games in lobby or active) are tracked in a bitset over the 10^6
+PIN space, 125 KB per process. Allocation draws random PINs until it hits a
+free bit, which is one or two probes while live games are a small fraction
+of the space, with a byte scan as a bounded fallback. PINs are released when
+a game finishes or expires; finished sessions keep their PIN in the database
+but are addressed by session id.
+
+Each worker has its own bitset, so two workers can hand out the same PIN.
+The partial unique index on live game_sessions.pin rejects the second
+insert, the loser marks the PIN used and allocates again, and the periodic
+sync from the database clears bits of games finished on other workers.
+"""
+import random
+from typing import Dict, Iterable, Optional
+
+PIN_SPACE = 10 ** 6
+_RANDOM_PROBES = 32
+
+
+def format_pin(value: int) -> str:
+    return f"{value:06d}"
+
+
+def parse_pin(pin: str) -> Optional[int]:
+    if not pin or len(pin) != 6 or not pin.isdigit():
+        return None
+    return int(pin)
+
+
+class PinAllocator:
+    """Bitset of live PINs with O(1) expected allocation"""
+
+    def __init__(self, size: int = PIN_SPACE):
+        self.size = size
+        self._bits = bytearray((size + 7) // 8)
+        self.live = 0
+
+        self.allocations = 0
+        self.collisions = 0
+        self.fallback_scans = 0
+
+    def _is_set(self, value: int) -> bool:
+        return bool(self._bits[value >> 3] & (1 << (value & 7)))
+
+    def _set(self, value: int) -> bool:
+        """Mark a PIN live; False if it already was"""
+        mask = 1 << (value & 7)
+        if self._bits[value >> 3] & mask:
+            return False
+        self._bits[value >> 3] |= mask
+        self.live += 1
+        return True
+
+    def allocate(self) -> str:
+        """
+        Reserve a free PIN.
+
+        Raises:
+            RuntimeError: If every PIN is live
+        """
+        if self.live >= self.size:
+            raise RuntimeError("No free game PINs")
+
+        for _ in range(_RANDOM_PROBES):
+            value = random.randrange(self.size)
+            if self._set(value):
+                self.allocations += 1
+                return format_pin(value)
+
+        # Dense bitset: scan bytes from a random offset for one with a free bit
+        self.fallback_scans += 1
+        start = random.randrange(len(self._bits))
+        for offset in range(len(self._bits)):
+            index = (start + offset) % len(self._bits)
+            byte = self._bits[index]
+            if byte == 0xFF:
+                continue
+            for bit in range(8):
+                value = index * 8 + bit
+                if value < self.size and not byte & (1 << bit):
+                    self._set(value)
+                    self.allocations += 1
+                    return format_pin(value)
+        raise RuntimeError("No free game PINs")
+
+    def mark_live(self, pin: str) -> bool:
+        """Record a PIN taken elsewhere (another worker); False if already live"""
+        value = parse_pin(pin)
+        if value is None or value >= self.size:
+            return False
+        return self._set(value)
+
+    def release(self, pin: str) -> None:
+        value = parse_pin(pin)
+        if value is None or value >= self.size or not self._is_set(value):
+            return
+        self._bits[value >> 3] &= ~(1 << (value & 7)) & 0xFF
+        self.live -= 1
+
+    def is_live(self, pin: str) -> bool:
+        value = parse_pin(pin)
+        return value is not None and value < self.size and self._is_set(value)
+
+    def sync(self, live_pins: Iterable[str]) -> None:
+        """Replace the bitset with the database's current set of live PINs"""
+        self._bits = bytearray(len(self._bits))
+        self.live = 0
+        for pin in live_pins:
+            self.mark_live(pin)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live": self.live,
+            "capacity": self.size,
+            "allocations": self.allocations,
+            "collisions": self.collisions,
+            "fallback_scans": self.fallback_scans,
+        }
+
+
+pin_allocator = PinAllocator()
@@ -0,0 +1,101 @@
+"""
+Query Budget - Count SQL statements per request and flag N+1 patterns
+
+Every statement executed on either engine is counted against the current
+request (or a `count_statements()` block). With SQL_STATEMENT_BUDGET set,
+requests that go over the budget are logged; with SQL_STATEMENT_BUDGET_STRICT
+they fail with a 500 instead, which is how test and CI runs catch a lazy load
+or a query inside a loop.
+"""
+import os
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from database import engine, async_engine
+
+logger = logging.getLogger(__name__)
+
+SQL_STATEMENT_BUDGET = int(os.getenv("SQL_STATEMENT_BUDGET", "0"))
+SQL_STATEMENT_BUDGET_STRICT = os.getenv("SQL_STATEMENT_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+
+class StatementCounter:
+    """Statements executed inside one request or block"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.statements.append(" ".join(statement.split())[:200])
+
+
+class StatementBudgetExceeded(AssertionError):
+    pass
+
+
+# Holds a mutable counter so statements run in SQLAlchemy's greenlets still land on it
+_current: ContextVar[Optional[StatementCounter]] = ContextVar("sql_statement_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def count_statements(budget: Optional[int] = None) -> Iterator[StatementCounter]:
+    """
+    Count statements executed inside the block.
+
+    Args:
+        budget: If given, raise StatementBudgetExceeded when the block
+            executes more statements than this
+
+    Yields:
+        The StatementCounter for the block
+    """
+    counter = StatementCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+    if budget is not None and counter.count > budget:
+        raise StatementBudgetExceeded(
+            f"{counter.count} SQL statements (budget {budget}):\n" + "\n".join(counter.statements)
+        )
+
+
+async def statement_budget_middleware(request: Request, call_next):
+    """HTTP middleware enforcing SQL_STATEMENT_BUDGET per request"""
+    if SQL_STATEMENT_BUDGET <= 0:
+        return await call_next(request)
+
+    with count_statements() as counter:
+        response = await call_next(request)
+
+    if counter.count > SQL_STATEMENT_BUDGET:
+        route = f"{request.method} {request.url.path}"
+        logger.warning(
+            f"{route} issued {counter.count} SQL statements (budget {SQL_STATEMENT_BUDGET}): "
+            f"{counter.statements}"
+        )
+        if SQL_STATEMENT_BUDGET_STRICT:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"SQL statement budget exceeded: {counter.count} > {SQL_STATEMENT_BUDGET}"}
+            )
+    return response
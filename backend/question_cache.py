@@ -0,0 +1,210 @@
+"""
+Question Cache - Generated questions per chunk, keyed by content
+
+Re-uploading the same notes, or retrying an upload that failed halfway,
+produces the same chunks, and each one used to cost an LLM call again. The
+questions generated for a chunk are stored in a local SQLite file under a
+hash of the chunk text, prompt version, model and number of questions, so an
+identical chunk is answered from disk. Entries older than
+QUESTION_CACHE_MAX_AGE_DAYS are dropped, and least recently used entries go
+once the stored questions exceed QUESTION_CACHE_MAX_BYTES.
+
+The file is separate from the application database (which may be Supabase
+PostgreSQL) and is shared by every worker on the machine. By default it lives
+in the system temp directory, outside the source tree.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUESTION_CACHE_ENABLED = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Empty: kahootit/question_cache.db in the system temp directory
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH") or os.path.join(
+    tempfile.gettempdir(), "kahootit", "question_cache.db"
+)
+QUESTION_CACHE_MAX_BYTES = int(os.getenv("QUESTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+QUESTION_CACHE_MAX_AGE_DAYS = float(os.getenv("QUESTION_CACHE_MAX_AGE_DAYS", "30"))
+# Eviction runs every this many stores rather than on each one
+_EVICT_EVERY = 100
+
+
+def cache_key(text_chunk: str, prompt_version: int, model: str, num_questions: int) -> str:
+    material = json.dumps([prompt_version, model, num_questions, text_chunk], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class QuestionCache:
+    """SQLite-backed map from cache_key to the generated question list"""
+
+    def __init__(
+        self,
+        path: str = QUESTION_CACHE_PATH,
+        max_bytes: int = QUESTION_CACHE_MAX_BYTES,
+        max_age_days: float = QUESTION_CACHE_MAX_AGE_DAYS,
+        enabled: bool = QUESTION_CACHE_ENABLED
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_days * 86400
+        self.enabled = enabled
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # One connection shared by the event loop's worker threads
+        self._lock = threading.Lock()
+        self._stores_since_evict = 0
+        # Running totals for stats(), so reading them never touches the file.
+        # Other workers write to the same file; each eviction pass resyncs.
+        self._entries = 0
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so processes that never generate (extraction workers) never touch the file
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_questions ("
+                "key TEXT PRIMARY KEY, "
+                "questions TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_chunk_questions_last_used ON chunk_questions (last_used_at)")
+            self._conn = conn
+            self._sync_totals()
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached questions for a key, or None on a miss (or if the cache is off)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT questions, created_at FROM chunk_questions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] >= now - self.max_age_s:
+                    conn.execute("UPDATE chunk_questions SET last_used_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Question cache lookup failed: {e}")
+            return None
+
+        if row is None or row[1] < now - self.max_age_s:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, questions: List[Dict]) -> None:
+        """Store (or refresh) the questions generated for a key"""
+        if not self.enabled or not questions:
+            return
+        payload = json.dumps(questions, ensure_ascii=False)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                replaced = conn.execute("SELECT size FROM chunk_questions WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO chunk_questions (key, questions, size, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now)
+                )
+                if replaced is None:
+                    self._entries += 1
+                else:
+                    self._bytes -= replaced[0]
+                self._bytes += len(payload)
+                self.stores += 1
+                self._stores_since_evict += 1
+                if self._stores_since_evict >= _EVICT_EVERY:
+                    self._evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Question cache store failed: {e}")
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones down to max_bytes"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        self._stores_since_evict = 0
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM chunk_questions WHERE created_at < ?", (time.time() - self.max_age_s,)
+        ).rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunk_questions").fetchone()[0]
+        if total > self.max_bytes:
+            # Oldest-used first; cut where the remainder fits
+            excess = total - self.max_bytes
+            cutoff = None
+            for last_used_at, size in conn.execute(
+                "SELECT last_used_at, size FROM chunk_questions ORDER BY last_used_at"
+            ):
+                excess -= size
+                cutoff = last_used_at
+                if excess <= 0:
+                    break
+            removed += conn.execute(
+                "DELETE FROM chunk_questions WHERE last_used_at <= ?", (cutoff,)
+            ).rowcount
+
+        self.evictions += removed
+        self._sync_totals()
+        return removed
+
+    def _sync_totals(self) -> None:
+        self._entries, self._bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunk_questions"
+        ).fetchone()
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._connection().execute("DELETE FROM chunk_questions")
+            self._entries = 0
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+        if self.enabled:
+            # Counters only: stats() is called on the event loop
+            stats.update(entries=self._entries, bytes=self._bytes, max_bytes=self.max_bytes)
+        return stats
+
+
+question_cache = QuestionCache()
@@ -0,0 +1,143 @@
+"""
+Quiz Cache - Pre-serialized quiz payloads for GET /game/{game_id}
+
+Hosts and learn/flashcard pages fetch the same quiz over and over, so the
+encoded response body is kept per quiz in a byte-bounded LRU together with a
+strong ETag (hash of the body). Entries are dropped when a Quiz or Question
+row is inserted, updated or deleted through the ORM and the transaction
+commits.
+"""
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+QUIZ_CACHE_MAX_BYTES = int(os.getenv("QUIZ_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+def encode_payload(payload: Dict) -> Tuple[bytes, str]:
+    """
+    Encode a response payload the way JSONResponse does and derive its ETag
+
+    Returns:
+        (body, etag) where etag is a quoted strong validator
+    """
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return body, etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers this ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison is what RFC 9110 specifies for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class QuizPayloadCache:
+    """LRU of encoded quiz payloads, bounded by total body size"""
+
+    def __init__(self, max_bytes: int = QUIZ_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[bytes, str]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, quiz_id: int) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(quiz_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(quiz_id)
+        self.hits += 1
+        return entry
+
+    def put(self, quiz_id: int, body: bytes, etag: str) -> None:
+        self.invalidate(quiz_id, count=False)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[quiz_id] = (body, etag)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (old_body, _) = self._entries.popitem(last=False)
+            self._bytes -= len(old_body)
+            self.evictions += 1
+
+    def invalidate(self, quiz_id: int, count: bool = True) -> None:
+        entry = self._entries.pop(quiz_id, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+            if count:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+quiz_cache = QuizPayloadCache()
+
+
+# --- Invalidation on ORM writes ---
+
+_PENDING_KEY = "quiz_cache_invalidate"
+
+
+def _touched_quiz_ids(session: Session) -> Set[int]:
+    quiz_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Quiz) and obj.id is not None:
+            quiz_ids.add(obj.id)
+        elif isinstance(obj, models.Question) and obj.quiz_id is not None:
+            quiz_ids.add(obj.quiz_id)
+    return quiz_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_before_flush(session, flush_context, instances):
+    session.info.setdefault(_PENDING_KEY, set()).update(_touched_quiz_ids(session))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_after_flush(session, flush_context):
+    # New rows only have their ids once flushed
+    session.info.setdefault(_PENDING_KEY, set()).update(_touched_quiz_ids(session))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for quiz_id in session.info.pop(_PENDING_KEY, ()):
+        quiz_cache.invalidate(quiz_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
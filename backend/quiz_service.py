@@ -0,0 +1,96 @@
+"""
+Quiz Service - Persistence of generated and imported quizzes
+
+A quiz and all of its questions are written in one transaction with two
+statements: an INSERT ... RETURNING for the quiz row and one multi-row
+INSERT ... RETURNING for the questions (SQLAlchemy batches the parameter
+list into as few statements as the driver allows). A failure leaves neither
+a quiz without questions nor questions without a quiz.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+
+@dataclass
+class SavedQuiz:
+    id: int
+    title: str
+    created_at: Optional[datetime]
+    question_ids: List[int]
+
+
+def _question_row(question: Dict) -> Dict:
+    try:
+        options = question["options"]
+        correct_answer_index = question["correct_answer_index"]
+        question_text = question["question"]
+    except KeyError as e:
+        raise ValueError(f"Question is missing {e}")
+    if not 0 <= correct_answer_index < len(options):
+        raise ValueError(f"correct_answer_index {correct_answer_index} is out of range for {len(options)} options")
+    return {
+        "question_text": question_text,
+        "options": options,
+        "correct_answer_index": correct_answer_index,
+        "explanation": question.get("explanation")
+    }
+
+
+async def save_quiz(
+    db: AsyncSession,
+    user_id: str,
+    title: str,
+    questions: List[Dict],
+    pdf_filename: Optional[str] = None
+) -> SavedQuiz:
+    """
+    Insert a quiz with its questions atomically.
+
+    Args:
+        db: Database session (committed on success, rolled back on failure)
+        user_id: Owner of the quiz
+        title: Quiz title
+        questions: Dicts in the generator's format: question, options,
+            correct_answer_index and optionally explanation
+        pdf_filename: Source file name, if any
+
+    Returns:
+        SavedQuiz with the new ids, in the order of `questions`
+
+    Raises:
+        ValueError: If there are no questions or one is malformed
+    """
+    if not questions:
+        raise ValueError("A quiz needs at least one question")
+    # Validate everything before touching the database
+    question_rows = [_question_row(question) for question in questions]
+
+    try:
+        quiz_id, created_at = (await db.execute(
+            insert(models.Quiz).values(
+                title=title,
+                pdf_filename=pdf_filename,
+                user_id=user_id,
+                question_count=len(questions)
+            ).returning(models.Quiz.id, models.Quiz.created_at)
+        )).one()
+
+        # sort_by_parameter_order would force one statement per row on SQLite;
+        # ids of a single multi-row INSERT increase in row order, so sort instead
+        question_ids = sorted((await db.scalars(
+            insert(models.Question).returning(models.Question.id),
+            [{"quiz_id": quiz_id, **row} for row in question_rows]
+        )).all())
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return SavedQuiz(id=quiz_id, title=title, created_at=created_at, question_ids=question_ids)
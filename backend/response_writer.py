@@ -0,0 +1,212 @@
+"""
+Response Writer - Write-behind persistence of scored player answers
+
+Answers scored by a GameRuntime are queued here and written to the database
+as one bulk insert per flush, instead of one commit per answer. A flush
+happens every flush interval, when a batch fills up, when a question closes
+and on shutdown. A batch whose insert fails is retried once, then dropped
+and counted in stats().
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import game_service
+from game_runtime import AnswerResult
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_MS = int(os.getenv("RESPONSE_FLUSH_INTERVAL_MS", "250"))
+MAX_BATCH_SIZE = int(os.getenv("RESPONSE_FLUSH_MAX_BATCH", "500"))
+MAX_QUEUE_SIZE = int(os.getenv("RESPONSE_QUEUE_MAX", "10000"))
+
+
+class ResponseWriter:
+    """Bounded asyncio queue of scored answers with batched bulk inserts"""
+
+    def __init__(
+        self,
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_queue_size: int = MAX_QUEUE_SIZE
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping: Optional[asyncio.Event] = None
+        # Answers the flush loop has taken off the queue for its next batch
+        self._batch: List[AnswerResult] = []
+
+        self.flush_count = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.retries = 0
+        self.batches_dropped = 0
+        self.last_batch_size = 0
+        self.max_batch_seen = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Start the background flush loop on the running event loop. After the
+        loop has died, only the loop is restarted: answers still queued stay.
+        """
+        if self.running:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._flush_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._log_exit)
+        logger.info(
+            f"Response writer started (interval={self.flush_interval * 1000:.0f}ms, "
+            f"batch={self.max_batch_size}, queue={self.max_queue_size})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still queued"""
+        if self._task is not None:
+            # Not cancelled: a batch already drained from the queue would be lost
+            # mid-insert. The loop finishes its current batch and returns.
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._queue is not None:
+            await self.flush()
+            # Everything is written; the next start() may be on another event loop
+            self._queue = None
+            self._flush_lock = None
+        logger.info(f"Response writer stopped: {self.stats()}")
+
+    @staticmethod
+    def _log_exit(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Response writer flush loop died: {task.exception()!r}")
+
+    async def enqueue(self, result: AnswerResult) -> None:
+        """
+        Queue a scored answer for persistence.
+        Duplicates are ignored. Waits for space when the queue is full, so a
+        stalled database applies backpressure instead of growing memory.
+        """
+        if result.duplicate:
+            return
+        if not self.running:
+            self.start()
+        await self._queue.put(result)
+
+    async def flush(self) -> int:
+        """
+        Write every answer queued so far.
+
+        Returns:
+            Number of rows written
+        """
+        if self._queue is None:
+            return 0
+        written = 0
+        async with self._flush_lock:
+            if self._batch:
+                batch, self._batch = self._batch, []
+                written += await self._write_batch(batch)
+            while not self._queue.empty():
+                written += await self._write_batch(self._drain(self.max_batch_size))
+        return written
+
+    def _drain(self, limit: int) -> List[AnswerResult]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _persist(self, batch: List[AnswerResult]) -> int:
+        try:
+            return await game_service.persist_answers(batch)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} player responses: {e}")
+            return 0
+
+    async def _write_batch(self, batch: List[AnswerResult]) -> int:
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        written = await self._persist(batch)
+        if not written:
+            self.retries += 1
+            written = await self._persist(batch)
+            if not written:
+                self.batches_dropped += 1
+                logger.error(f"Dropped a batch of {len(batch)} player responses after a retry")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.flush_count += 1
+        self.rows_written += written
+        self.rows_failed += len(batch) - written
+        self.last_batch_size = len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        logger.debug(f"Flushed {len(batch)} player responses in {elapsed_ms:.1f}ms")
+        return written
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=max(self.flush_interval, 0.05))
+            except asyncio.TimeoutError:
+                continue
+            # Held in self._batch rather than put back, so flush() still writes it
+            self._batch.append(first)
+            # Let answers accumulate until the interval passes or a batch fills up
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._batch) < self.max_batch_size and not self._stopping.is_set():
+                self._batch.extend(self._drain(self.max_batch_size - len(self._batch)))
+                remaining = deadline - time.monotonic()
+                if len(self._batch) >= self.max_batch_size or remaining <= 0:
+                    break
+                try:
+                    answer = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                # flush() may have swapped self._batch out while this waited
+                self._batch.append(answer)
+            try:
+                async with self._flush_lock:
+                    batch, self._batch = self._batch, []
+                    await self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Response writer flush failed: {e}")
+
+    def stats(self) -> Dict[str, any]:
+        """Flush latency and batch size metrics"""
+        return {
+            "queue_depth": (self._queue.qsize() if self._queue is not None else 0) + len(self._batch),
+            "queue_max": self.max_queue_size,
+            "flush_count": self.flush_count,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "retries": self.retries,
+            "batches_dropped": self.batches_dropped,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_seen,
+            "avg_batch_size": (self.rows_written + self.rows_failed) / self.flush_count if self.flush_count else 0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else 0,
+        }
+
+
+response_writer = ResponseWriter()
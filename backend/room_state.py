@@ -0,0 +1,344 @@
+"""
+Room State - Lobby rosters, host sockets and runtime ownership per game
+
+Socket handlers read and write this state through a RoomState backend:
+- LocalRoomState keeps it in this process (single worker, the default)
+- RedisRoomState keeps it in Redis hashes, so every worker behind the load
+  balancer sees the same rosters and hosts
+- BusRoomState does the same on the local message bus broker, the stand-in
+  for Redis when running several workers on one machine
+
+Each game's GameRuntime lives on exactly one worker, its owner. The owner is
+claimed here the first time a worker loads the runtime; other workers
+forward runtime operations to it over the bus.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import message_bus
+
+
+class LocalRoomState:
+    """In-process room state for a single worker"""
+    shared = False
+
+    def __init__(self):
+        # Structure: {pin: {socket_id: player_name}}
+        self.game_rooms: Dict[str, Dict[str, str]] = {}
+        # Structure: {pin: host_socket_id}
+        self.host_connections: Dict[str, str] = {}
+        # Connected sockets per player name, for counting distinct players in O(1)
+        # Structure: {pin: {player_name: socket_count}}
+        self.player_name_counts: Dict[str, Dict[str, int]] = {}
+        # Roster version per game, bumped on every join/leave
+        # Structure: {pin: version}
+        self.roster_versions: Dict[str, int] = {}
+        # Structure: {pin: worker_id}
+        self.owners: Dict[str, str] = {}
+
+    async def add_player(self, pin: str, sid: str, player_name: str) -> int:
+        """Add a player socket to a game; returns the new roster version"""
+        self.game_rooms.setdefault(pin, {})[sid] = player_name
+        names = self.player_name_counts.setdefault(pin, {})
+        names[player_name] = names.get(player_name, 0) + 1
+        return self._bump_version(pin)
+
+    async def remove_player(self, pin: str, sid: str, player_name: str) -> int:
+        """Remove a player socket from a game; returns the new roster version"""
+        players = self.game_rooms.get(pin, {})
+        players.pop(sid, None)
+        names = self.player_name_counts.get(pin, {})
+        if names.get(player_name, 0) > 1:
+            names[player_name] -= 1
+        else:
+            names.pop(player_name, None)
+
+        # Clean up empty rooms
+        if not players:
+            self.game_rooms.pop(pin, None)
+            self.player_name_counts.pop(pin, None)
+        return self._bump_version(pin)
+
+    def _bump_version(self, pin: str) -> int:
+        self.roster_versions[pin] = self.roster_versions.get(pin, 0) + 1
+        return self.roster_versions[pin]
+
+    async def snapshot(self, pin: str) -> dict:
+        """Full roster of a game: {players, player_count, roster_version}"""
+        players = list(self.game_rooms.get(pin, {}).values())
+        return {
+            'players': players,
+            'player_count': len(players),
+            'roster_version': self.roster_versions.get(pin, 0)
+        }
+
+    async def player_count(self, pin: str) -> int:
+        """Number of player sockets in a game"""
+        return len(self.game_rooms.get(pin, {}))
+
+    async def distinct_player_count(self, pin: str) -> int:
+        """Number of distinct player names connected to a game"""
+        return len(self.player_name_counts.get(pin, {}))
+
+    async def get_host(self, pin: str) -> Optional[str]:
+        return self.host_connections.get(pin)
+
+    async def set_host(self, pin: str, sid: str) -> Optional[str]:
+        """Make sid the host socket of a game; returns the previous host socket"""
+        previous = self.host_connections.get(pin)
+        self.host_connections[pin] = sid
+        return previous
+
+    async def clear_host(self, pin: str, sid: str) -> None:
+        """Forget the host socket of a game, if it is still sid"""
+        if self.host_connections.get(pin) == sid:
+            del self.host_connections[pin]
+
+    async def claim_owner(self, pin: str, worker_id: str) -> str:
+        """Claim a game's runtime for worker_id; returns the actual owner"""
+        return self.owners.setdefault(pin, worker_id)
+
+    async def get_owner(self, pin: str) -> Optional[str]:
+        return self.owners.get(pin)
+
+    async def release_owner(self, pin: str, worker_id: str) -> None:
+        """Give up ownership of a game's runtime, if worker_id still owns it"""
+        if self.owners.get(pin) == worker_id:
+            del self.owners[pin]
+
+    async def drop_game(self, pin: str) -> List[str]:
+        """
+        Forget everything about a game.
+
+        Returns:
+            Socket ids of the game's players and host
+        """
+        sids = list(self.game_rooms.pop(pin, {}))
+        host_sid = self.host_connections.pop(pin, None)
+        if host_sid:
+            sids.append(host_sid)
+        self.player_name_counts.pop(pin, None)
+        self.roster_versions.pop(pin, None)
+        self.owners.pop(pin, None)
+        return sids
+
+    def consistency_problems(self) -> List[str]:
+        """Check player_name_counts against game_rooms. Intended for tests."""
+        problems = []
+        for pin, players in self.game_rooms.items():
+            names: Dict[str, int] = {}
+            for player_name in players.values():
+                names[player_name] = names.get(player_name, 0) + 1
+            if self.player_name_counts.get(pin, {}) != names:
+                problems.append(f"name counts for game {pin} are {self.player_name_counts.get(pin)}, expected {names}")
+        for pin in self.player_name_counts:
+            if pin not in self.game_rooms:
+                problems.append(f"name counts kept for empty game {pin}")
+        return problems
+
+
+class BusRoomState:
+    """
+    Room state kept in hashes on the message bus broker, shared by all workers.
+    Keys: room:{pin} (sid -> name), names:{pin} (name -> socket count),
+    roster_versions, hosts and owners (pin -> value).
+    """
+    shared = True
+
+    def __init__(self, client: message_bus.BusClient):
+        self.client = client
+
+    async def add_player(self, pin: str, sid: str, player_name: str) -> int:
+        request = self.client.request
+        _, _, version = await asyncio.gather(
+            request("hset", key=f"room:{pin}", field=sid, value=player_name),
+            request("hincrby", key=f"names:{pin}", field=player_name, amount=1),
+            request("hincrby", key="roster_versions", field=pin, amount=1),
+        )
+        return version
+
+    async def remove_player(self, pin: str, sid: str, player_name: str) -> int:
+        request = self.client.request
+        _, _, version = await asyncio.gather(
+            request("hdel", key=f"room:{pin}", field=sid),
+            request("hincrby", key=f"names:{pin}", field=player_name, amount=-1, drop_zero=True),
+            request("hincrby", key="roster_versions", field=pin, amount=1),
+        )
+        return version
+
+    async def snapshot(self, pin: str) -> dict:
+        players, version = await asyncio.gather(
+            self.client.request("hgetall", key=f"room:{pin}"),
+            self.client.request("hget", key="roster_versions", field=pin),
+        )
+        return {
+            'players': list(players.values()),
+            'player_count': len(players),
+            'roster_version': version or 0
+        }
+
+    async def player_count(self, pin: str) -> int:
+        return await self.client.request("hlen", key=f"room:{pin}")
+
+    async def distinct_player_count(self, pin: str) -> int:
+        return await self.client.request("hlen", key=f"names:{pin}")
+
+    async def get_host(self, pin: str) -> Optional[str]:
+        return await self.client.request("hget", key="hosts", field=pin)
+
+    async def set_host(self, pin: str, sid: str) -> Optional[str]:
+        previous = await self.get_host(pin)
+        await self.client.request("hset", key="hosts", field=pin, value=sid)
+        return previous
+
+    async def clear_host(self, pin: str, sid: str) -> None:
+        await self.client.request("hdel_if", key="hosts", field=pin, value=sid)
+
+    async def claim_owner(self, pin: str, worker_id: str) -> str:
+        return await self.client.request("hsetnx", key="owners", field=pin, value=worker_id)
+
+    async def get_owner(self, pin: str) -> Optional[str]:
+        return await self.client.request("hget", key="owners", field=pin)
+
+    async def release_owner(self, pin: str, worker_id: str) -> None:
+        await self.client.request("hdel_if", key="owners", field=pin, value=worker_id)
+
+    async def drop_game(self, pin: str) -> List[str]:
+        request = self.client.request
+        players, host_sid = await asyncio.gather(
+            request("hgetall", key=f"room:{pin}"),
+            request("hget", key="hosts", field=pin),
+        )
+        await asyncio.gather(
+            request("del", key=f"room:{pin}"),
+            request("del", key=f"names:{pin}"),
+            request("hdel", key="roster_versions", field=pin),
+            request("hdel", key="hosts", field=pin),
+            request("hdel", key="owners", field=pin),
+        )
+        sids = list(players)
+        if host_sid:
+            sids.append(host_sid)
+        return sids
+
+    def consistency_problems(self) -> List[str]:
+        # Counts are maintained by the broker; nothing to check locally
+        return []
+
+
+class RedisRoomState:
+    """
+    Room state kept in Redis hashes, shared by all workers. Same layout as
+    BusRoomState under a key prefix; updates that read and write several keys
+    run as one transaction or Lua script.
+    """
+    shared = True
+
+    # KEYS: room, names, roster_versions; ARGV: sid, player_name, pin
+    _REMOVE_PLAYER = """
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        if redis.call('HINCRBY', KEYS[2], ARGV[2], -1) <= 0 then
+            redis.call('HDEL', KEYS[2], ARGV[2])
+        end
+        return redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+    """
+    # KEYS: hash; ARGV: field, expected value
+    _DELETE_IF = """
+        if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+            return redis.call('HDEL', KEYS[1], ARGV[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis: Any, prefix: str = "kahootit:"):
+        self.redis = redis
+        self.prefix = prefix
+        self._remove_player = redis.register_script(self._REMOVE_PLAYER)
+        self._delete_if = redis.register_script(self._DELETE_IF)
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    async def add_player(self, pin: str, sid: str, player_name: str) -> int:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(f"room:{pin}"), sid, player_name)
+            pipe.hincrby(self._key(f"names:{pin}"), player_name, 1)
+            pipe.hincrby(self._key("roster_versions"), pin, 1)
+            _, _, version = await pipe.execute()
+        return version
+
+    async def remove_player(self, pin: str, sid: str, player_name: str) -> int:
+        return await self._remove_player(
+            keys=[self._key(f"room:{pin}"), self._key(f"names:{pin}"), self._key("roster_versions")],
+            args=[sid, player_name, pin]
+        )
+
+    async def snapshot(self, pin: str) -> dict:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self._key(f"room:{pin}"))
+            pipe.hget(self._key("roster_versions"), pin)
+            players, version = await pipe.execute()
+        return {
+            'players': list(players.values()),
+            'player_count': len(players),
+            'roster_version': int(version or 0)
+        }
+
+    async def player_count(self, pin: str) -> int:
+        return await self.redis.hlen(self._key(f"room:{pin}"))
+
+    async def distinct_player_count(self, pin: str) -> int:
+        return await self.redis.hlen(self._key(f"names:{pin}"))
+
+    async def get_host(self, pin: str) -> Optional[str]:
+        return await self.redis.hget(self._key("hosts"), pin)
+
+    async def set_host(self, pin: str, sid: str) -> Optional[str]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hget(self._key("hosts"), pin)
+            pipe.hset(self._key("hosts"), pin, sid)
+            previous, _ = await pipe.execute()
+        return previous
+
+    async def clear_host(self, pin: str, sid: str) -> None:
+        await self._delete_if(keys=[self._key("hosts")], args=[pin, sid])
+
+    async def claim_owner(self, pin: str, worker_id: str) -> str:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self._key("owners"), pin, worker_id)
+            pipe.hget(self._key("owners"), pin)
+            _, owner = await pipe.execute()
+        return owner
+
+    async def get_owner(self, pin: str) -> Optional[str]:
+        return await self.redis.hget(self._key("owners"), pin)
+
+    async def release_owner(self, pin: str, worker_id: str) -> None:
+        await self._delete_if(keys=[self._key("owners")], args=[pin, worker_id])
+
+    async def drop_game(self, pin: str) -> List[str]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self._key(f"room:{pin}"))
+            pipe.hget(self._key("hosts"), pin)
+            pipe.delete(self._key(f"room:{pin}"), self._key(f"names:{pin}"))
+            pipe.hdel(self._key("roster_versions"), pin)
+            pipe.hdel(self._key("hosts"), pin)
+            pipe.hdel(self._key("owners"), pin)
+            players, host_sid, *_ = await pipe.execute()
+        sids = list(players)
+        if host_sid:
+            sids.append(host_sid)
+        return sids
+
+    def consistency_problems(self) -> List[str]:
+        # Counts are maintained atomically in Redis; nothing to check locally
+        return []
+
+
+def create_room_state():
+    """Room state backend for the configured message bus"""
+    if isinstance(message_bus.bus, message_bus.RedisBusClient):
+        return RedisRoomState(message_bus.bus.redis)
+    if message_bus.bus is not None:
+        return BusRoomState(message_bus.bus)
+    return LocalRoomState()
@@ -0,0 +1,117 @@
+"""
+Scheduler - One timer heap for every live game
+
+All server-side timers (question windows closing, periodic flushes) are kept
+in a single heap on monotonic time and fired by one asyncio task, so the cost
+of thousands of concurrent games is one heap entry each rather than one
+sleeping task per game.
+"""
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    """Handle for a scheduled callback"""
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Prevent the callback from running; the heap entry is skipped lazily"""
+        self.cancelled = True
+
+
+class TimerHeap:
+    """Runs callbacks at monotonic deadlines from a single asyncio task"""
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the timer task on the running event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop firing timers; pending timers are dropped"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._heap.clear()
+
+    def call_at(self, deadline: float, callback: Callable, *args: Any) -> Timer:
+        """
+        Schedule callback(*args) at a time.monotonic() deadline.
+        Coroutine functions are run as their own task when due.
+        """
+        if not self.running:
+            self.start()
+        timer = Timer(deadline, callback, args)
+        heapq.heappush(self._heap, (deadline, next(self._counter), timer))
+        # Only wake the loop if this timer is now the earliest one
+        if self._heap[0][2] is timer:
+            self._wakeup.set()
+        return timer
+
+    def call_later(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        """Schedule callback(*args) after delay seconds"""
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled:
+                continue
+            try:
+                outcome = timer.callback(*timer.args)
+                if asyncio.iscoroutine(outcome):
+                    asyncio.create_task(outcome).add_done_callback(_log_task_error)
+            except Exception as e:
+                logger.error(f"Timer callback {getattr(timer.callback, '__name__', timer.callback)} failed: {e}")
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Timer task failed: {task.exception()}")
+
+
+timers = TimerHeap()
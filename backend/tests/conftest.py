@@ -0,0 +1,96 @@
+"""
+Shared fixtures: a throwaway SQLite database, a quiz to play, and a Socket.IO
+server whose emits are recorded instead of sent.
+
+The environment is set before any backend module is imported, since
+database.py and the caches read it at import time.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="kahootit-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'test.db')}"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["QUESTION_CACHE_ENABLED"] = "false"
+os.environ["SQL_STATEMENT_BUDGET"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import main_api  # noqa: F401  (creates the schema)
+import models
+import game_service
+import game_runtime
+import websocket_manager
+from database import SessionLocal, AsyncSessionLocal, async_engine
+from response_writer import response_writer
+
+QUESTION_COUNT = 3
+
+
+def run(coro):
+    """Run a coroutine on a fresh event loop, then release loop-bound resources"""
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await response_writer.stop()
+            await async_engine.dispose()
+    return asyncio.run(wrapper())
+
+
+@pytest.fixture(scope="session")
+def quiz_id():
+    db = SessionLocal()
+    db.add(models.Profile(id="host-user", username="host"))
+    quiz = models.Quiz(title="Test quiz", user_id="host-user", question_count=QUESTION_COUNT)
+    db.add(quiz)
+    db.commit()
+    for index in range(QUESTION_COUNT):
+        db.add(models.Question(
+            quiz_id=quiz.id,
+            question_text=f"Question {index}",
+            options=["a", "b", "c", "d"],
+            correct_answer_index=index
+        ))
+    db.commit()
+    quiz_id = quiz.id
+    db.close()
+    return quiz_id
+
+
+@pytest.fixture
+def game(quiz_id):
+    """A new game session in the lobby: (game_session_id, pin)"""
+    async def create():
+        async with AsyncSessionLocal() as db:
+            game_session = await game_service.create_game_session(db, quiz_id, "host-user")
+            return game_session.id, game_session.pin
+    return run(create())
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Socket.IO traffic as (event, room, data) tuples; rooms are not tracked"""
+    events = []
+
+    async def emit(event, data=None, room=None, skip_sid=None, **kwargs):
+        events.append((event, room, data))
+
+    async def enter_room(sid, room, **kwargs):
+        pass
+
+    async def leave_room(sid, room, **kwargs):
+        pass
+
+    monkeypatch.setattr(websocket_manager.sio, "emit", emit)
+    monkeypatch.setattr(websocket_manager.sio, "enter_room", enter_room)
+    monkeypatch.setattr(websocket_manager.sio, "leave_room", leave_room)
+    yield events
+
+    websocket_manager.socket_index.clear()
+    websocket_manager.room_state.__init__()
+    for pin in list(game_runtime._runtimes):
+        game_runtime.discard_runtime(pin)
@@ -0,0 +1,35 @@
+"""Compactor start/stop on the shared timer heap"""
+import asyncio
+
+import compaction
+from scheduler import timers
+from conftest import run
+
+
+def test_stop_waits_for_the_running_compaction(monkeypatch):
+    monkeypatch.setattr(compaction, "COMPACTION_INTERVAL_S", 0.01)
+    compactor = compaction.Compactor()
+    finished = []
+
+    async def slow_compaction():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return []
+
+    monkeypatch.setattr(compactor, "compact_due_games", slow_compaction)
+
+    async def start_and_stop():
+        timers.start()
+        try:
+            compactor.start()
+            await asyncio.sleep(0.05)
+            assert compactor._active is not None
+            await compactor.stop()
+            assert finished == [True]
+            # Nothing is rescheduled after stop
+            await asyncio.sleep(0.05)
+            assert compactor._active is None and compactor._timer is None
+        finally:
+            await timers.stop()
+
+    run(start_and_stop())
@@ -0,0 +1,40 @@
+"""PIN lookups and PIN release as games finish"""
+import models
+import game_service
+from database import AsyncSessionLocal
+from pin_allocator import pin_allocator
+from conftest import run, QUESTION_COUNT
+
+
+def test_validate_pin_skips_finished_games_with_the_same_pin(game, quiz_id):
+    game_session_id, pin = game
+
+    async def reuse_pin():
+        async with AsyncSessionLocal() as db:
+            await game_service.end_game(db, game_session_id)
+            assert await game_service.validate_pin(db, pin) is None
+            # A newer game gets the freed PIN
+            newer = models.GameSession(pin=pin, quiz_id=quiz_id, host_id="host-user", status="lobby", current_question_index=0)
+            db.add(newer)
+            await db.commit()
+            found = await game_service.validate_pin(db, pin)
+            return newer.id, found.id if found else None
+
+    newer_id, found_id = run(reuse_pin())
+    assert found_id == newer_id
+
+
+def test_advancing_past_the_last_question_releases_the_pin(game):
+    game_session_id, pin = game
+
+    async def play_through():
+        async with AsyncSessionLocal() as db:
+            await game_service.start_game(db, game_session_id)
+            assert pin_allocator.is_live(pin)
+            for _ in range(QUESTION_COUNT):
+                await game_service.advance_question(db, game_session_id)
+            return await db.get(models.GameSession, game_session_id)
+
+    game_session = run(play_through())
+    assert game_session.status == "finished"
+    assert not pin_allocator.is_live(pin)
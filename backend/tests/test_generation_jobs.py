@@ -0,0 +1,69 @@
+"""Generation job lookups on this worker and forwarded to the worker that owns the job"""
+import asyncio
+import socket
+
+import message_bus
+import generation_jobs
+from generation_jobs import GenerationQueue, job_status, owner_of
+from conftest import run
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_local_job_status_and_cancel(monkeypatch):
+    # No worker coroutines, so the job stays queued
+    queue = GenerationQueue(workers=0, process_workers=0)
+    monkeypatch.setattr(generation_jobs, "generation_queue", queue)
+
+    async def submit_and_cancel():
+        queue.start()
+        try:
+            job = queue.submit("user", "Title", "notes.pdf", b"%PDF")
+            assert owner_of(job.id) == message_bus.WORKER_ID
+            queued = await job_status(job.id, "user")
+            hidden = await job_status(job.id, "someone-else")
+            cancelled = await job_status(job.id, "user", cancel=True)
+            return queued, hidden, cancelled
+        finally:
+            await queue.stop()
+
+    queued, hidden, cancelled = run(submit_and_cancel())
+    assert queued["status"] == "queued"
+    assert hidden is None
+    assert cancelled["status"] == "cancelled"
+
+
+def test_job_status_is_forwarded_to_the_owning_worker(monkeypatch):
+    port = _free_port()
+    calls = []
+
+    async def lookup_on_other_worker():
+        server = await message_bus.BusBroker().serve("127.0.0.1", port)
+        owner = message_bus.BusClient(f"bus://127.0.0.1:{port}")
+        this_worker = message_bus.BusClient(f"bus://127.0.0.1:{port}")
+
+        async def serve_status(payload):
+            calls.append(payload)
+            return {"job_id": payload["job_id"], "status": "running"}
+
+        owner.register("generation_job", serve_status)
+        # The owner answers calls addressed to its own worker id
+        monkeypatch.setattr(message_bus, "WORKER_ID", "owner")
+        serving = asyncio.create_task(owner.serve_calls())
+        await asyncio.sleep(0.05)
+        monkeypatch.undo()
+
+        monkeypatch.setattr(message_bus, "bus", this_worker)
+        try:
+            return await job_status("owner-abc", "user")
+        finally:
+            serving.cancel()
+            server.close()
+
+    status = run(lookup_on_other_worker())
+    assert status == {"job_id": "owner-abc", "status": "running"}
+    assert calls == [{"job_id": "owner-abc", "user_id": "user", "cancel": False, "with_preview": False}]
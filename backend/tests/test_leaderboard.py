@@ -0,0 +1,37 @@
+"""questions_answered counts answered questions only, live and from the database"""
+import game_runtime
+import game_service
+import websocket_manager as wm
+from database import AsyncSessionLocal
+from conftest import run
+
+
+def test_no_answers_are_not_counted_as_answered(game, emitted):
+    game_session_id, pin = game
+
+    async def play():
+        await wm.host_join("host", {"pin": pin})
+        await wm.join_lobby("alice-socket", {"pin": pin, "player_name": "alice"})
+        await wm.join_lobby("bob-socket", {"pin": pin, "player_name": "bob"})
+        async with AsyncSessionLocal() as db:
+            await game_service.start_game(db, game_session_id)
+        first = (await wm.run_on_owner(pin, 'open_question', question_index=0))['question']['id']
+        for sid in ("alice-socket", "bob-socket"):
+            await wm.submit_answer(sid, {"pin": pin, "question_id": first, "answer_index": 1, "time_taken_ms": 1000})
+        await wm.close_question_window(pin, first)
+
+        second = (await wm.run_on_owner(pin, 'open_question', question_index=1))['question']['id']
+        await wm.submit_answer("alice-socket", {"pin": pin, "question_id": second, "answer_index": 1, "time_taken_ms": 1000})
+        # bob skips the second question; closing the window records a no-answer for him
+        await wm.close_question_window(pin, second)
+
+        live = {entry['player_name']: entry for entry in game_runtime.get_runtime(pin).leaderboard()}
+        async with AsyncSessionLocal() as db:
+            stored = {entry['player_name']: entry for entry in await game_service.get_leaderboard(db, game_session_id)}
+        return live, stored
+
+    live, stored = run(play())
+    for standings in (live, stored):
+        assert standings['alice']['questions_answered'] == 2
+        assert standings['bob']['questions_answered'] == 1
+        assert standings['bob']['total_points'] == 0
@@ -0,0 +1,58 @@
+import base64
+
+import pytest
+from fastapi import HTTPException, Response
+
+import auth
+import main_api
+import models
+from database import SessionLocal, AsyncSessionLocal
+from conftest import run
+
+OWNER = auth.CurrentUser(id="paging-user", username="pager")
+
+
+@pytest.fixture(scope="module")
+def quiz_ids():
+    """Quizzes created within the same second, so paging relies on the id tiebreak"""
+    db = SessionLocal()
+    db.add(models.Profile(id=OWNER.id, username=OWNER.username))
+    quizzes = [models.Quiz(title=f"Quiz {index}", user_id=OWNER.id) for index in range(5)]
+    db.add_all(quizzes)
+    db.commit()
+    ids = [quiz.id for quiz in quizzes]
+    db.close()
+    return ids
+
+
+async def page(cursor=None, limit=2):
+    response = Response()
+    async with AsyncSessionLocal() as db:
+        quizzes = await main_api.get_my_quizzes(response, limit=limit, cursor=cursor, db=db, current_user=OWNER)
+    return [quiz.id for quiz in quizzes], response.headers.get("X-Next-Cursor")
+
+
+def test_pages_cover_every_quiz_once(quiz_ids):
+    async def scenario():
+        seen, cursor = [], None
+        # Bounded, so a cursor that does not advance fails instead of looping
+        for _ in quiz_ids:
+            ids, cursor = await page(cursor)
+            seen.extend(ids)
+            if cursor is None:
+                break
+        return seen
+
+    assert run(scenario()) == sorted(quiz_ids, reverse=True)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+    base64.urlsafe_b64encode(b'[1]').decode(),
+])
+def test_malformed_cursor_is_a_bad_request(quiz_ids, cursor):
+    with pytest.raises(HTTPException) as error:
+        run(page(cursor))
+    assert error.value.status_code == 400
@@ -0,0 +1,90 @@
+"""
+SQL statement budgets for the game endpoints.
+
+Endpoints are called directly with their dependencies filled in (a session
+as get_db yields it, the host as get_current_user returns it), so each count
+covers exactly the statements the handler issues. Games have enough players
+that a query per player or per answer would blow the budget.
+"""
+import pytest
+
+import auth
+import game_service
+import main_api
+import websocket_manager as wm
+from database import AsyncSessionLocal
+from query_budget import count_statements
+from conftest import run
+
+PLAYERS = 10
+
+HOST = auth.CurrentUser(id="host-user", username="host")
+
+
+async def call(endpoint, budget: int, **kwargs):
+    """Call an endpoint, failing if it issues more than `budget` statements"""
+    async with AsyncSessionLocal() as db:
+        if "db" in endpoint.__code__.co_varnames:
+            kwargs["db"] = db
+        with count_statements(budget):
+            return await endpoint(**kwargs)
+
+
+async def _play_first_question(pin: str) -> int:
+    """Start the game and have every player answer the first question"""
+    await call(main_api.start_game_session, budget=4, pin=pin, current_user=HOST)
+    question_id = (await wm.run_on_owner(pin, 'open_question', question_index=0))['question']['id']
+    for player in range(PLAYERS):
+        # Scored in memory; the row goes through the write-behind queue
+        await call(
+            main_api.submit_answer.__wrapped__, budget=0, request=None, pin=pin,
+            player_name=f"player{player}", question_id=question_id, answer_index=player % 4, time_taken_ms=1000
+        )
+    return question_id
+
+
+def test_live_game_endpoints(game, emitted):
+    _, pin = game
+
+    async def play():
+        await call(main_api.get_game_info, budget=1, pin=pin)
+        question_id = await _play_first_question(pin)
+        live = await call(main_api.get_leaderboard, budget=0, pin=pin, limit=None)
+        assert len(live["leaderboard"]) == PLAYERS
+        results = await call(main_api.get_question_results, budget=1, pin=pin, question_id=question_id, current_user=HOST)
+        assert results["total_responses"] == PLAYERS
+
+    run(play())
+
+
+def test_finished_game_endpoints(game, emitted):
+    game_session_id, pin = game
+
+    async def play():
+        question_id = await _play_first_question(pin)
+        # Flushing the queued answers is one multi-row insert
+        await call(main_api.end_game_session, budget=3, pin=pin, current_user=HOST)
+
+        stored = await call(main_api.get_leaderboard, budget=3, pin=pin, limit=None)
+        assert len(stored["leaderboard"]) == PLAYERS
+        results = await call(main_api.get_question_results, budget=3, pin=pin, question_id=question_id, current_user=HOST)
+        assert results["total_responses"] == PLAYERS
+        by_id = await call(main_api.get_session_leaderboard, budget=3, game_session_id=game_session_id, limit=PLAYERS)
+        assert by_id["leaderboard"] == stored["leaderboard"]
+        top = await call(main_api.get_session_leaderboard, budget=3, game_session_id=game_session_id, limit=3)
+        assert top["leaderboard"] == stored["leaderboard"][:3]
+
+    run(play())
+
+
+def test_budget_catches_a_query_per_player(game):
+    game_session_id, _ = game
+
+    async def per_player_lookups():
+        async with AsyncSessionLocal() as db:
+            with count_statements(budget=1):
+                for _ in range(PLAYERS):
+                    await game_service.get_leaderboard(db, game_session_id)
+
+    with pytest.raises(AssertionError):
+        run(per_player_lookups())
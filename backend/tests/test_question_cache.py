@@ -0,0 +1,27 @@
+"""Question cache totals and default location"""
+import os
+
+import question_cache
+from question_cache import QuestionCache
+
+
+def test_stats_track_entries_and_bytes_without_querying(tmp_path):
+    cache = QuestionCache(path=str(tmp_path / "cache.db"), max_bytes=10_000, enabled=True)
+    cache.put("a", [{"question": "one"}])
+    cache.put("b", [{"question": "two"}])
+    cache.put("a", [{"question": "one, longer this time"}])
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == sum(
+        row[0] for row in cache._connection().execute("SELECT size FROM chunk_questions")
+    )
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+    assert cache.get("a") is None
+
+
+def test_default_path_is_outside_the_source_tree():
+    backend_dir = os.path.dirname(os.path.abspath(question_cache.__file__))
+    assert not question_cache.QUESTION_CACHE_PATH.startswith(backend_dir + os.sep)
@@ -0,0 +1,74 @@
+"""Write-behind queue: no answer is lost to a full queue, a restart or a flush mid-batch"""
+import asyncio
+
+import game_service
+from game_runtime import AnswerResult
+from response_writer import ResponseWriter
+
+
+def _answer(n: int) -> AnswerResult:
+    return AnswerResult(
+        game_session_id=1, player_name=f"player{n}", question_id=1,
+        answer_index=0, time_taken_ms=1000, points_earned=0, is_correct=False
+    )
+
+
+def _record_writes(monkeypatch, delay: float = 0.0) -> list:
+    written = []
+
+    async def persist_answers(batch):
+        await asyncio.sleep(delay)
+        written.extend(answer.player_name for answer in batch)
+        return len(batch)
+
+    monkeypatch.setattr(game_service, "persist_answers", persist_answers)
+    return written
+
+
+def test_full_queue_does_not_kill_the_flush_loop(monkeypatch):
+    written = _record_writes(monkeypatch, delay=0.01)
+    writer = ResponseWriter(flush_interval_ms=20, max_batch_size=3, max_queue_size=5)
+
+    async def produce():
+        writer.start()
+        await asyncio.wait_for(asyncio.gather(*(writer.enqueue(_answer(n)) for n in range(50))), timeout=5)
+        assert writer.running
+        await writer.stop()
+
+    asyncio.run(produce())
+    assert sorted(written) == sorted(f"player{n}" for n in range(50))
+
+
+def test_restart_keeps_queued_answers(monkeypatch):
+    written = _record_writes(monkeypatch)
+    writer = ResponseWriter(flush_interval_ms=20)
+
+    async def crash_and_restart():
+        writer.start()
+        await writer.enqueue(_answer(0))
+        writer._task.cancel()
+        await asyncio.sleep(0)
+        assert not writer.running
+        # The next enqueue restarts the loop on the same queue
+        await writer.enqueue(_answer(1))
+        await writer.stop()
+
+    asyncio.run(crash_and_restart())
+    assert sorted(written) == ["player0", "player1"]
+
+
+def test_flush_writes_the_batch_being_collected(monkeypatch):
+    written = _record_writes(monkeypatch)
+    writer = ResponseWriter(flush_interval_ms=1000)
+
+    async def flush_mid_batch():
+        writer.start()
+        await writer.enqueue(_answer(0))
+        await asyncio.sleep(0.05)
+        # The loop holds the answer while waiting for more; flush() must still write it
+        assert await writer.flush() == 1
+        assert written == ["player0"]
+        await writer.stop()
+
+    asyncio.run(flush_mid_batch())
+    assert written == ["player0"]
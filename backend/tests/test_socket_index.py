@@ -0,0 +1,121 @@
+"""socket_index stays consistent with the room state through a game's lifecycle"""
+import asyncio
+
+import game_runtime
+import game_service
+import websocket_manager as wm
+from database import AsyncSessionLocal
+from conftest import run
+
+
+def errors(emitted):
+    return [data for event, _, data in emitted if event == 'error']
+
+
+async def _start(game_session_id):
+    async with AsyncSessionLocal() as db:
+        await game_service.start_game(db, game_session_id)
+
+
+def test_join_answer_disconnect_end(game, emitted):
+    game_session_id, pin = game
+
+    async def play():
+        await wm.host_join("host", {"pin": pin})
+        for index, name in enumerate(["alice", "bob", "carol"]):
+            await wm.join_lobby(f"player-{index}", {"pin": pin, "player_name": name})
+        assert await wm.check_index_consistency() == []
+
+        await _start(game_session_id)
+        question_id = (await wm.run_on_owner(pin, 'open_question', question_index=0))['question']['id']
+        for index in range(3):
+            ack = await wm.submit_answer(f"player-{index}", {
+                "pin": pin, "question_id": question_id, "answer_index": index, "time_taken_ms": 1000
+            })
+            assert 'error' not in ack
+        assert await wm.check_index_consistency() == []
+
+        await wm.disconnect("player-2")
+        assert "player-2" not in wm.socket_index
+        assert await wm.check_index_consistency() == []
+
+        # Rejoin under the same name from a new socket
+        await wm.join_lobby("player-2b", {"pin": pin, "player_name": "carol"})
+        assert await wm.check_index_consistency() == []
+
+        await wm.end_game("host", {"pin": pin, "final_leaderboard": []})
+        assert await wm.check_index_consistency() == []
+        assert not any(entry.pin == pin for entry in wm.socket_index.values())
+        assert game_runtime.get_runtime(pin) is None
+
+    run(play())
+    assert errors(emitted) == []
+
+
+def test_switching_games_moves_the_socket(game, quiz_id, emitted):
+    _, pin = game
+
+    async def create_second():
+        async with AsyncSessionLocal() as db:
+            return (await game_service.create_game_session(db, quiz_id, "host-user")).pin
+
+    async def play():
+        other_pin = await create_second()
+        await wm.join_lobby("player", {"pin": pin, "player_name": "alice"})
+        await wm.join_lobby("player", {"pin": other_pin, "player_name": "alice"})
+        assert wm.socket_index["player"].pin == other_pin
+        assert await wm.get_players(pin) == []
+        assert await wm.check_index_consistency() == []
+
+    run(play())
+    assert errors(emitted) == []
+
+
+def test_answers_need_a_joined_socket(game, emitted):
+    game_session_id, pin = game
+
+    async def play():
+        await wm.host_join("host", {"pin": pin})
+        await wm.join_lobby("carol-socket", {"pin": pin, "player_name": "carol"})
+        await _start(game_session_id)
+        question_id = (await wm.run_on_owner(pin, 'open_question', question_index=0))['question']['id']
+
+        spoofed = await wm.submit_answer("stranger", {
+            "pin": pin, "player_name": "carol", "question_id": question_id,
+            "answer_index": 1, "time_taken_ms": 1000
+        })
+        assert spoofed == {'error': 'Join the game before answering'}
+
+        ack = await wm.submit_answer("carol-socket", {
+            "pin": pin, "question_id": question_id, "answer_index": 0, "time_taken_ms": 1000
+        })
+        assert ack['is_correct'] is True
+        assert await wm.check_index_consistency() == []
+
+    run(play())
+
+
+def test_question_closes_once_with_concurrent_closers(game, emitted):
+    game_session_id, pin = game
+
+    async def play():
+        await wm.host_join("host", {"pin": pin})
+        for index, name in enumerate(["alice", "bob"]):
+            await wm.join_lobby(f"player-{index}", {"pin": pin, "player_name": name})
+        await _start(game_session_id)
+        question_id = (await wm.run_on_owner(pin, 'open_question', question_index=0))['question']['id']
+        for index in range(2):
+            await wm.submit_answer(f"player-{index}", {
+                "pin": pin, "question_id": question_id, "answer_index": 0, "time_taken_ms": 1000
+            })
+        # The last answer scheduled an early close; the timer and a late answer race it
+        await asyncio.gather(
+            wm.close_question_window(pin, question_id),
+            wm.close_question_window(pin, question_id),
+            *wm.close_tasks
+        )
+        assert not wm.close_tasks
+
+    run(play())
+    assert [event for event, _, _ in emitted].count('question_closed') == 1
+    assert errors(emitted) == []
@@ -2,10 +2,19 @@
 WebSocket Manager - Handles real-time communication for multiplayer games
 """
 import os
+import asyncio
 import socketio
-from typing import Dict, Set, Optional
+import time
+from typing import Any, Dict, List, NamedTuple, Set, Optional
 import logging
 
+import game_runtime
+import game_service
+from message_bus import bus, create_client_manager, WORKER_ID
+from response_writer import response_writer
+from room_state import create_room_state
+from scheduler import timers, Timer
+
 logger = logging.getLogger(__name__)
 
 # Create Socket.IO server
@@ -14,6 +23,7 @@ _sio_origins = [o.strip() for o in _raw_origins.split(",") if o.strip()]
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins=_sio_origins,
+    client_manager=create_client_manager(),
     logger=True,
     engineio_logger=True
 )
@@ -21,13 +31,45 @@ sio = socketio.AsyncServer(
 # Socket.IO ASGI app
 socket_app = socketio.ASGIApp(sio)
 
-# Track active connections
-# Structure: {pin: {socket_id: player_name}}
-game_rooms: Dict[str, Dict[str, str]] = {}
+# Rosters, host sockets and runtime ownership, shared between workers when
+# SOCKETIO_MESSAGE_BUS is set (see room_state.py)
+room_state = create_room_state()
+
+class SocketEntry(NamedTuple):
+    """What a connected socket is doing: playing or hosting a game"""
+    pin: str
+    role: str  # 'player' or 'host'
+    player_name: Optional[str] = None
+
+
+# Sockets connected to this worker and the game each is in, so per-socket
+# lookups and disconnect cleanup don't scan every game
+# Structure: {socket_id: SocketEntry}
+socket_index: Dict[str, SocketEntry] = {}
+
+# Pending close of each game's open answer window
+# Structure: {pin: Timer}
+question_timers: Dict[str, Timer] = {}
+# Games whose answer window is being closed right now, so concurrent closers
+# (timer, early close, late answers) emit the results only once
+closing_windows: Set[str] = set()
+# Early-close tasks, referenced until they finish
+close_tasks: Set[asyncio.Task] = set()
+
+# Number of leaderboard entries pushed to the room when a question closes
+LEADERBOARD_BROADCAST_SIZE = int(os.getenv("LEADERBOARD_BROADCAST_SIZE", "10"))
+MIN_TIME_LIMIT_MS = 5000
+MAX_TIME_LIMIT_MS = 120000
 
-# Track host connections
-# Structure: {pin: host_socket_id}
-host_connections: Dict[str, str] = {}
+# Answer notifications to the host are coalesced into one answers_progress
+# event per interval, so host traffic scales with time instead of player count
+ANSWER_PROGRESS_INTERVAL_MS = int(os.getenv("ANSWER_PROGRESS_INTERVAL_MS", "250"))
+ANSWER_PROGRESS_MAX_NAMES = int(os.getenv("ANSWER_PROGRESS_MAX_NAMES", "50"))
+
+# Names answered since the last answers_progress flush, and the flush timer
+# Structure: {pin: [player_name]}, {pin: Timer}
+answers_pending: Dict[str, List[str]] = {}
+progress_timers: Dict[str, Timer] = {}
 
 
 @sio.event
@@ -36,32 +78,78 @@ async def connect(sid, environ):
     logger.info(f"Client connected: {sid}")
 
 
+async def _is_host(pin: Optional[str], sid: str) -> bool:
+    if not pin or socket_index.get(sid) != SocketEntry(pin, 'host'):
+        return False
+    return await room_state.get_host(pin) == sid
+
+
+async def connected_player_count(pin: str) -> int:
+    """Number of distinct player names connected to a game"""
+    return await room_state.distinct_player_count(pin)
+
+
+async def _leave_current_game(sid: str) -> None:
+    """Remove a socket from whatever game it is in, notifying the room"""
+    entry = socket_index.pop(sid, None)
+    if entry is None:
+        return
+    
+    if entry.role == 'host':
+        await room_state.clear_host(entry.pin, sid)
+        logger.info(f"Host disconnected from game {entry.pin}")
+        return
+    
+    roster_version = await room_state.remove_player(entry.pin, sid, entry.player_name)
+    logger.info(f"Player {entry.player_name} left game {entry.pin}")
+    
+    # Notify other players
+    await sio.emit('player_left', {
+        'player_name': entry.player_name,
+        'player_count': await room_state.player_count(entry.pin),
+        'roster_version': roster_version
+    }, room=entry.pin, skip_sid=sid)
+
+
+async def check_index_consistency() -> List[str]:
+    """
+    Verify this worker's socket_index agrees with the room state. With local
+    room state every socket is on this worker, so the reverse is checked too.
+    Intended for tests.
+    
+    Returns:
+        Descriptions of every inconsistency found (empty if consistent)
+    """
+    problems = list(room_state.consistency_problems())
+    pins = {entry.pin for entry in socket_index.values()}
+    if not room_state.shared:
+        pins |= set(room_state.game_rooms) | set(room_state.host_connections)
+    
+    for pin in pins:
+        players = (await room_state.snapshot(pin))['players']
+        host_sid = await room_state.get_host(pin)
+        if not room_state.shared:
+            for sid, player_name in room_state.game_rooms.get(pin, {}).items():
+                if socket_index.get(sid) != SocketEntry(pin, 'player', player_name):
+                    problems.append(f"player {sid} in game {pin} is indexed as {socket_index.get(sid)}")
+            if host_sid and socket_index.get(host_sid) != SocketEntry(pin, 'host'):
+                problems.append(f"host {host_sid} of game {pin} is indexed as {socket_index.get(host_sid)}")
+        for sid, entry in socket_index.items():
+            if entry.pin != pin:
+                continue
+            if entry.role == 'host' and host_sid != sid:
+                problems.append(f"indexed host {sid} is not the host of game {pin}")
+            if entry.role == 'player' and entry.player_name not in players:
+                problems.append(f"indexed player {sid} is not in game {pin}")
+    return problems
+
+
 @sio.event
 async def disconnect(sid):
     """Handle WebSocket disconnection"""
     logger.info(f"Client disconnected: {sid}")
     
-    # Remove from any game rooms
-    for pin, players in list(game_rooms.items()):
-        if sid in players:
-            player_name = players.pop(sid)
-            logger.info(f"Player {player_name} left game {pin}")
-            
-            # Notify other players
-            await sio.emit('player_left', {
-                'player_name': player_name,
-                'remaining_players': list(players.values())
-            }, room=pin, skip_sid=sid)
-            
-            # Clean up empty rooms
-            if not players:
-                del game_rooms[pin]
-    
-    # Remove host connections
-    for pin, host_sid in list(host_connections.items()):
-        if sid == host_sid:
-            del host_connections[pin]
-            logger.info(f"Host disconnected from game {pin}")
+    await _leave_current_game(sid)
 
 
 @sio.event
@@ -78,38 +166,68 @@ async def join_lobby(sid, data):
             await sio.emit('error', {'message': 'PIN is required'}, room=sid)
             return
         
-        # Initialize game room if it doesn't exist
-        if pin not in game_rooms:
-            game_rooms[pin] = {}
+        # A socket plays in one game at a time
+        entry = socket_index.get(sid)
+        if entry == SocketEntry(pin, 'player', player_name):
+            # Repeated join from the same socket: just resend the snapshot
+            await sio.emit('lobby_joined', {
+                'pin': pin,
+                'player_name': player_name,
+                **await room_state.snapshot(pin)
+            }, room=sid)
+            return
+        if entry is not None:
+            await _leave_current_game(sid)
+            if entry.pin != pin:
+                await sio.leave_room(sid, entry.pin)
         
         # Add player to room
-        game_rooms[pin][sid] = player_name
+        socket_index[sid] = SocketEntry(pin, 'player', player_name)
+        roster_version = await room_state.add_player(pin, sid, player_name)
         await sio.enter_room(sid, pin)
         
-        # Get current players
-        current_players = list(game_rooms[pin].values())
+        # Players rejoining a running game are tracked by its runtime
+        await run_on_owner(pin, 'add_player', load=False, player_name=player_name)
         
-        # Confirm join to the player
+        snapshot = await room_state.snapshot(pin)
+        
+        # Confirm join to the player with a full roster snapshot
         await sio.emit('lobby_joined', {
             'pin': pin,
             'player_name': player_name,
-            'players': current_players
+            **snapshot
         }, room=sid)
         
-        # Notify all players in lobby
+        # Notify everyone else in the lobby of the change only
         await sio.emit('player_joined', {
             'player_name': player_name,
-            'players': current_players,
-            'player_count': len(current_players)
-        }, room=pin)
+            'player_count': snapshot['player_count'],
+            'roster_version': roster_version
+        }, room=pin, skip_sid=sid)
         
         logger.info(f"Player {player_name} joined lobby {pin}")
-        
+    
     except Exception as e:
         logger.error(f"Error in join_lobby: {e}")
         await sio.emit('error', {'message': 'Failed to join lobby'}, room=sid)
 
 
+@sio.event
+async def roster_sync(sid, data):
+    """
+    Client asks for a full roster snapshot after detecting a version gap.
+    Expected data: {pin: str}
+    Ack and roster_snapshot event: {players, player_count, roster_version}
+    """
+    pin = data.get('pin') if isinstance(data, dict) else None
+    if not pin:
+        return {'error': 'PIN is required'}
+    
+    snapshot = await room_state.snapshot(pin)
+    await sio.emit('roster_snapshot', snapshot, room=sid)
+    return snapshot
+
+
 @sio.event
 async def host_join(sid, data):
     """
@@ -124,20 +242,19 @@ async def host_join(sid, data):
             return
         
         # Track host connection
-        host_connections[pin] = sid
+        previous = await room_state.set_host(pin, sid)
+        if previous and previous != sid:
+            socket_index.pop(previous, None)
+        socket_index[sid] = SocketEntry(pin, 'host')
         await sio.enter_room(sid, pin)
         
-        # Get current players
-        current_players = list(game_rooms.get(pin, {}).values())
-        
         await sio.emit('host_joined', {
             'pin': pin,
-            'players': current_players,
-            'player_count': len(current_players)
+            **await room_state.snapshot(pin)
         }, room=sid)
         
         logger.info(f"Host joined game {pin}")
-        
+    
     except Exception as e:
         logger.error(f"Error in host_join: {e}")
         await sio.emit('error', {'message': 'Failed to join as host'}, room=sid)
@@ -152,7 +269,7 @@ async def start_game(sid, data):
     try:
         pin = data.get('pin')
         
-        if not pin or host_connections.get(pin) != sid:
+        if not await _is_host(pin, sid):
             await sio.emit('error', {'message': 'Not authorized to start game'}, room=sid)
             return
         
@@ -160,47 +277,420 @@ async def start_game(sid, data):
         await sio.emit('game_started', {'pin': pin}, room=pin)
         
         logger.info(f"Game {pin} started by host")
-        
+    
     except Exception as e:
         logger.error(f"Error in start_game: {e}")
         await sio.emit('error', {'message': 'Failed to start game'}, room=sid)
 
 
+def queue_answer_progress(pin: str, player_name: str) -> None:
+    """Record an answer for the next coalesced answers_progress event"""
+    answers_pending.setdefault(pin, []).append(player_name)
+    if pin not in progress_timers:
+        progress_timers[pin] = timers.call_later(
+            ANSWER_PROGRESS_INTERVAL_MS / 1000, flush_answer_progress, pin
+        )
+
+
+async def flush_answer_progress(pin: str) -> None:
+    """
+    Send the host one answers_progress event covering every answer since
+    the last flush.
+    Payload: {question_id, answered, total, new_answers, new_answer_count}
+    """
+    timer = progress_timers.pop(pin, None)
+    if timer:
+        timer.cancel()
+    names = answers_pending.pop(pin, [])
+    runtime = game_runtime.get_runtime(pin)
+    if not names or runtime is None:
+        return
+    host_sid = await room_state.get_host(pin)
+    if host_sid is None:
+        return
+    
+    await sio.emit('answers_progress', {
+        'question_id': runtime.active_question_id,
+        'answered': runtime.active_answer_count,
+        'total': await connected_player_count(pin),
+        'new_answers': names[:ANSWER_PROGRESS_MAX_NAMES],
+        'new_answer_count': len(names)
+    }, room=host_sid)
+
+
+async def open_question_window(pin: str, question_index: int, time_limit_ms: Optional[int] = None) -> Optional[dict]:
+    """
+    Open the answer window for a question and push it to the room.
+    The window is closed by the shared timer heap once its deadline and the
+    late-answer grace have passed.
+    Runs on the worker that owns the game's runtime.
+    
+    Returns:
+        The question_shown payload, or None if there is no such question
+    """
+    runtime = game_runtime.get_runtime(pin)
+    if runtime is None or runtime.question_at(question_index) is None:
+        return None
+    
+    # A question still open is closed (and scored) before the next one opens
+    if runtime.active_question_id is not None:
+        await close_question_window(pin, runtime.active_question_id)
+    
+    if time_limit_ms is not None:
+        time_limit_ms = min(max(int(time_limit_ms), MIN_TIME_LIMIT_MS), MAX_TIME_LIMIT_MS)
+    question = runtime.open_question(question_index, time.monotonic(), time_limit_ms)
+    
+    previous = question_timers.pop(pin, None)
+    if previous:
+        previous.cancel()
+    # Closing at the deadline itself would reject answers still inside the late-answer grace
+    question_timers[pin] = timers.call_at(
+        runtime.window_closes_at + game_runtime.LATE_ANSWER_GRACE_MS / 1000,
+        close_question_window, pin, question.id
+    )
+    
+    payload = {
+        'question': question.public_payload(),
+        'question_index': question_index,
+        'question_count': runtime.question_count,
+        'time_limit_ms': question.time_limit_ms
+    }
+    await sio.emit('question_shown', payload, room=pin)
+    
+    logger.info(f"Question {question_index} opened in game {pin}")
+    return payload
+
+
+async def close_question_window(pin: str, question_id: int) -> None:
+    """
+    Close a question's answer window, record non-answers, and push the
+    results and leaderboard to the room.
+    Runs on the worker that owns the game's runtime.
+    """
+    runtime = game_runtime.get_runtime(pin)
+    if runtime is None:
+        question_timers.pop(pin, None)
+        return
+    # Claimed before the first await: only one caller closes the window
+    if runtime.active_question_id != question_id or pin in closing_windows:
+        return
+    closing_windows.add(pin)
+    try:
+        await _close_question_window(pin, runtime, question_id)
+    finally:
+        closing_windows.discard(pin)
+
+
+async def _close_question_window(pin: str, runtime: game_runtime.GameRuntime, question_id: int) -> None:
+    timer = question_timers.pop(pin, None)
+    if timer:
+        timer.cancel()
+    
+    # Deliver answers still waiting to be reported before the results
+    await flush_answer_progress(pin)
+    
+    for result in runtime.close_question():
+        await response_writer.enqueue(result)
+    await response_writer.flush()
+    
+    question = runtime.questions[question_id]
+    await sio.emit('question_closed', {
+        'question_id': question_id,
+        'question_index': question.index,
+        'correct_answer_index': question.correct_answer_index,
+        'results': runtime.question_results(question_id),
+        'is_last_question': question.index + 1 >= runtime.question_count
+    }, room=pin)
+    
+    await sio.emit('leaderboard_update', {
+        'leaderboard': runtime.leaderboard(LEADERBOARD_BROADCAST_SIZE)
+    }, room=pin)
+    
+    logger.info(f"Question {question.index} closed in game {pin}")
+
+
+def close_early(pin: str, question_id: int) -> None:
+    """Close an answer window now instead of at its deadline"""
+    timer = question_timers.pop(pin, None)
+    if timer:
+        timer.cancel()
+    task = asyncio.create_task(close_question_window(pin, question_id))
+    close_tasks.add(task)
+    task.add_done_callback(_close_task_done)
+
+
+def _close_task_done(task: asyncio.Task) -> None:
+    close_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Closing an answer window failed: {task.exception()}")
+
+
+# Runtime operations. Each game's runtime lives on one worker (its owner);
+# run_on_owner executes these there, forwarding over the message bus if needed.
+# Arguments and results must be JSON-serializable.
+
+async def _owned_add_player(runtime: game_runtime.GameRuntime, player_name: str) -> bool:
+    runtime.add_player(player_name)
+    return True
+
+
+async def _owned_open_question(
+    runtime: game_runtime.GameRuntime,
+    question_index: Optional[int] = None,
+    time_limit_ms: Optional[int] = None
+) -> dict:
+    # No index means the question after the current one
+    if question_index is None:
+        question_index = runtime.current_index + 1
+    payload = await open_question_window(runtime.pin, question_index, time_limit_ms)
+    return payload or {'finished': True}
+
+
+async def _owned_close_question(runtime: game_runtime.GameRuntime) -> bool:
+    if runtime.active_question_id is None:
+        return False
+    await close_question_window(runtime.pin, runtime.active_question_id)
+    return True
+
+
+async def _owned_submit_answer(
+    runtime: game_runtime.GameRuntime,
+    player_name: str,
+    question_id: int,
+    answer_index: int,
+    time_taken_ms: int,
+    sid: Optional[str] = None
+) -> dict:
+    pin = runtime.pin
+    try:
+        result = runtime.record_answer(
+            player_name=player_name,
+            question_id=question_id,
+            answer_index=answer_index,
+            time_taken_ms=max(0, time_taken_ms),
+            player_socket_id=sid
+        )
+    except ValueError as e:
+        return {'error': str(e)}
+    
+    await response_writer.enqueue(result)
+    
+    ack = {
+        'question_id': question_id,
+        'answer_index': result.answer_index,
+        'points_earned': result.points_earned,
+        'is_correct': result.is_correct
+    }
+    
+    # Acknowledge answer received
+    if sid:
+        await sio.emit('answer_received', ack, room=sid)
+    
+    # Notify host (answer submission without revealing answer)
+    if not result.duplicate:
+        queue_answer_progress(pin, player_name)
+    
+    logger.info(f"Player {player_name} answered question {question_id} in game {pin}")
+    
+    # Close early once every connected player has answered
+    connected = await connected_player_count(pin)
+    if runtime.active_question_id == question_id and connected and runtime.active_answer_count >= connected:
+        close_early(pin, question_id)
+    
+    return ack
+
+
+async def _owned_leaderboard(runtime: game_runtime.GameRuntime, limit: Optional[int] = None) -> List[dict]:
+    return runtime.leaderboard(limit)
+
+
+async def _owned_standing(runtime: game_runtime.GameRuntime, player_name: str) -> dict:
+    return {'standing': runtime.standings.entry(player_name)}
+
+
+async def _owned_question_results(runtime: game_runtime.GameRuntime, question_id: int) -> dict:
+    return runtime.question_results(question_id)
+
+
+async def _owned_finish(runtime: game_runtime.GameRuntime) -> List[dict]:
+    """Stop a game's timers, persist its answers and drop its runtime"""
+    pin = runtime.pin
+    for pending in (question_timers, progress_timers):
+        timer = pending.pop(pin, None)
+        if timer:
+            timer.cancel()
+    answers_pending.pop(pin, None)
+    # Make sure every answer of this game is durable before it is closed out
+    await response_writer.flush()
+    game_runtime.discard_runtime(pin)
+    await room_state.release_owner(pin, WORKER_ID)
+    return runtime.leaderboard()
+
+
+_OWNER_OPERATIONS = {
+    'add_player': _owned_add_player,
+    'open_question': _owned_open_question,
+    'close_question': _owned_close_question,
+    'submit_answer': _owned_submit_answer,
+    'leaderboard': _owned_leaderboard,
+    'standing': _owned_standing,
+    'question_results': _owned_question_results,
+    'finish': _owned_finish,
+}
+
+
+async def run_on_owner(pin: str, operation: str, load: bool = True, **kwargs: Any) -> Any:
+    """
+    Run a runtime operation on the worker that owns the game's runtime:
+    here if this worker has it, otherwise forwarded over the message bus.
+    
+    Args:
+        pin: 6-digit PIN code
+        operation: Name of the operation in _OWNER_OPERATIONS
+        load: Rebuild the runtime from the database if no worker has it
+        **kwargs: Operation arguments
+    
+    Returns:
+        The operation's result, or None if the game is not active
+    """
+    runtime = game_runtime.get_runtime(pin)
+    if runtime is None and room_state.shared:
+        owner = await room_state.claim_owner(pin, WORKER_ID) if load else await room_state.get_owner(pin)
+        if owner is not None and owner != WORKER_ID:
+            try:
+                return await bus.call(owner, operation, {'pin': pin, 'load': load, **kwargs})
+            except asyncio.TimeoutError:
+                # The owner is gone; take the game over from the database
+                logger.warning(f"Worker {owner} did not answer for game {pin}, taking over its runtime")
+                await room_state.release_owner(pin, owner)
+                if not load or await room_state.claim_owner(pin, WORKER_ID) != WORKER_ID:
+                    return None
+    
+    if runtime is None:
+        if not load:
+            return None
+        runtime = await game_service.load_live_runtime(pin)
+        if runtime is None:
+            if room_state.shared:
+                await room_state.release_owner(pin, WORKER_ID)
+            return None
+    
+    return await _OWNER_OPERATIONS[operation](runtime, **kwargs)
+
+
+async def claim_runtime(pin: str) -> bool:
+    """
+    Claim ownership of a runtime this worker has just built (game start).
+    
+    Returns:
+        False if another worker already owns the game; the local runtime is
+        dropped so operations keep going to that worker
+    """
+    if not room_state.shared:
+        return True
+    if await room_state.claim_owner(pin, WORKER_ID) == WORKER_ID:
+        return True
+    game_runtime.discard_runtime(pin)
+    return False
+
+
+def _serve_owner_operation(operation: str):
+    async def handler(payload: Dict[str, Any]) -> Any:
+        pin = payload.pop('pin')
+        return await run_on_owner(pin, operation, **payload)
+    return handler
+
+
+def start_bus_rpc() -> Optional[asyncio.Task]:
+    """Serve runtime operations forwarded by other workers (no-op without a bus)"""
+    if bus is None:
+        return None
+    for operation in _OWNER_OPERATIONS:
+        bus.register(operation, _serve_owner_operation(operation))
+    return asyncio.create_task(bus.serve_calls())
+
+
 @sio.event
 async def show_question(sid, data):
     """
-    Host shows a question to all players.
-    Expected data: {pin: str, question: dict, question_index: int, time_limit_ms: int}
+    Host opens a question. The question content and timing come from the
+    server-side runtime; the answer window closes on the server.
+    Expected data: {pin: str, question_index: int, time_limit_ms: int}
     """
     try:
         pin = data.get('pin')
-        question = data.get('question')
         question_index = data.get('question_index')
-        time_limit_ms = data.get('time_limit_ms', 20000)
+        time_limit_ms = data.get('time_limit_ms')
         
-        if not pin or host_connections.get(pin) != sid:
+        if not await _is_host(pin, sid):
             await sio.emit('error', {'message': 'Not authorized'}, room=sid)
             return
         
-        # Broadcast question to all players
-        await sio.emit('question_shown', {
-            'question': question,
-            'question_index': question_index,
-            'time_limit_ms': time_limit_ms
-        }, room=pin)
-        
-        logger.info(f"Question {question_index} shown in game {pin}")
-        
+        payload = None
+        if isinstance(question_index, int):
+            payload = await run_on_owner(pin, 'open_question', question_index=question_index, time_limit_ms=time_limit_ms)
+        if not payload or payload.get('finished'):
+            await sio.emit('error', {'message': 'Question not available'}, room=sid)
+    
     except Exception as e:
         logger.error(f"Error in show_question: {e}")
         await sio.emit('error', {'message': 'Failed to show question'}, room=sid)
 
 
+@sio.event
+async def next_question(sid, data):
+    """
+    Host advances to the next question.
+    Expected data: {pin: str, time_limit_ms: int}
+    Ack: {question_index: int} or {finished: true}
+    """
+    try:
+        pin = data.get('pin')
+        
+        if not await _is_host(pin, sid):
+            await sio.emit('error', {'message': 'Not authorized'}, room=sid)
+            return {'error': 'Not authorized'}
+        
+        payload = await run_on_owner(pin, 'open_question', time_limit_ms=data.get('time_limit_ms'))
+        if payload is None:
+            return {'error': 'Game is not active'}
+        if payload.get('finished'):
+            return {'finished': True}
+        return {'question_index': payload['question_index']}
+    
+    except Exception as e:
+        logger.error(f"Error in next_question: {e}")
+        await sio.emit('error', {'message': 'Failed to show question'}, room=sid)
+        return {'error': 'Failed to show question'}
+
+
+@sio.event
+async def close_question(sid, data):
+    """
+    Host closes the open question before its time runs out.
+    Expected data: {pin: str}
+    """
+    try:
+        pin = data.get('pin')
+        
+        if not await _is_host(pin, sid):
+            await sio.emit('error', {'message': 'Not authorized'}, room=sid)
+            return
+        
+        await run_on_owner(pin, 'close_question', load=False)
+    
+    except Exception as e:
+        logger.error(f"Error in close_question: {e}")
+        await sio.emit('error', {'message': 'Failed to close question'}, room=sid)
+
+
 @sio.event
 async def submit_answer(sid, data):
     """
-    Player submits an answer.
+    Player submits an answer. The answer is validated and scored against the
+    game runtime, and the result is returned as the event acknowledgement.
     Expected data: {pin: str, question_id: int, answer_index: int, time_taken_ms: int}
+    Ack: {question_id, answer_index, points_earned, is_correct} or {error: str}
     """
     try:
         pin = data.get('pin')
@@ -208,25 +698,31 @@ async def submit_answer(sid, data):
         answer_index = data.get('answer_index')
         time_taken_ms = data.get('time_taken_ms')
         
-        player_name = game_rooms.get(pin, {}).get(sid, 'Unknown')
-        
-        # Acknowledge answer received
-        await sio.emit('answer_received', {
-            'question_id': question_id,
-            'answer_index': answer_index
-        }, room=sid)
-        
-        # Notify host (answer submission without revealing answer)
-        if pin in host_connections:
-            await sio.emit('player_answered', {
-                'player_name': player_name
-            }, room=host_connections[pin])
-        
-        logger.info(f"Player {player_name} answered question {question_id} in game {pin}")
-        
+        # The player is whoever this socket joined as; a client-supplied name is never trusted
+        entry = socket_index.get(sid)
+        if entry is None or entry.pin != pin or entry.role != 'player' or not entry.player_name:
+            return {'error': 'Join the game before answering'}
+        player_name = entry.player_name
+        
+        if not all(isinstance(value, int) for value in (question_id, answer_index, time_taken_ms)):
+            return {'error': 'question_id, answer_index and time_taken_ms must be integers'}
+        
+        ack = await run_on_owner(
+            pin, 'submit_answer',
+            player_name=player_name,
+            question_id=question_id,
+            answer_index=answer_index,
+            time_taken_ms=time_taken_ms,
+            sid=sid
+        )
+        if ack is None:
+            return {'error': 'Game not found or not currently active'}
+        return ack
+    
     except Exception as e:
         logger.error(f"Error in submit_answer: {e}")
         await sio.emit('error', {'message': 'Failed to submit answer'}, room=sid)
+        return {'error': 'Failed to submit answer'}
 
 
 @sio.event
@@ -239,7 +735,7 @@ async def update_leaderboard(sid, data):
         pin = data.get('pin')
         leaderboard = data.get('leaderboard', [])
         
-        if not pin or host_connections.get(pin) != sid:
+        if not await _is_host(pin, sid):
             await sio.emit('error', {'message': 'Not authorized'}, room=sid)
             return
         
@@ -249,7 +745,7 @@ async def update_leaderboard(sid, data):
         }, room=pin)
         
         logger.info(f"Leaderboard updated for game {pin}")
-        
+    
     except Exception as e:
         logger.error(f"Error in update_leaderboard: {e}")
         await sio.emit('error', {'message': 'Failed to update leaderboard'}, room=sid)
@@ -265,7 +761,7 @@ async def end_game(sid, data):
         pin = data.get('pin')
         final_leaderboard = data.get('final_leaderboard', [])
         
-        if not pin or host_connections.get(pin) != sid:
+        if not await _is_host(pin, sid):
             await sio.emit('error', {'message': 'Not authorized'}, room=sid)
             return
         
@@ -277,24 +773,27 @@ async def end_game(sid, data):
         logger.info(f"Game {pin} ended by host")
         
         # Clean up
-        if pin in game_rooms:
-            del game_rooms[pin]
-        if pin in host_connections:
-            del host_connections[pin]
-        
+        await close_game(pin)
+    
     except Exception as e:
         logger.error(f"Error in end_game: {e}")
         await sio.emit('error', {'message': 'Failed to end game'}, room=sid)
 
 
+async def close_game(pin: str) -> None:
+    """Finish a game's runtime on its owner and forget its rooms"""
+    await run_on_owner(pin, 'finish', load=False)
+    for game_sid in await room_state.drop_game(pin):
+        socket_index.pop(game_sid, None)
+
+
 # Helper function to get player count for a game
-def get_player_count(pin: str) -> int:
+async def get_player_count(pin: str) -> int:
     """Get number of players in a game lobby"""
-    return len(game_rooms.get(pin, {}))
+    return await room_state.player_count(pin)
 
 
 # Helper function to get players list
-def get_players(pin: str) -> list:
+async def get_players(pin: str) -> list:
     """Get list of player names in a game"""
-    return list(game_rooms.get(pin, {}).values())
-
+    return (await room_state.snapshot(pin))['players']
@@ -1,10 +1,23 @@
 "use client";
 
-import { useState, FormEvent, useEffect } from "react";
+import { useState, FormEvent, useEffect, useRef } from "react";
 import { useRouter } from "next/navigation";
 import { useAuth } from "../../context/AuthContext";
 import { API_BASE_URL } from "../../lib/api";
 
+const JOB_POLL_INTERVAL_MS = 2000;
+
+interface GenerationJob {
+    job_id: string;
+    status: "queued" | "running" | "succeeded" | "failed" | "cancelled";
+    quiz_title: string;
+    quiz_id: number | null;
+    num_questions_generated: number;
+    error: string | null;
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export default function CreateKahootPage() {
     const { token, isLoading: authIsLoading, isAuthenticated } = useAuth();
 
@@ -17,6 +30,8 @@ export default function CreateKahootPage() {
     const [isSubmitting, setIsSubmitting] = useState(false);
     const [error, setError] = useState<string | null>(null);
     const [successMessage, setSuccessMessage] = useState<string | null>(null);
+    const [job, setJob] = useState<GenerationJob | null>(null);
+    const cancelledJobId = useRef<string | null>(null);
 
     const router = useRouter();
 
@@ -94,13 +109,44 @@ export default function CreateKahootPage() {
                 );
             }
 
+            // Generation runs in the background; poll the job until it finishes
+            let current: GenerationJob = result;
+            setJob(current);
+            while (current.status === "queued" || current.status === "running") {
+                await sleep(JOB_POLL_INTERVAL_MS);
+                if (cancelledJobId.current === current.job_id) {
+                    break;
+                }
+                const jobResponse = await fetch(
+                    `${API_BASE_URL}/jobs/${current.job_id}`,
+                    { headers: { Authorization: `Bearer ${token}` } }
+                );
+                const jobResult = await jobResponse.json();
+                if (!jobResponse.ok) {
+                    throw new Error(
+                        jobResult.detail || `HTTP error! status: ${jobResponse.status}`
+                    );
+                }
+                current = jobResult;
+                setJob(current);
+            }
+
+            if (cancelledJobId.current === current.job_id || current.status === "cancelled") {
+                setError("Quiz generation was cancelled.");
+                return;
+            }
+            if (current.status === "failed") {
+                throw new Error(current.error || "Could not generate questions from the PDF.");
+            }
+
             setSuccessMessage(
-                `Quiz "${result.quiz_title}" created successfully! Redirecting...`
+                `Quiz "${current.quiz_title}" created successfully! Redirecting...`
             );
             
             // Redirect to the quiz page after a short delay
+            const quizId = current.quiz_id;
             setTimeout(() => {
-                router.push(`/quiz/${result.quiz_id}`);
+                router.push(`/quiz/${quizId}`);
             }, 1500);
             setStartPage("");
             setEndPage("");
@@ -111,10 +157,24 @@ export default function CreateKahootPage() {
                 err instanceof Error ? err.message : "An unexpected error occurred. Please try again."
             );
         } finally {
+            setJob(null);
             setIsSubmitting(false);
         }
     };
 
+    const handleCancel = async () => {
+        if (!job || !token) return;
+        cancelledJobId.current = job.job_id;
+        try {
+            await fetch(`${API_BASE_URL}/jobs/${job.job_id}`, {
+                method: "DELETE",
+                headers: { Authorization: `Bearer ${token}` },
+            });
+        } catch (err: unknown) {
+            console.error("Failed to cancel quiz generation:", err);
+        }
+    };
+
     if (authIsLoading && !error) {
         return (
             <main className="flex flex-col items-center justify-center min-h-screen p-4">
@@ -254,8 +314,23 @@ export default function CreateKahootPage() {
                             }
                             className="w-full py-3 px-6 bg-purple-600 hover:bg-purple-700 text-white font-bold rounded transition-colors duration-200 disabled:opacity-50 disabled:cursor-not-allowed"
                         >
-                            {isSubmitting ? "Creating..." : "Create Kahoot"}
+                            {!isSubmitting
+                                ? "Create Kahoot"
+                                : job?.status === "queued"
+                                ? "Waiting in queue..."
+                                : job?.status === "running"
+                                ? "Generating questions..."
+                                : "Creating..."}
                         </button>
+                        {job && (
+                            <button
+                                type="button"
+                                onClick={handleCancel}
+                                className="w-full py-2 px-6 border border-gray-300 text-gray-700 font-semibold rounded hover:bg-gray-50 transition-colors duration-200"
+                            >
+                                Cancel
+                            </button>
+                        )}
                     </form>
                 </div>
             </div>
@@ -3,7 +3,8 @@
 import { useParams, useRouter } from "next/navigation";
 import { useState, useEffect, useRef } from "react";
 import { useAuth } from "../../../context/AuthContext";
-import { connectSocket, disconnectSocket } from "../../../lib/websocket";
+import { applyRosterDelta, checkRosterVersion, connectSocket, disconnectSocket } from "../../../lib/websocket";
+import type { AnswersProgressEvent, LeaderboardUpdateEvent, QuestionClosedEvent, RosterDeltaEvent, RosterSnapshotEvent } from "../../../lib/websocket";
 import { API_BASE_URL } from "../../../lib/api";
 import type { Socket } from "socket.io-client";
 
@@ -36,7 +37,7 @@ export default function HostLobbyPage() {
     const [questions, setQuestions] = useState<Question[]>([]);
     const [currentQuestionIndex, setCurrentQuestionIndex] = useState(0);
     const [gameStarted, setGameStarted] = useState(false);
-    const [answeredPlayers, setAnsweredPlayers] = useState<string[]>([]);
+    const [answeredCount, setAnsweredCount] = useState(0);
     const [answerDistribution, setAnswerDistribution] = useState<{ [key: number]: number }>({ 0: 0, 1: 0, 2: 0, 3: 0 });
     const [timeLeft, setTimeLeft] = useState<number>(20);
     const [showingAnswer, setShowingAnswer] = useState(false);
@@ -51,6 +52,7 @@ export default function HostLobbyPage() {
     const timerRef = useRef<NodeJS.Timeout | null>(null);
     
     const socketRef = useRef<Socket | null>(null);
+    const rosterVersionRef = useRef(0);
 
     // Fetch game info
     useEffect(() => {
@@ -87,32 +89,46 @@ export default function HostLobbyPage() {
             socket.emit('host_join', { pin });
         });
 
-        socket.on('host_joined', (data: { pin: string; players: string[]; player_count: number }) => {
+        socket.on('host_joined', (data: RosterSnapshotEvent & { pin: string }) => {
+            rosterVersionRef.current = data.roster_version;
             setPlayers(data.players);
         });
 
-        socket.on('player_joined', (data: { player_name: string; players: string[]; player_count: number }) => {
+        socket.on('roster_snapshot', (data: RosterSnapshotEvent) => {
+            rosterVersionRef.current = data.roster_version;
             setPlayers(data.players);
         });
 
-        socket.on('player_left', (data: { player_name: string; remaining_players: string[] }) => {
-            setPlayers(data.remaining_players);
+        const handleRosterDelta = (change: 'joined' | 'left') => (data: RosterDeltaEvent) => {
+            const status = checkRosterVersion(rosterVersionRef.current, data);
+            if (status === 'gap') {
+                socket.emit('roster_sync', { pin });
+                return;
+            }
+            if (status === 'stale') return;
+            rosterVersionRef.current = data.roster_version;
+            setPlayers((prev) => applyRosterDelta(prev, data.player_name, change));
+        };
+
+        socket.on('player_joined', handleRosterDelta('joined'));
+
+        socket.on('player_left', handleRosterDelta('left'));
+
+        // Coalesced answer notifications, at most one per server flush interval
+        socket.on('answers_progress', (data: AnswersProgressEvent) => {
+            setAnsweredCount(data.answered);
         });
 
-        socket.on('player_answered', (data: { player_name: string }) => {
-            setAnsweredPlayers((prev) => {
-                const updated = [...prev, data.player_name];
-                // Auto-advance if all players have answered
-                checkIfAllAnswered(updated);
-                return updated;
-            });
+        // The server closes the answer window (on timeout or once everyone answered)
+        socket.on('question_closed', (data: QuestionClosedEvent) => {
+            if (timerRef.current) clearInterval(timerRef.current);
+            setTimeLeft(0);
+            setAnswerDistribution(data.results.distribution);
+            setShowingAnswer(true);
         });
 
-        socket.on('answer_submitted', (data: { player_name: string; answer_index: number }) => {
-            setAnswerDistribution((prev) => ({
-                ...prev,
-                [data.answer_index]: (prev[data.answer_index] || 0) + 1
-            }));
+        socket.on('leaderboard_update', (data: LeaderboardUpdateEvent) => {
+            setLeaderboard(data.leaderboard);
         });
 
         return () => {
@@ -171,80 +187,42 @@ export default function HostLobbyPage() {
         const qs = questionsArray || questions;
         if (index >= qs.length || !socketRef.current) return;
 
-        const question = qs[index];
         setCurrentQuestionIndex(index);
-        setAnsweredPlayers([]);
+        setAnsweredCount(0);
         setAnswerDistribution({ 0: 0, 1: 0, 2: 0, 3: 0 });
         setTimeLeft(20);
 
-        // Start timer countdown
+        // Countdown display only; the server owns the answer window
         if (timerRef.current) clearInterval(timerRef.current);
         timerRef.current = setInterval(() => {
             setTimeLeft((prev) => {
                 if (prev <= 1) {
                     if (timerRef.current) clearInterval(timerRef.current);
-                    // Auto-submit incorrect answers for players who didn't answer
-                    markUnansweredPlayersIncorrect();
-                    // Show answer reveal
-                    setShowingAnswer(true);
                     return 0;
                 }
                 return prev - 1;
             });
         }, 1000);
 
-        // Emit question to all players
+        // Ask the server to open the question for all players
         socketRef.current.emit('show_question', {
             pin,
-            question: {
-                id: question.id,
-                question_text: question.question_text,
-                options: question.options
-            },
             question_index: index,
             time_limit_ms: 20000
         });
     };
 
-    const markUnansweredPlayersIncorrect = async () => {
-        if (!questions[currentQuestionIndex]) return;
-        
-        // Find players who haven't answered
-        const unansweredPlayers = players.filter(p => !answeredPlayers.includes(p));
-        
-        // Submit incorrect answers for them
-        for (const playerName of unansweredPlayers) {
-            try {
-                await fetch(`${API_BASE_URL}/api/game/${pin}/answer`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/x-www-form-urlencoded',
-                    },
-                    body: new URLSearchParams({
-                        player_name: playerName,
-                        question_id: questions[currentQuestionIndex].id.toString(),
-                        answer_index: '-1', // -1 indicates no answer/timeout
-                        time_taken_ms: '20000', // Full time elapsed
-                    }),
-                });
-            } catch (err) {
-                console.error(`Failed to mark ${playerName} as unanswered:`, err);
-            }
-        }
-    };
+    const handleNextQuestion = () => {
+        if (!socketRef.current) return;
 
-    const handleNextQuestion = async () => {
         if (!showingAnswer) {
-            // If answer isn't showing yet, reveal it first
-            if (timerRef.current) clearInterval(timerRef.current);
-            await markUnansweredPlayersIncorrect();
-            setShowingAnswer(true);
+            // Close the question early; the server answers with question_closed
+            socketRef.current.emit('close_question', { pin });
             return;
         }
 
-        // After showing answer, show leaderboard
+        // After showing answer, show the leaderboard pushed at question close
         if (!showingLeaderboard) {
-            await fetchLeaderboard();
             setShowingLeaderboard(true);
             return;
         }
@@ -264,30 +242,6 @@ export default function HostLobbyPage() {
         }
     };
 
-    const fetchLeaderboard = async () => {
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/game/${pin}/leaderboard`);
-            if (response.ok) {
-                const data = await response.json();
-                setLeaderboard(data.leaderboard || []);
-            }
-        } catch (err) {
-            console.error('Failed to fetch leaderboard:', err);
-        }
-    };
-
-    const checkIfAllAnswered = (answeredList: string[]) => {
-        // If all players have answered and answer isn't shown yet
-        if (answeredList.length === players.length && players.length > 0 && !showingAnswer) {
-            // Auto-advance when all players have answered
-            // Stop timer
-            if (timerRef.current) clearInterval(timerRef.current);
-            setTimeLeft(0);
-            // Show answer reveal
-            setShowingAnswer(true);
-        }
-    };
-
     const handleEndGame = async () => {
         if (!socketRef.current) return;
 
@@ -573,7 +527,7 @@ export default function HostLobbyPage() {
                                     <div className="absolute right-8 top-1/2 transform -translate-y-1/2 text-center">
                                         <p className="text-sm font-semibold text-gray-600 mb-1">Remaining</p>
                                         <p className="text-5xl font-black text-gray-800">
-                                            {players.length - answeredPlayers.length}
+                                            {Math.max(players.length - answeredCount, 0)}
                                         </p>
                                     </div>
 
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useCallback } from "react";
 import ProtectedRoute from "../../components/ProtectedRoute";
 import { useAuth } from "../../context/AuthContext";
 import { API_BASE_URL } from "../../lib/api";
@@ -16,6 +16,9 @@ interface ApiQuiz {
 }
 
 // Define the structure QuizTile expects (matching QuizTile.tsx)
+// Quizzes fetched per page from /quizzes/my
+const QUIZ_PAGE_SIZE = 24;
+
 interface QuizTileData {
     id: string;
     title: string;
@@ -24,11 +27,79 @@ interface QuizTileData {
     pdfFilename?: string; // Optional: if you want to use it in QuizTile
 }
 
+// Adapt API data to what QuizTile expects
+const adaptQuizzes = (data: ApiQuiz[]): QuizTileData[] =>
+    data.map((apiQuiz) => ({
+        id: String(apiQuiz.id), // Ensure id is a string
+        title: apiQuiz.title,
+        questionCount: apiQuiz.question_count,
+        // Format date string (e.g., "2023-10-26") or pass ISO string if QuizTile handles it
+        dateCreated: new Date(
+            apiQuiz.created_at
+        ).toLocaleDateString("en-CA"), // Example: YYYY-MM-DD
+        pdfFilename: apiQuiz.pdf_filename,
+    }));
+
 export default function MyKahootsPage() {
     const { token } = useAuth();
     const [quizzes, setQuizzes] = useState<QuizTileData[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    // Cursor for the next page of quizzes; null once everything is loaded
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+    const fetchQuizPage = useCallback(async (cursor: string | null) => {
+        const params = new URLSearchParams({ limit: String(QUIZ_PAGE_SIZE) });
+        if (cursor) {
+            params.set("cursor", cursor);
+        }
+        const response = await fetch(
+            `${API_BASE_URL}/quizzes/my?${params.toString()}`,
+            {
+                method: "GET",
+                headers: {
+                    "Content-Type": "application/json",
+                    Authorization: `Bearer ${token}`,
+                },
+            }
+        );
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({
+                detail: "Failed to fetch quizzes. Server returned an error.",
+            }));
+            throw new Error(
+                errorData.detail ||
+                    `HTTP error! status: ${response.status}`
+            );
+        }
+
+        const data: ApiQuiz[] = await response.json();
+        return {
+            quizzes: adaptQuizzes(data),
+            nextCursor: response.headers.get("X-Next-Cursor"),
+        };
+    }, [token]);
+
+    const handleLoadMore = async () => {
+        if (!nextCursor || isLoadingMore) return;
+        setIsLoadingMore(true);
+        setError(null);
+        try {
+            const page = await fetchQuizPage(nextCursor);
+            setQuizzes((previous) => [...previous, ...page.quizzes]);
+            setNextCursor(page.nextCursor);
+        } catch (err: unknown) {
+            console.error("Failed to fetch more quizzes:", err);
+            setError(
+                err instanceof Error ? err.message :
+                    "An unexpected error occurred while fetching your quizzes."
+            );
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
 
     useEffect(() => {
         const fetchQuizzes = async () => {
@@ -48,42 +119,9 @@ export default function MyKahootsPage() {
             setError(null);
 
             try {
-                const response = await fetch(
-                    `${API_BASE_URL}/quizzes/my`,
-                    {
-                        method: "GET",
-                        headers: {
-                            "Content-Type": "application/json",
-                            Authorization: `Bearer ${token}`,
-                        },
-                    }
-                );
-
-                if (!response.ok) {
-                    const errorData = await response.json().catch(() => ({
-                        detail: "Failed to fetch quizzes. Server returned an error.",
-                    }));
-                    throw new Error(
-                        errorData.detail ||
-                            `HTTP error! status: ${response.status}`
-                    );
-                }
-
-                const data: ApiQuiz[] = await response.json();
-
-                // Adapt API data to what QuizTile expects
-                const adaptedQuizzes: QuizTileData[] = data.map((apiQuiz) => ({
-                    id: String(apiQuiz.id), // Ensure id is a string
-                    title: apiQuiz.title,
-                    questionCount: apiQuiz.question_count,
-                    // Format date string (e.g., "2023-10-26") or pass ISO string if QuizTile handles it
-                    dateCreated: new Date(
-                        apiQuiz.created_at
-                    ).toLocaleDateString("en-CA"), // Example: YYYY-MM-DD
-                    pdfFilename: apiQuiz.pdf_filename,
-                }));
-
-                setQuizzes(adaptedQuizzes);
+                const page = await fetchQuizPage(null);
+                setQuizzes(page.quizzes);
+                setNextCursor(page.nextCursor);
             } catch (err: unknown) {
                 console.error("Failed to fetch quizzes:", err);
                 setError(
@@ -96,7 +134,7 @@ export default function MyKahootsPage() {
         };
 
         fetchQuizzes();
-    }, [token]); // Re-fetch if token changes
+    }, [token, fetchQuizPage]); // Re-fetch if token changes
 
     return (
         <ProtectedRoute>
@@ -108,7 +146,7 @@ export default function MyKahootsPage() {
                             My Kahoots
                         </h1>
                         <p className="text-white/70 text-lg">
-                            {quizzes.length} {quizzes.length === 1 ? 'quiz' : 'quizzes'} ready to play
+                            {quizzes.length}{nextCursor ? '+' : ''} {quizzes.length === 1 && !nextCursor ? 'quiz' : 'quizzes'} ready to play
                         </p>
                     </div>
                 </div>
@@ -158,6 +196,19 @@ export default function MyKahootsPage() {
                         ))}
                     </div>
                 )}
+
+                {/* Load More */}
+                {!isLoading && nextCursor && (
+                    <div className="text-center mt-10">
+                        <button
+                            onClick={handleLoadMore}
+                            disabled={isLoadingMore}
+                            className="bg-white/20 hover:bg-white/30 disabled:opacity-50 text-white font-bold text-lg px-8 py-3 rounded-2xl border-2 border-white/30 transition-colors"
+                        >
+                            {isLoadingMore ? "Loading..." : "Load more"}
+                        </button>
+                    </div>
+                )}
             </div>
         </ProtectedRoute>
     );
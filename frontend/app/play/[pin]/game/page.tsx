@@ -3,7 +3,7 @@
 import { useParams, useRouter } from "next/navigation";
 import { useState, useEffect, useRef } from "react";
 import { connectSocket, disconnectSocket } from "../../../../lib/websocket";
-import { API_BASE_URL } from "../../../../lib/api";
+import type { AnswerAckEvent } from "../../../../lib/websocket";
 import type { Socket } from "socket.io-client";
 
 interface Question {
@@ -107,7 +107,7 @@ export default function GamePage() {
         };
     }, [currentQuestion, hasAnswered]);
 
-    const handleAnswerClick = async (answerIndex: number) => {
+    const handleAnswerClick = (answerIndex: number) => {
         if (hasAnswered || !currentQuestion) return;
 
         setSelectedAnswer(answerIndex);
@@ -116,46 +116,34 @@ export default function GamePage() {
 
         const timeTaken = Date.now() - startTimeRef.current;
 
-        // Submit answer to backend
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/game/${pin}/answer`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: new URLSearchParams({
-                    player_name: playerName,
-                    question_id: currentQuestion.id.toString(),
-                    answer_index: answerIndex.toString(),
-                    time_taken_ms: timeTaken.toString(),
-                }),
-            });
-
-            if (response.ok) {
-                const data = await response.json();
-                setIsCorrect(data.is_correct);
-                setPointsEarned(data.points_earned);
-                setScore((prev) => prev + data.points_earned);
-                
-                // Show result after 2 seconds
-                setTimeout(() => {
-                    setShowWaiting(false);
-                }, 2000);
-            }
-        } catch (err) {
-            console.error('Failed to submit answer:', err);
+        // Submit answer over the socket; the server scores it and replies in the ack
+        const socket = socketRef.current;
+        if (!socket) {
             setShowWaiting(false);
+            return;
         }
 
-        // Also emit via WebSocket
-        if (socketRef.current) {
-            socketRef.current.emit('submit_answer', {
-                pin,
-                question_id: currentQuestion.id,
-                answer_index: answerIndex,
-                time_taken_ms: timeTaken,
-            });
-        }
+        socket.emit('submit_answer', {
+            pin,
+            question_id: currentQuestion.id,
+            answer_index: answerIndex,
+            time_taken_ms: timeTaken,
+        }, (ack: AnswerAckEvent) => {
+            if ('error' in ack) {
+                console.error('Failed to submit answer:', ack.error);
+                setShowWaiting(false);
+                return;
+            }
+
+            setIsCorrect(ack.is_correct);
+            setPointsEarned(ack.points_earned);
+            setScore((prev) => prev + ack.points_earned);
+
+            // Show result after 2 seconds
+            setTimeout(() => {
+                setShowWaiting(false);
+            }, 2000);
+        });
     };
 
     const answerColors = [
@@ -3,7 +3,8 @@
 import { useParams, useRouter } from "next/navigation";
 import { useState, useEffect, useRef } from "react";
 import Link from "next/link";
-import { connectSocket, disconnectSocket } from "../../../../lib/websocket";
+import { applyRosterDelta, checkRosterVersion, connectSocket, disconnectSocket } from "../../../../lib/websocket";
+import type { LobbyJoinedEvent, RosterDeltaEvent, RosterSnapshotEvent } from "../../../../lib/websocket";
 import { API_BASE_URL } from "../../../../lib/api";
 import type { Socket } from "socket.io-client";
 
@@ -28,6 +29,7 @@ export default function LobbyPage() {
     const [isConnecting, setIsConnecting] = useState(false);
     
     const socketRef = useRef<Socket | null>(null);
+    const rosterVersionRef = useRef(0);
 
     // Step 1: Validate PIN with backend
     useEffect(() => {
@@ -72,14 +74,27 @@ export default function LobbyPage() {
 
         const socket = socketRef.current;
 
+        const handleRosterDelta = (change: 'joined' | 'left') => (data: RosterDeltaEvent) => {
+            const status = checkRosterVersion(rosterVersionRef.current, data);
+            if (status === 'gap') {
+                socket.emit('roster_sync', { pin });
+                return;
+            }
+            if (status === 'stale') return;
+            rosterVersionRef.current = data.roster_version;
+            setPlayers((prev) => applyRosterDelta(prev, data.player_name, change));
+        };
+
         // Listen for other players joining
-        socket.on('player_joined', (data: { player_name: string; players: string[]; player_count: number }) => {
-            setPlayers(data.players);
-        });
+        socket.on('player_joined', handleRosterDelta('joined'));
 
         // Listen for players leaving
-        socket.on('player_left', (data: { player_name: string; remaining_players: string[] }) => {
-            setPlayers(data.remaining_players);
+        socket.on('player_left', handleRosterDelta('left'));
+
+        // Full roster after a missed update
+        socket.on('roster_snapshot', (data: RosterSnapshotEvent) => {
+            rosterVersionRef.current = data.roster_version;
+            setPlayers(data.players);
         });
 
         // Listen for game start
@@ -96,6 +111,7 @@ export default function LobbyPage() {
         return () => {
             socket.off('player_joined');
             socket.off('player_left');
+            socket.off('roster_snapshot');
             socket.off('game_started');
             socket.off('error');
         };
@@ -149,7 +165,8 @@ export default function LobbyPage() {
 
             // Wait for lobby joined confirmation
             await new Promise<void>((resolve, reject) => {
-                socket.on('lobby_joined', (data: { pin: string; player_name: string; players: string[] }) => {
+                socket.on('lobby_joined', (data: LobbyJoinedEvent) => {
+                    rosterVersionRef.current = data.roster_version;
                     setPlayers(data.players);
                     setHasJoined(true);
                     // Store player name for game page
@@ -44,21 +44,44 @@ export function disconnectSocket() {
 }
 
 // Event types for type safety
-export interface LobbyJoinedEvent {
+export interface LobbyJoinedEvent extends RosterSnapshotEvent {
     pin: string;
     player_name: string;
-    players: string[];
 }
 
-export interface PlayerJoinedEvent {
-    player_name: string;
+// Full roster, sent on join and in reply to roster_sync
+export interface RosterSnapshotEvent {
     players: string[];
     player_count: number;
+    roster_version: number;
 }
 
-export interface PlayerLeftEvent {
+// Roster change events carry only the player that joined or left
+export interface RosterDeltaEvent {
     player_name: string;
-    remaining_players: string[];
+    player_count: number;
+    roster_version: number;
+}
+
+export type PlayerJoinedEvent = RosterDeltaEvent;
+export type PlayerLeftEvent = RosterDeltaEvent;
+
+export function applyRosterDelta(players: string[], playerName: string, change: 'joined' | 'left'): string[] {
+    if (change === 'joined') {
+        return [...players, playerName];
+    }
+    const index = players.indexOf(playerName);
+    return index === -1 ? players : [...players.slice(0, index), ...players.slice(index + 1)];
+}
+
+/**
+ * Track a roster delta against the last applied version.
+ * Returns 'apply' for the next version, 'stale' for one already covered,
+ * and 'gap' when versions were missed and a roster_sync is needed.
+ */
+export function checkRosterVersion(currentVersion: number, delta: RosterDeltaEvent): 'apply' | 'stale' | 'gap' {
+    if (delta.roster_version <= currentVersion) return 'stale';
+    return delta.roster_version === currentVersion + 1 ? 'apply' : 'gap';
 }
 
 export interface GameStartedEvent {
@@ -72,12 +95,41 @@ export interface QuestionShownEvent {
         options: string[];
     };
     question_index: number;
+    question_count: number;
     time_limit_ms: number;
 }
 
+export interface QuestionClosedEvent {
+    question_id: number;
+    question_index: number;
+    correct_answer_index: number;
+    results: {
+        question_id: number;
+        total_responses: number;
+        distribution: { [key: number]: number };
+        correct_answer_index: number;
+        correct_count: number;
+        accuracy: number;
+        average_time_ms: number | null;
+    };
+    is_last_question: boolean;
+}
+
 export interface AnswerReceivedEvent {
     question_id: number;
     answer_index: number;
+    points_earned: number;
+    is_correct: boolean;
+}
+
+export type AnswerAckEvent = AnswerReceivedEvent | { error: string };
+
+export interface AnswersProgressEvent {
+    question_id: number | null;
+    answered: number;
+    total: number;
+    new_answers: string[];
+    new_answer_count: number;
 }
 
 export interface LeaderboardUpdateEvent {
@@ -0,0 +1,8 @@
+-- Hot queries on player_responses: per-question results filter by game and
+-- question and count by answer; the leaderboard groups by game and player.
+-- Mirrors backend/migrations.py version 1.
+CREATE INDEX IF NOT EXISTS ix_player_responses_game_question
+    ON player_responses (game_session_id, question_id, answer_index);
+
+CREATE INDEX IF NOT EXISTS ix_player_responses_game_player
+    ON player_responses (game_session_id, player_name);
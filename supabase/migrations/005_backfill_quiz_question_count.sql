@@ -0,0 +1,6 @@
+-- Game info and question advancing read quizzes.question_count instead of
+-- counting question rows; make the stored count match for existing quizzes.
+-- Mirrors backend/migrations.py version 2.
+UPDATE quizzes SET question_count = (
+    SELECT COUNT(*) FROM questions WHERE questions.quiz_id = quizzes.id
+);
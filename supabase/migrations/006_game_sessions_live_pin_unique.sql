@@ -0,0 +1,9 @@
+-- PINs only need to be unique among live games (lobby/active); finished
+-- games keep their PIN for history and it can be handed out again.
+-- Mirrors backend/migrations.py version 3.
+ALTER TABLE game_sessions DROP CONSTRAINT IF EXISTS game_sessions_pin_key;
+
+CREATE INDEX IF NOT EXISTS ix_game_sessions_pin ON game_sessions (pin);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_game_sessions_live_pin
+    ON game_sessions (pin) WHERE status IN ('lobby', 'active');
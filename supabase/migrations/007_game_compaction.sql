@@ -0,0 +1,28 @@
+-- Finished games older than the retention period are rolled up into these
+-- summary tables and their player_responses rows deleted (backend/compaction.py).
+-- Mirrors models.GameArchive, GamePlayerSummary and GameQuestionSummary.
+CREATE TABLE IF NOT EXISTS game_archives (
+    game_session_id BIGINT PRIMARY KEY REFERENCES game_sessions(id) ON DELETE CASCADE,
+    compacted_at TIMESTAMPTZ DEFAULT NOW(),
+    response_count INTEGER NOT NULL DEFAULT 0,
+    archive_path VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS game_player_summaries (
+    game_session_id BIGINT NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
+    player_name VARCHAR(50) NOT NULL,
+    total_points INTEGER NOT NULL DEFAULT 0,
+    questions_answered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (game_session_id, player_name)
+);
+
+CREATE TABLE IF NOT EXISTS game_question_summaries (
+    game_session_id BIGINT NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
+    question_id BIGINT NOT NULL REFERENCES questions(id),
+    distribution JSONB NOT NULL,
+    total_responses INTEGER NOT NULL DEFAULT 0,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    answered_count INTEGER NOT NULL DEFAULT 0,
+    total_time_ms BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (game_session_id, question_id)
+);
@@ -0,0 +1,4 @@
+-- Keyset pagination of /quizzes/my: a user's quizzes ordered by (created_at, id).
+-- Mirrors backend/migrations.py version 4.
+CREATE INDEX IF NOT EXISTS ix_quizzes_user_created
+    ON quizzes (user_id, created_at, id);